@@ -0,0 +1,91 @@
+import os
+import threading
+from fetch_data.cache_PU import PARQUET_AVAILABLE
+from fetch_data.store_PU import partition_root
+
+if PARQUET_AVAILABLE:
+    import pyarrow as pa
+
+# The loaded dataset is published as an uncompressed Arrow IPC file and memory
+# mapped by every session and process. The frames handed to the pages are
+# read-only views of the mapped pages, so the data is held once by the OS page
+# cache however many sessions or worker processes read it.
+#
+# Set PU_MMAP_DATASET=0 to keep private in-memory frames instead
+mmap_enabled = os.environ.get("PU_MMAP_DATASET", "1") != "0" and PARQUET_AVAILABLE
+
+_key_field = b"dataset_key"
+
+
+def arrow_path(name, property_id=None):
+    """Return the path of a published frame in a property's cache partition"""
+    return os.path.join(partition_root(property_id), f'{name}.arrow')
+
+
+def publish_frame(df, name, key, property_id=None):
+    """
+    Write a frame to an Arrow IPC file that sessions can memory map.
+
+    The file is written next to its final path and moved into place, so
+    readers either map the previous file or the complete new one.
+
+    Args:
+        df (pandas.DataFrame): Frame to publish
+        name (str): Name of the frame ('price' or 'df_1')
+        key (str): Dataset key stored in the file, checked by map_frame()
+        property_id (str, optional): Property partition (default: the default property)
+
+    Returns:
+        bool: True if the file was written
+    """
+    if not mmap_enabled:
+        return False
+
+    path = arrow_path(name, property_id)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}), _key_field: key.encode()})
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with pa.OSFile(tmp_path, 'wb') as sink:
+            # No compression: compressed buffers would have to be copied to be read
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp_path, path)
+        return True
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return False
+
+
+def map_frame(name, key, property_id=None):
+    """
+    Memory map a published frame if it was built for this dataset key.
+
+    Columns are wrapped without copying (one block per column), so the frame
+    is read-only: pages work on shallow copies and assign whole columns.
+
+    Args:
+        name (str): Name of the frame ('price' or 'df_1')
+        key (str): Expected dataset key
+        property_id (str, optional): Property partition (default: the default property)
+
+    Returns:
+        pandas.DataFrame or None: The mapped frame, None if missing or stale
+    """
+    if not mmap_enabled:
+        return None
+
+    path = arrow_path(name, property_id)
+    if not os.path.exists(path):
+        return None
+
+    try:
+        reader = pa.ipc.open_file(pa.memory_map(path, 'r'))
+        if (reader.schema.metadata or {}).get(_key_field) != key.encode():
+            return None
+        return reader.read_all().to_pandas(split_blocks=True, self_destruct=False)
+    except Exception:
+        return None
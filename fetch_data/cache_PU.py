@@ -0,0 +1,193 @@
+import os
+import threading
+import json
+import hashlib
+import pandas as pd
+from pathlib import Path
+
+# Parquet support comes from pyarrow; without it every workbook is parsed from Excel
+try:
+    import pyarrow  # noqa: F401
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+# Define the directory holding the columnar copies of the workbooks
+project_root = Path(__file__).parent.parent
+cache_root = os.path.join(project_root, 'data', 'cache')
+index_path = os.path.join(cache_root, 'index.json')
+
+
+def file_hash(file_path, chunk_size=1 << 20):
+    """
+    Compute the SHA-256 of a file's content.
+
+    Args:
+        file_path (str): Path of the file to hash
+        chunk_size (int, optional): Number of bytes read at a time
+
+    Returns:
+        str: Hex digest of the file content
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _load_index():
+    """Load the cache index (workbook name -> hash, mtime and size)"""
+    if not os.path.exists(index_path):
+        return {}
+
+    try:
+        with open(index_path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        # A corrupt index only costs a re-parse
+        return {}
+
+
+def _save_index(index):
+    """Write the cache index atomically so concurrent sessions never read half a file"""
+    os.makedirs(cache_root, exist_ok=True)
+    tmp_path = f"{index_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(index, f, indent=2)
+    os.replace(tmp_path, index_path)
+
+
+def _parquet_path(content_hash):
+    """Columnar copies are content-addressed, so identical workbooks share one file"""
+    return os.path.join(cache_root, f"{content_hash}.parquet")
+
+
+def cache_key(file_path, index=None):
+    """
+    Return the cache key of a workbook.
+
+    The content hash is the identity of the cached copy; the mtime and size are
+    used as a fast path so an unchanged workbook is not re-hashed on every load.
+
+    Args:
+        file_path (str): Path of the workbook
+        index (dict, optional): Already loaded cache index
+
+    Returns:
+        dict: {'sha256', 'mtime_ns', 'size'}
+    """
+    if index is None:
+        index = _load_index()
+
+    stat = os.stat(file_path)
+    entry = index.get(os.path.basename(file_path))
+    if entry and entry.get('mtime_ns') == stat.st_mtime_ns and entry.get('size') == stat.st_size:
+        return entry
+
+    return {'sha256': file_hash(file_path), 'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size}
+
+
+def current_keys(file_paths):
+    """
+    Return the cache key of several workbooks, loading the index once.
+
+    Args:
+        file_paths (list): Paths of the workbooks
+
+    Returns:
+        list: One {'sha256', 'mtime_ns', 'size'} dict per workbook
+    """
+    index = _load_index()
+    return [cache_key(file_path, index) for file_path in file_paths]
+
+
+def lookup_cached(file_path, index=None):
+    """
+    Look a workbook up in the columnar cache without parsing it.
+
+    Args:
+        file_path (str): Path of the workbook
+        index (dict, optional): Already loaded cache index
+
+    Returns:
+        tuple: (DataFrame or None on a miss, cache key)
+    """
+    if index is None:
+        index = _load_index()
+    key = cache_key(file_path, index)
+
+    if not PARQUET_AVAILABLE:
+        return None, key
+
+    parquet_path = _parquet_path(key['sha256'])
+    if os.path.exists(parquet_path):
+        try:
+            df = pd.read_parquet(parquet_path)
+            # Record the new mtime so the next load skips the hash
+            if index.get(os.path.basename(file_path)) != key:
+                index[os.path.basename(file_path)] = key
+                _save_index(index)
+            return df, key
+        except Exception:
+            # Unreadable copy: treat it as a miss so it gets rebuilt
+            pass
+
+    return None, key
+
+
+def store_cached(file_path, key, df):
+    """
+    Write the columnar copy of a freshly parsed workbook and record its key.
+
+    Args:
+        file_path (str): Path of the workbook
+        key (dict): Cache key returned by lookup_cached
+        df (pandas.DataFrame): The parsed workbook
+    """
+    if not PARQUET_AVAILABLE:
+        return
+
+    parquet_path = _parquet_path(key['sha256'])
+    try:
+        os.makedirs(cache_root, exist_ok=True)
+        tmp_path = f"{parquet_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        df.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, parquet_path)
+        index = _load_index()
+        index[os.path.basename(file_path)] = key
+        _save_index(index)
+    except Exception:
+        # The cache is an optimisation only; a failed write must not break loading
+        pass
+
+
+def read_cached(file_path, parse):
+    """
+    Load a workbook through the columnar cache.
+
+    The workbook is only parsed (with ``parse(file_path)``) when its content hash
+    or mtime changed since the last load; otherwise the Parquet copy is returned.
+
+    Args:
+        file_path (str): Path of the workbook
+        parse (callable): Function parsing the workbook into a DataFrame
+
+    Returns:
+        pandas.DataFrame: The parsed workbook
+    """
+    df, key = lookup_cached(file_path)
+    if df is None:
+        df = parse(file_path)
+        store_cached(file_path, key, df)
+    return df
+
+
+def clear_cache():
+    """Remove every cached columnar copy and the index"""
+    if not os.path.exists(cache_root):
+        return
+
+    for name in os.listdir(cache_root):
+        if name.endswith('.parquet') or name == 'index.json':
+            os.remove(os.path.join(cache_root, name))
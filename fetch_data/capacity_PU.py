@@ -0,0 +1,106 @@
+import os
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+from fetch_data.property_PU import get_property, properties_path
+
+# The capacity calendar gives the rooms on sale of a property for every night,
+# as a dense date x room-type matrix of whole years. It starts from the
+# property's entry in properties.json:
+#
+#   "capacity": 70,
+#   "room_types": {"standard": 60, "family": 10},          (optional)
+#   "capacity_changes": [                                  (optional)
+#       {"start": "2026-01-05", "end": "2026-02-15", "rooms": 0, "reason": "closure"},
+#       {"start": "2026-07-01", "end": "2026-08-31", "room_type": "family", "rooms": 4,
+#        "reason": "renovation"}
+#   ]
+#
+# Without room types the property has a single 'all' column. A change sets the
+# rooms of one room type (or of every type, scaled to the given total) from
+# start to end inclusive; later changes override earlier ones.
+default_room_type = 'all'
+
+
+def _properties_mtime():
+    """Modification time of properties.json, so edits invalidate the cached matrices"""
+    return os.path.getmtime(properties_path) if os.path.exists(properties_path) else None
+
+
+def _room_types(entry):
+    """Return {room_type: rooms} of a property entry"""
+    room_types = entry.get("room_types")
+    if room_types:
+        return {str(name): int(rooms) for name, rooms in room_types.items()}
+    return {default_room_type: int(entry["capacity"])}
+
+
+@lru_cache(maxsize=64)
+def _matrix_for_years(property_id, first_year, last_year, mtime):
+    """Build the capacity matrix of whole years, cached until properties.json changes"""
+    entry = get_property(property_id)
+    room_types = _room_types(entry)
+    names = list(room_types)
+    base = np.array([room_types[name] for name in names], dtype=np.int32)
+
+    days = pd.date_range(f"{first_year}-01-01", f"{last_year}-12-31", freq="D")
+    matrix = np.tile(base, (len(days), 1))
+
+    for change in entry.get("capacity_changes", []):
+        start = days.searchsorted(pd.Timestamp(change["start"]))
+        stop = days.searchsorted(pd.Timestamp(change.get("end", change["start"])), side="right")
+        if start >= stop:
+            continue
+        room_type = change.get("room_type")
+        if room_type is not None:
+            matrix[start:stop, names.index(room_type)] = int(change["rooms"])
+        else:
+            # Spread a whole-property figure over the room types pro rata
+            share = base / base.sum() if base.sum() else np.full(len(base), 1 / len(base))
+            rooms = np.floor(share * int(change["rooms"])).astype(np.int32)
+            rooms[np.argmax(share)] += int(change["rooms"]) - rooms.sum()
+            matrix[start:stop] = rooms
+
+    matrix.setflags(write=False)
+    return days, names, matrix
+
+
+def capacity_matrix(property_id=None, start=None, end=None):
+    """
+    Return the capacity calendar of a property as a date x room-type matrix.
+
+    The matrix covers the whole years of the range and is cached per property
+    until properties.json changes; callers must not modify it.
+
+    Args:
+        property_id (str, optional): Property identifier (default: the default property)
+        start (date-like, optional): First date to cover (default: today)
+        end (date-like, optional): Last date to cover (default: start)
+
+    Returns:
+        tuple: (days, room_types, matrix) with days a DatetimeIndex, room_types
+            the column names and matrix an int32 array of shape
+            (len(days), len(room_types))
+    """
+    start = pd.Timestamp(start) if start is not None else pd.Timestamp.today()
+    end = pd.Timestamp(end) if end is not None else start
+    property_id = property_id or get_property()["property_id"]
+    return _matrix_for_years(property_id, start.year, end.year, _properties_mtime())
+
+
+def daily_capacity(property_id=None, start=None, end=None, room_type=None):
+    """
+    Return the rooms on sale of a property for every night of whole years.
+
+    Args:
+        property_id (str, optional): Property identifier (default: the default property)
+        start (date-like, optional): First date to cover (default: today)
+        end (date-like, optional): Last date to cover (default: start)
+        room_type (str, optional): Only count this room type (default: all rooms)
+
+    Returns:
+        pandas.Series: Rooms indexed by day
+    """
+    days, names, matrix = capacity_matrix(property_id, start, end)
+    rooms = matrix[:, names.index(room_type)] if room_type is not None else matrix.sum(axis=1)
+    return pd.Series(rooms, index=pd.Index(days, name='day'), name='capacity')
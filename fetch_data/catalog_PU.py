@@ -0,0 +1,315 @@
+import os
+import threading
+import json
+import hashlib
+import datetime
+import pandas as pd
+from pathlib import Path
+from fetch_data.cache_PU import file_hash
+from fetch_data.property_PU import default_property_id
+from fetch_data.reader_PU import read_as_of
+
+# The catalog is the list of ingested PU snapshots; load_data reads it instead
+# of a hard-coded list of file names. It is local runtime state (parse
+# statistics are rewritten on every cold parse), so it is not versioned: a
+# fresh checkout seeds it from the legacy files found in data/.
+project_root = Path(__file__).parent.parent
+data_root = os.path.join(project_root, 'data')
+catalog_path = os.path.join(data_root, 'catalog.json')
+
+# Last catalog version and per-property digests read, with the (mtime, size)
+# of the file they were read from
+_version_cache = {}
+
+# Entry fields that define what a property's dataset is built from
+snapshot_identity = ("file_name", "role", "sha256", "as_of", "precedence")
+
+# Writers re-read the catalog and save it while holding this lock, so threads
+# loading several properties at once (see portfolio_PU) neither drop each
+# other's changes nor roll the version back
+catalog_lock = threading.RLock()
+
+# Files loaded before the catalog existed, used to seed it on first run
+legacy_file_names = ["2023_PU.xlsx", "2024_PU.xlsx", "2025_02_13_PU.xlsx", "2025_2025_03_13_PU.xlsx"]
+legacy_separate_file = "2025_02_12_PU.xlsx"
+
+
+def _bootstrap_catalog():
+    """Seed the catalog with the legacy files that actually exist on disk"""
+    catalog = {"version": 0, "snapshots": []}
+    legacy = [(name, "main") for name in legacy_file_names] + [(legacy_separate_file, "separate")]
+    for file_name, role in legacy:
+        file_path = os.path.join(data_root, file_name)
+        if os.path.exists(file_path):
+            entry = _new_entry(file_name, role)
+            # These files were ingested before the catalog: use their modification time
+            modified = datetime.datetime.fromtimestamp(os.path.getmtime(file_path))
+            entry["ingested_at"] = modified.isoformat(timespec="seconds")
+            catalog["snapshots"].append(entry)
+    return catalog
+
+
+def _new_entry(file_name, role, property_id=None):
+    """Create a catalog entry; statistics are filled in when the file is parsed"""
+    file_path = os.path.join(data_root, file_name)
+    return {
+        "file_name": file_name,
+        "role": role,
+        "property_id": property_id or default_property_id(),
+        "sha256": file_hash(file_path),
+        "size": os.path.getsize(file_path),
+        "as_of": read_as_of(file_path),
+        "rows": None,
+        "date_min": None,
+        "date_max": None,
+        "parse_seconds": None,
+        "ingested_at": datetime.datetime.now().isoformat(timespec="seconds"),
+    }
+
+
+def load_catalog():
+    """
+    Load the snapshot catalog, creating it from the legacy file list if needed.
+
+    Returns:
+        dict: {'version': int, 'snapshots': [entry, ...]}
+    """
+    with catalog_lock:
+        if not os.path.exists(catalog_path):
+            catalog = _bootstrap_catalog()
+            save_catalog(catalog)
+            return catalog
+
+        with open(catalog_path, 'r') as f:
+            catalog = json.load(f)
+
+        # Entries written before snapshots had an as-of date get one on first read
+        missing = [entry for entry in catalog["snapshots"] if not entry.get("as_of")]
+        for entry in missing:
+            entry["as_of"] = read_as_of(os.path.join(data_root, entry["file_name"]))
+        if missing:
+            save_catalog(catalog, bump=False)
+
+        return catalog
+
+
+def save_catalog(catalog, bump=True):
+    """
+    Write the catalog atomically, bumping its version by default.
+
+    Args:
+        catalog (dict): The catalog to write
+        bump (bool, optional): False when only statistics changed, so the
+            loaded dataset stays valid
+    """
+    with catalog_lock:
+        if bump:
+            catalog["version"] = catalog.get("version", 0) + 1
+        os.makedirs(data_root, exist_ok=True)
+        tmp_path = f"{catalog_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(catalog, f, indent=2)
+        os.replace(tmp_path, catalog_path)
+
+
+def _read_versions():
+    """Catalog version and per-property snapshot digests, re-read only when the file changed"""
+    try:
+        stat = os.stat(catalog_path)
+    except OSError:
+        return {"version": 0, "properties": {}}
+
+    # Every page rerun asks for the version: only re-read the file when it changed
+    signature = (stat.st_mtime_ns, stat.st_size)
+    if _version_cache.get("signature") == signature:
+        return _version_cache
+
+    try:
+        with open(catalog_path, 'r') as f:
+            catalog = json.load(f)
+    except (OSError, ValueError):
+        return {"version": 0, "properties": {}}
+
+    # A property's dataset only depends on what its snapshots are, not on their statistics
+    described = {}
+    for entry in catalog.get("snapshots", []):
+        described.setdefault(snapshot_property(entry), []).append([entry.get(field) for field in snapshot_identity])
+    properties = {
+        property_id: hashlib.sha256(json.dumps(entries).encode()).hexdigest()
+        for property_id, entries in described.items()
+    }
+
+    _version_cache.update(signature=signature, version=catalog.get("version", 0), properties=properties)
+    return _version_cache
+
+
+def get_catalog_version():
+    """
+    Return the catalog version, which changes with every ingested snapshot.
+
+    Returns:
+        int: Catalog version (0 if no catalog exists yet)
+    """
+    return _read_versions()["version"]
+
+
+def get_property_version(property_id=None):
+    """
+    Return the version of one property's snapshots.
+
+    It only changes when a snapshot of that property is added, replaced or
+    reordered, so ingesting a file for one property leaves the others current.
+
+    Args:
+        property_id (str, optional): Property (default: the default property)
+
+    Returns:
+        str: Digest of the property's snapshot entries ('' if it has none)
+    """
+    return _read_versions()["properties"].get(property_id or default_property_id(), "")
+
+
+def snapshot_property(entry):
+    """Return the property of a catalog entry (entries without one belong to the default property)"""
+    return entry.get("property_id") or default_property_id()
+
+
+def list_snapshots(role=None, catalog=None, property_id=None):
+    """
+    List the catalogued snapshots in ingestion order.
+
+    Args:
+        role (str, optional): Only return 'main' or 'separate' snapshots
+        catalog (dict, optional): Already loaded catalog
+        property_id (str, optional): Only return the snapshots of this property
+
+    Returns:
+        list: Catalog entries
+    """
+    if catalog is None:
+        catalog = load_catalog()
+    return [
+        entry for entry in catalog["snapshots"]
+        if (role is None or entry["role"] == role)
+        and (property_id is None or snapshot_property(entry) == property_id)
+    ]
+
+
+def unique_snapshots(entries):
+    """
+    Drop snapshots whose content is identical to an earlier one.
+
+    Files are compared by their SHA-256 digest, so this is a single pass over
+    the entries whatever their number.
+
+    Args:
+        entries (list): Catalog entries in ingestion order
+
+    Returns:
+        list: The first entry of every distinct file content
+    """
+    seen = set()
+    unique = []
+    for entry in entries:
+        if entry.get("sha256") in seen:
+            continue
+        seen.add(entry.get("sha256"))
+        unique.append(entry)
+    return unique
+
+
+def find_snapshot_by_hash(sha256, catalog=None, property_id=None):
+    """
+    Find the catalogued snapshot with a given content digest.
+
+    Args:
+        sha256 (str): SHA-256 digest of the file
+        catalog (dict, optional): Already loaded catalog
+        property_id (str, optional): Only look at the snapshots of this property
+            (the same file can be ingested for several properties)
+
+    Returns:
+        dict or None: The first matching catalog entry
+    """
+    for entry in list_snapshots(catalog=catalog, property_id=property_id):
+        if entry.get("sha256") == sha256:
+            return entry
+    return None
+
+
+def snapshot_ranks(entries):
+    """
+    Rank snapshots by precedence, the latest one getting the highest rank.
+
+    Snapshots are ordered by their optional 'precedence' (an integer set by
+    hand in the catalog, 0 by default), then by as-of date, then by ingestion
+    order. When two snapshots cover the same stay date, the higher rank wins.
+
+    Args:
+        entries (list): Catalog entries in ingestion order
+
+    Returns:
+        dict: {file_name: rank}
+    """
+    order = sorted(
+        range(len(entries)),
+        key=lambda i: (entries[i].get("precedence", 0), entries[i].get("as_of") or "", i),
+    )
+    return {entries[i]["file_name"]: rank for rank, i in enumerate(order)}
+
+
+def register_snapshot(file_name, role="main", catalog=None, property_id=None):
+    """
+    Add a snapshot to the catalog, or refresh its entry if it is already there.
+
+    Args:
+        file_name (str): Path of the workbook, relative to the data directory
+        role (str, optional): 'main' or 'separate'
+        catalog (dict, optional): Already loaded catalog (saved in place)
+        property_id (str, optional): Property the snapshot belongs to
+            (default: the default property)
+
+    Returns:
+        dict: The catalog entry
+    """
+    entry = _new_entry(file_name, role, property_id)
+    with catalog_lock:
+        if catalog is None:
+            catalog = load_catalog()
+
+        for i, existing in enumerate(catalog["snapshots"]):
+            if existing["file_name"] == file_name:
+                catalog["snapshots"][i] = entry
+                break
+        else:
+            catalog["snapshots"].append(entry)
+
+        save_catalog(catalog)
+    return entry
+
+
+def update_snapshot_stats(entry, df, parse_seconds=None):
+    """
+    Record the row count and stay-date range of a parsed snapshot.
+
+    Args:
+        entry (dict): Catalog entry to update in place
+        df (pandas.DataFrame): The parsed workbook (raw or renamed columns)
+        parse_seconds (float, optional): Time spent parsing the workbook
+
+    Returns:
+        bool: True if the entry changed
+    """
+    day_column = 'day' if 'day' in df.columns else 'Date'
+    days = pd.to_datetime(df[day_column], errors='coerce').dropna()
+    stats = {
+        "rows": int(len(df)),
+        "date_min": str(days.min().date()) if not days.empty else None,
+        "date_max": str(days.max().date()) if not days.empty else None,
+    }
+    if parse_seconds is not None:
+        stats["parse_seconds"] = round(parse_seconds, 3)
+
+    changed = any(entry.get(key) != value for key, value in stats.items())
+    entry.update(stats)
+    return changed
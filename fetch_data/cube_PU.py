@@ -0,0 +1,81 @@
+import pandas as pd
+from fetch_data.schema_PU import apply_schema
+from fetch_data.store_PU import upsert_rows
+from utils.calendar_dimension import join_calendar
+
+# The cube holds rooms, customers and room revenue summed by stay date and
+# segment. Pages read roll-ups of it (week, month, year) instead of grouping the
+# raw rows on every rerun; the roll-ups are small and memoized per dataset.
+cube_dimensions = ['day', 'type', 'sous_type']
+cube_measures = ['n_rooms', 'n_customers', 'ca_room']
+cube_store = 'cube'
+
+# Calendar columns added by each roll-up level, as {column: calendar column}.
+# Weeks are ISO weeks grouped under the calendar year of their days, like the
+# 'week' column of the analysis page.
+rollup_levels = {
+    'day': {},
+    'week': {'year': 'year', 'week': 'iso_week'},
+    'month': {'year': 'year', 'month': 'month', 'month_name': 'month_name', 'days_in_month': 'days_in_month'},
+    'year': {'year': 'year'},
+}
+
+
+def build_cube(df):
+    """
+    Aggregate price rows to the cube grain.
+
+    Args:
+        df (pandas.DataFrame): Transformed price rows
+
+    Returns:
+        pandas.DataFrame: One row per (day, type, sous_type) with the summed measures
+    """
+    cube = df.groupby(cube_dimensions, observed=True)[cube_measures].sum().reset_index()
+    return apply_schema(cube)
+
+
+def update_cube(cube, new_rows):
+    """
+    Merge the rows of a new snapshot into the cube.
+
+    Snapshots replace whole stay dates, so every stored cell of a date the
+    new snapshot covers is dropped, including segments it no longer has.
+
+    Args:
+        cube (pandas.DataFrame): Current cube
+        new_rows (pandas.DataFrame): Transformed rows of the new snapshot
+
+    Returns:
+        pandas.DataFrame: The updated cube
+    """
+    return apply_schema(upsert_rows(cube, build_cube(new_rows)))
+
+
+def rollup(cube, level='month', by=('type', 'sous_type')):
+    """
+    Roll the cube up to a calendar level.
+
+    Args:
+        cube (pandas.DataFrame): The cube
+        level (str, optional): 'day', 'week', 'month' or 'year' (default: 'month')
+        by (tuple, optional): Segment columns kept (default: ('type', 'sous_type'))
+
+    Returns:
+        pandas.DataFrame: One row per period and segment with the summed
+            measures; levels above 'day' also give the last stay date
+            ('last_day') of each group
+    """
+    if level not in rollup_levels:
+        raise ValueError(f"Unknown roll-up level: {level}")
+
+    by = list(by)
+    if level == 'day':
+        return cube.groupby(['day'] + by, observed=True)[cube_measures].sum().reset_index()
+
+    columns = rollup_levels[level]
+    frame = join_calendar(cube[['day'] + by + cube_measures].copy(), columns)
+    return frame.groupby(list(columns) + by, observed=True).agg(
+        **{measure: (measure, 'sum') for measure in cube_measures},
+        last_day=('day', 'max'),
+    ).reset_index()
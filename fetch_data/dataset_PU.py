@@ -0,0 +1,303 @@
+import os
+import threading
+import pandas as pd
+from collections import OrderedDict
+from fetch_data.arrow_PU import map_frame, publish_frame
+from fetch_data.catalog_PU import get_property_version, list_snapshots, snapshot_identity, unique_snapshots
+from fetch_data.fact_store_PU import fact_store_enabled, query_facts, sync_fact_store
+from fetch_data.cube_PU import rollup
+from fetch_data.fetch_data_PU import dataset_key, load_cube, load_data
+from fetch_data.property_PU import default_property_id
+from utils.period_to_date import build_period_sums, update_period_sums
+
+# The dataset of each property is loaded on first use and cached for every page
+# and session of this process, so reruns only pay for their aggregations; a
+# property nobody looks at is never loaded. It is reloaded when invalidate() is
+# called for it or when its own snapshots change in the catalog, e.g. after an
+# upload handled by another process.
+#
+# The frames are memory-mapped views of an Arrow file published by the first
+# process that loads them (see arrow_PU), so sessions and processes share one
+# copy of the data instead of each holding their own.
+_lock = threading.Lock()
+
+# Invalidation counter of each property, bumped by invalidate()
+_counters = {}
+
+# Loaded datasets, one per property, least recently used first. A property's
+# entry is replaced when its version changes; the cap only evicts other
+# properties, counting the memory private to this process (mapped frames are
+# shared and cost next to nothing).
+cache_max_mb = float(os.environ.get("PU_CACHE_MAX_MB", 512))
+_cache = OrderedDict()
+
+
+def get_version(property_id=None):
+    """
+    Return the current dataset version of a property.
+
+    Args:
+        property_id (str, optional): Property (default: the default property)
+
+    Returns:
+        tuple: (invalidation counter, catalog version of the property's snapshots)
+    """
+    property_id = property_id or default_property_id()
+    return _counters.get(property_id, 0), get_property_version(property_id)
+
+
+def _entry_bytes(*frames):
+    """Memory used by the private frames of a cached dataset"""
+    return int(sum(frame.memory_usage(index=False, deep=True).sum() for frame in frames))
+
+
+def _evict(keep):
+    """Drop least recently used properties until the cache fits in its memory cap"""
+    cap = cache_max_mb * 1024 * 1024
+    while len(_cache) > 1 and sum(entry["bytes"] for entry in _cache.values()) > cap:
+        oldest = next(key for key in _cache if key != keep)
+        del _cache[oldest]
+
+
+def _load(property_id):
+    """Load a property's dataset, from the shared mapping when it is current"""
+    # Map the published frames if another session or process already built them
+    key = dataset_key(property_id)
+    price, df_1 = map_frame('price', key, property_id), map_frame('df_1', key, property_id)
+    private = []
+
+    if price is None or df_1 is None:
+        price, df_1 = load_data(property_id=property_id)
+        private = [price, df_1]
+        # Loading may have created the catalog, so key the files afterwards
+        key = dataset_key(property_id)
+        if publish_frame(price, 'price', key, property_id) and publish_frame(df_1, 'df_1', key, property_id):
+            # Drop the private frames in favour of the shared mapping
+            mapped_price, mapped_df_1 = map_frame('price', key, property_id), map_frame('df_1', key, property_id)
+            if mapped_price is not None and mapped_df_1 is not None:
+                price, df_1 = mapped_price, mapped_df_1
+                private = []
+
+    # Snapshots the dataset was built from, so the next version can tell what it adds
+    snapshots = unique_snapshots(list_snapshots(property_id=property_id))
+
+    # The fact store is only built by the first query() (facts_ready None until then)
+    return {"price": price, "df_1": df_1, "key": key, "facts_ready": None, "bytes": _entry_bytes(*private),
+            "cube": None, "rollups": {}, "snapshots": snapshots, "previous": {}}
+
+
+def _ensure_loaded(property_id=None):
+    """Return a property's cached dataset, loading it if its version changed"""
+    property_id = property_id or default_property_id()
+    with _lock:
+        entry = _cache.get(property_id)
+        if entry is not None and entry["version"] == get_version(property_id):
+            _cache.move_to_end(property_id)
+            return entry
+
+        # The superseded entry, if any, is replaced (not kept next to the new one);
+        # only its period sums are carried over, to be updated instead of rebuilt
+        superseded = entry
+        entry = _load(property_id)
+        if superseded is not None:
+            entry["previous"] = dict(superseded["previous"])
+            for memo_key, value in superseded["rollups"].items():
+                if memo_key[0] == 'period_sums':
+                    entry["previous"][memo_key] = (superseded["snapshots"], value)
+        # Read the version after loading, which may have created the catalog
+        entry["version"] = get_version(property_id)
+        _cache[property_id] = entry
+        _cache.move_to_end(property_id)
+        _evict(keep=property_id)
+        return entry
+
+
+def _combined(price, df_1):
+    """Combine the main and separate frames the way the pages do"""
+    if df_1.empty:
+        return price
+    return pd.concat([price, df_1], ignore_index=True)
+
+
+def get_data(property_id=None):
+    """
+    Return the PU dataset of a property, loading it on first use.
+
+    Each call hands out shallow copies: the column data is shared (and read-only
+    when memory mapped), but pages can add or replace columns on their copy
+    without affecting other sessions.
+
+    Args:
+        property_id (str, optional): Property to read (default: the default property)
+
+    Returns:
+        tuple: (price, df_1) DataFrames, as returned by load_data()
+    """
+    entry = _ensure_loaded(property_id)
+    return entry["price"].copy(deep=False), entry["df_1"].copy(deep=False)
+
+
+def query(start=None, end=None, year=None, month=None, types=None, property_id=None):
+    """
+    Return the price rows (main and separate files) matching the filters.
+
+    Lookups go through the property's indexed SQLite fact store when it is
+    enabled (building it on the first query of a dataset version), and fall
+    back to boolean masks over the in-memory frame otherwise. Both paths
+    return the dtypes of the in-memory frame.
+
+    Args:
+        start (date-like, optional): First stay date included
+        end (date-like, optional): Last stay date included
+        year (int or list, optional): Year(s) to keep
+        month (int or list, optional): Month number(s) (1-12) to keep
+        types (list, optional): Segment types to keep
+        property_id (str, optional): Property to read (default: the default property)
+
+    Returns:
+        pandas.DataFrame: Matching rows
+    """
+    entry = _ensure_loaded(property_id)
+    if fact_store_enabled and entry["facts_ready"] is None:
+        with _lock:
+            if entry["facts_ready"] is None:
+                # The store is shared between processes, so it is keyed by content
+                entry["facts_ready"] = sync_fact_store(_combined(entry["price"], entry["df_1"]), entry["key"], property_id)
+    if fact_store_enabled and entry["facts_ready"]:
+        # Same dtypes as the combined frame (concat rules depend on dtypes only)
+        price, df_1 = entry["price"], entry["df_1"]
+        dtypes = price.dtypes if df_1.empty else pd.concat([price.head(0), df_1.head(0)], ignore_index=True).dtypes
+        return query_facts(start=start, end=end, year=year, month=month, types=types, property_id=property_id,
+                           dtypes=dtypes)
+
+    rows = _combined(entry["price"], entry["df_1"])
+    mask = pd.Series(True, index=rows.index)
+    if start is not None:
+        mask &= rows['day'] >= pd.Timestamp(start)
+    if end is not None:
+        mask &= rows['day'] <= pd.Timestamp(end)
+    for column, value in (("year", year), ("month", month), ("type", types)):
+        if value is not None:
+            values = list(value) if isinstance(value, (list, tuple, set)) else [value]
+            mask &= rows[column].isin(values)
+    return rows[mask].copy()
+
+
+def get_cube(level='day', by=('type', 'sous_type'), property_id=None):
+    """
+    Return a roll-up of the aggregate cube (see cube_PU).
+
+    The cube is read from its store (or built) once per dataset version and
+    every roll-up is memoized, so repeated calls are dictionary lookups.
+
+    Args:
+        level (str, optional): 'day', 'week', 'month' or 'year' (default: 'day')
+        by (tuple, optional): Segment columns kept (default: ('type', 'sous_type'))
+        property_id (str, optional): Property to read (default: the default property)
+
+    Returns:
+        pandas.DataFrame: The roll-up (a shallow copy pages may add columns to)
+    """
+    entry = _ensure_loaded(property_id)
+    memo_key = (level, tuple(by))
+    with _lock:
+        if entry["cube"] is None:
+            entry["cube"] = load_cube(_combined(entry["price"], entry["df_1"]), property_id)
+        if memo_key not in entry["rollups"]:
+            entry["rollups"][memo_key] = rollup(entry["cube"], level, by)
+        return entry["rollups"][memo_key].copy(deep=False)
+
+
+def _added_stay_dates(previous, current):
+    """Stay dates covered by the snapshots added since previous, None if others changed"""
+    identity = lambda entry: [entry.get(field) for field in snapshot_identity]
+    if [identity(entry) for entry in current[:len(previous)]] != [identity(entry) for entry in previous]:
+        return None
+
+    days = pd.DatetimeIndex([])
+    for entry in current[len(previous):]:
+        if not entry.get("date_min") or not entry.get("date_max"):
+            return None
+        days = days.union(pd.date_range(entry["date_min"], entry["date_max"], freq='D'))
+    return days
+
+
+def _fold_period_sums(sums, daily, days):
+    """Fold the daily rows of some stay dates into a copy of cumulative sums"""
+    rows = daily[daily['day'].isin(days)]
+    # Stay dates left without rows (e.g. cancelled) still replace what was stored
+    missing = days.difference(pd.DatetimeIndex(rows['day']))
+    if len(missing):
+        filler = pd.DataFrame({'day': missing, **{measure: 0.0 for measure in sums['measures']}})
+        for column, value in zip(sums['by'], sums['segments'][0]):
+            filler[column] = value
+        rows = pd.concat([rows.astype({column: object for column in sums['by']}), filler], ignore_index=True)
+    return update_period_sums({**sums, 'cumsum': sums['cumsum'].copy()}, rows)
+
+
+def get_period_sums(by=(), property_id=None):
+    """
+    Return the cumulative sums behind month-to-date, year-to-date and
+    rolling-12-month figures (see utils.period_to_date).
+
+    They are memoized per dataset version. When a version only adds
+    snapshots to the previous one, the previous sums are reused and just the
+    stay dates of the new snapshots are folded in; otherwise (or on the first
+    load) they are built from the daily roll-up of the cube.
+
+    Args:
+        by (tuple, optional): Segment columns kept (default: totals only)
+        property_id (str, optional): Property to read (default: the default property)
+
+    Returns:
+        dict: The cumulative sums (shared: do not update them in place)
+    """
+    daily = get_cube('day', by=by, property_id=property_id)
+    entry = _ensure_loaded(property_id)
+    memo_key = ('period_sums', tuple(by))
+    with _lock:
+        if memo_key not in entry["rollups"]:
+            snapshots, sums = entry["previous"].pop(memo_key, (None, None))
+            days = _added_stay_dates(snapshots, entry["snapshots"]) if sums is not None else None
+            if days is None or (sums['by'] and not sums['segments']):
+                entry["rollups"][memo_key] = build_period_sums(daily, by)
+            else:
+                entry["rollups"][memo_key] = _fold_period_sums(sums, daily, days) if len(days) else sums
+        return entry["rollups"][memo_key]
+
+
+def invalidate(property_id=None):
+    """
+    Mark cached datasets stale so the next get_data() call reloads them.
+
+    Call this after a new PU file has been ingested. Other properties keep
+    their cached datasets.
+
+    Args:
+        property_id (str, optional): Only reload this property (default: all cached properties)
+
+    Returns:
+        tuple: The new dataset version (of property_id, or of the default property)
+    """
+    with _lock:
+        for key in ([property_id] if property_id is not None else list(_cache)):
+            _counters[key] = _counters.get(key, 0) + 1
+        return get_version(property_id)
+
+
+def cache_info():
+    """
+    Describe the datasets currently cached in this process.
+
+    Returns:
+        pandas.DataFrame: One row per property, least recently used first,
+            with property_id, version and the megabytes private to this process
+    """
+    with _lock:
+        return pd.DataFrame(
+            [
+                {"property_id": key, "version": entry["version"], "megabytes": round(entry["bytes"] / 1024 / 1024, 2)}
+                for key, entry in _cache.items()
+            ],
+            columns=["property_id", "version", "megabytes"],
+        )
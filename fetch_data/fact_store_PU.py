@@ -0,0 +1,160 @@
+import os
+import sqlite3
+import pandas as pd
+from contextlib import closing
+from fetch_data.schema_PU import apply_schema
+from fetch_data.store_PU import partition_root
+
+# Local SQLite copy of the price rows, indexed so that date-range, year/month and
+# segment lookups read only the matching rows instead of scanning the whole frame.
+# Each property has its own database in its cache partition, built on the
+# first query of a dataset version (loading a dataset never builds it).
+fact_store_name = 'facts.sqlite'
+
+# Set PU_FACT_STORE=0 to filter the in-memory frame instead
+fact_store_enabled = os.environ.get("PU_FACT_STORE", "1") != "0"
+
+_indexes = {
+    "idx_facts_day": "day",
+    "idx_facts_year_month": "year, month",
+    "idx_facts_type": "type, day",
+}
+
+
+def fact_store_path(property_id=None):
+    """Return the path of a property's fact store"""
+    return os.path.join(partition_root(property_id), fact_store_name)
+
+
+def _connect(path):
+    return sqlite3.connect(path)
+
+
+def fact_store_version(property_id=None):
+    """
+    Return the version of the dataset the fact store was built from.
+
+    Args:
+        property_id (str, optional): Property partition (default: the default property)
+
+    Returns:
+        str or None: The stored version, None if there is no usable store
+    """
+    path = fact_store_path(property_id)
+    if not os.path.exists(path):
+        return None
+
+    try:
+        with closing(_connect(path)) as conn:
+            row = conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        return row[0] if row else None
+    except sqlite3.Error:
+        return None
+
+
+def build_fact_store(df, version, property_id=None):
+    """
+    Write the price rows to the SQLite fact table and index it.
+
+    The database is built in a temporary file and moved into place, so other
+    sessions keep querying the previous version until the new one is ready.
+
+    Args:
+        df (pandas.DataFrame): Transformed price rows
+        version (str): Dataset version stored alongside the rows
+        property_id (str, optional): Property partition (default: the default property)
+    """
+    path = fact_store_path(property_id)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    facts = df.copy()
+    # ISO date strings compare in date order, so ranges can use the index
+    facts['day'] = pd.to_datetime(facts['day'], errors='coerce').dt.strftime('%Y-%m-%d')
+
+    conn = _connect(tmp_path)
+    try:
+        facts.to_sql('facts', conn, index=False)
+        for name, columns in _indexes.items():
+            conn.execute(f"CREATE INDEX {name} ON facts ({columns})")
+        conn.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)")
+        conn.execute("INSERT INTO meta VALUES ('version', ?)", (str(version),))
+        conn.commit()
+    finally:
+        conn.close()
+
+    os.replace(tmp_path, path)
+
+
+def sync_fact_store(df, version, property_id=None):
+    """
+    Rebuild the fact store if it was built from another dataset version.
+
+    Args:
+        df (pandas.DataFrame): Transformed price rows
+        version (str): Current dataset version
+        property_id (str, optional): Property partition (default: the default property)
+
+    Returns:
+        bool: True if the store is usable
+    """
+    if fact_store_version(property_id) == str(version):
+        return True
+
+    try:
+        build_fact_store(df, version, property_id)
+        return True
+    except (sqlite3.Error, OSError):
+        return False
+
+
+def query_facts(start=None, end=None, year=None, month=None, types=None, property_id=None, dtypes=None):
+    """
+    Select price rows from a property's fact store.
+
+    Args:
+        start (date-like, optional): First stay date included
+        end (date-like, optional): Last stay date included
+        year (int or list, optional): Year(s) to keep
+        month (int or list, optional): Month number(s) (1-12) to keep
+        types (list, optional): Segment types to keep
+        property_id (str, optional): Property partition (default: the default property)
+        dtypes (dict, optional): Column dtypes to restore, e.g. those of the
+            in-memory frame (default: the compact schema)
+
+    Returns:
+        pandas.DataFrame: Matching rows, with the dtypes of the in-memory
+            path (categoricals included), even when empty
+    """
+    clauses = []
+    params = []
+
+    if start is not None:
+        clauses.append("day >= ?")
+        params.append(pd.Timestamp(start).strftime('%Y-%m-%d'))
+    if end is not None:
+        clauses.append("day <= ?")
+        params.append(pd.Timestamp(end).strftime('%Y-%m-%d'))
+
+    for column, value in (("year", year), ("month", month), ("type", types)):
+        if value is None:
+            continue
+        values = list(value) if isinstance(value, (list, tuple, set)) else [value]
+        clauses.append(f"{column} IN ({', '.join('?' * len(values))})")
+        params.extend(int(v) if column != "type" else str(v) for v in values)
+
+    sql = "SELECT * FROM facts"
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+
+    with closing(_connect(fact_store_path(property_id))) as conn:
+        df = pd.read_sql_query(sql, conn, params=params)
+
+    # Convert after reading so an empty result still has a datetime 'day' column
+    # and the categoricals and integer widths of the in-memory frame
+    df['day'] = pd.to_datetime(df['day'])
+    if dtypes is None:
+        return apply_schema(df)
+    return df.astype({column: dtype for column, dtype in dict(dtypes).items() if column in df.columns})
@@ -1,100 +1,244 @@
 import os
+import json
+import hashlib
 import pandas as pd
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from fetch_data.cache_PU import current_keys, file_hash, lookup_cached, store_cached
+from fetch_data.cube_PU import build_cube, cube_store, update_cube
+from fetch_data.catalog_PU import (catalog_lock, find_snapshot_by_hash, load_catalog, list_snapshots, register_snapshot, save_catalog,
+                                  snapshot_ranks, unique_snapshots, update_snapshot_stats)
+from fetch_data.reader_PU import kept_columns, parse_workbook, rename_columns, stream_workbook, timed_parse
+from fetch_data.property_PU import default_property_id
+from fetch_data.schema_PU import apply_schema, schema_version
+from utils.calendar_dimension import join_calendar
+from fetch_data.store_PU import deduplicate_rows, read_store, store_snapshots, upsert_rows, write_store
 
 # Define the directory containing the files
 project_root = Path(__file__).parent.parent
 data_root = os.path.join(project_root, 'data')
 
-# List of main files to process
-file_names = ["2023_PU.xlsx", "2024_PU.xlsx", "2025_02_13_PU.xlsx", "2025_2025_03_13_PU.xlsx"]
+# Number of worker processes used to parse workbooks missing from the cache
+# (set PU_LOAD_WORKERS=1 to parse them one at a time in the current process)
+load_workers = int(os.environ.get("PU_LOAD_WORKERS", os.cpu_count() or 1))
 
-# Name of the file to process separately
-separate_file = "2025_02_12_PU.xlsx"
+# Parser used for workbooks missing from the cache: "streaming" reads rows with
+# openpyxl's read-only iterator, "read_excel" loads the workbook with pandas
+read_mode = os.environ.get("PU_READ_MODE", "streaming")
+parsers = {"streaming": stream_workbook, "read_excel": parse_workbook}
 
 # Function to transform the DataFrame
 def transform_dataframe(df):
-    # Rename columns for better readability
-    df.rename(
-        columns={
-            "Date": "day",
-            "Type.1": "type",
-            "Sous Type": "sous_type",
-            "Nbre Ch.": "n_rooms",
-            "Nbre Clients": "n_customers",
-            "Room_PM": "pm",
-            "C.A. Chambre": "ca_room",
-            "PM Total Chambre": "pm",
-            "C.A. Total": "ca_tol",
-            "% C.A. / C.A. Général": "% C.A. / C.A. Général",
-            "Nb CH Facturées": "Nb_room_billed",
-            "% C.A. / C.A. / C.A. GÇnÇral": "% C.A. / C.A. GÇnÇral",  # Corrected column name
-        },
-        inplace=True
-    )
+    # Rename columns with the mapping of the workbook's layout (a no-op for streamed workbooks)
+    df = rename_columns(df)
 
     # Keep only the necessary columns
-    df = df[['day', 'type', 'sous_type', 'n_rooms', 'n_customers', 'ca_room', 'pm', 'Source_File']]
-
-    # Add a column with the year
-    df['year'] = pd.to_datetime(df['day'], errors='coerce').dt.year
-
-    # Add a column with the month number (1-12)
-    df['month'] = pd.to_datetime(df['day'], errors='coerce').dt.month
-    
-    # Add a column with the month name
-    df['month_name'] = pd.to_datetime(df['day'], errors='coerce').dt.month_name()
-
-    # Add a column with the year-month
-    df['year_month'] = pd.to_datetime(df['day'], errors='coerce').dt.to_period('M').astype(str)
-
-    # Add a column with the day of the week
-    df['day_of_week'] = pd.to_datetime(df['day'], errors='coerce').dt.day_name()
-
-    return df
-
-# Function to load data
-def load_data():
-    dataframe_list = []
-
-    # Iterate through each main file and load it into a DataFrame
-    for file_name in file_names:
-        file_path = os.path.join(data_root, file_name)
-        if os.path.exists(file_path):
-            df = pd.read_excel(
-                file_path,
-                sheet_name=0,       # Read the first sheet
-                skiprows=1,         # Skip the first row
-                engine="openpyxl"   # Use the openpyxl engine
-            )
-            df['Source_File'] = file_name  # Add a column indicating the source file
-            dataframe_list.append(df)  # Add the DataFrame to the list
-
-    # Aggregate all main DataFrames into one
-    price = pd.concat(dataframe_list, ignore_index=True)
-
-    # Load the separate file
-    separate_file_path = os.path.join(data_root, separate_file)
-    if os.path.exists(separate_file_path):
-        df_1 = pd.read_excel(
-            separate_file_path,
-            sheet_name=0,       # Read the first sheet
-            skiprows=1,         # Skip the first row
-            engine="openpyxl"   # Use the openpyxl engine
-        )
-        df_1['Source_File'] = separate_file  # Add a column indicating the source file
+    df = df[list(kept_columns) + ['Source_File']]
+
+    # Parse the dates once, then look the calendar attributes up by date
+    df['day'] = pd.to_datetime(df['day'], errors='coerce')
+    df = join_calendar(df, ['year', 'month', 'month_name', 'year_month', 'day_of_week'])
+
+    # Only keep the year-months the data covers
+    df['year_month'] = df['year_month'].astype('category').cat.remove_unused_categories()
+
+    # Store the columns with the compact schema (categoricals, int32/float32)
+    return apply_schema(df)
+
+# Function to read several workbooks, parsing the cache misses concurrently
+def read_workbooks(names, workers=None):
+    if workers is None:
+        workers = load_workers
+
+    paths = [os.path.join(data_root, name) for name in names]
+    frames = []
+    infos = []
+    misses = []
+
+    # Serve what we can from the columnar cache
+    for i, file_path in enumerate(paths):
+        df, key = lookup_cached(file_path)
+        frames.append(df)
+        infos.append({'sha256': key['sha256'], 'parse_seconds': None})
+        if df is None:
+            misses.append((i, key))
+
+    # Parse the remaining workbooks, in parallel when there is more than one
+    parse = parsers[read_mode]
+    miss_paths = [paths[i] for i, _ in misses]
+    if workers > 1 and len(miss_paths) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(miss_paths))) as executor:
+            parsed = list(executor.map(timed_parse, [parse] * len(miss_paths), miss_paths))
     else:
-        df_1 = pd.DataFrame()  # Create an empty DataFrame if the file does not exist
-
-    # Transform the DataFrames
-    if not price.empty:
-        price = transform_dataframe(price)
+        parsed = [timed_parse(parse, file_path) for file_path in miss_paths]
+
+    # Only this process writes the cache, so workers never race on the index
+    for (i, key), (df, seconds) in zip(misses, parsed):
+        store_cached(paths[i], key, df)
+        frames[i] = df
+        infos[i]['parse_seconds'] = seconds
+
+    # Results keep the order of names, whatever order the workers finished in
+    for name, df in zip(names, frames):
+        df['Source_File'] = name  # Add a column indicating the source file
+
+    return frames, infos
+
+# Function to keep the catalog statistics in line with what was just read. The
+# stored catalog is re-read and saved under the catalog lock, so loads running
+# in parallel threads (see portfolio_PU) do not overwrite each other's changes
+def refresh_catalog_stats(entries, frames, infos):
+    # Statistics are (re)computed when missing or when the file content changed
+    updates = [
+        (entry, df, info) for entry, df, info in zip(entries, frames, infos)
+        if entry.get('rows') is None or entry.get('sha256') != info['sha256'] or info['parse_seconds'] is not None
+    ]
+    if not updates:
+        return
+
+    with catalog_lock:
+        catalog = load_catalog()
+        stored = {entry['file_name']: entry for entry in catalog['snapshots']}
+        changed = False
+        content_changed = False
+        for entry, df, info in updates:
+            target = stored.get(entry['file_name'])
+            if target is None:
+                # No longer catalogued: only the caller's copy is updated
+                entry['sha256'] = info['sha256']
+                update_snapshot_stats(entry, df, info['parse_seconds'])
+                continue
+            content_changed |= target.get('sha256') != info['sha256']
+            target['sha256'] = info['sha256']
+            changed |= update_snapshot_stats(target, df, info['parse_seconds'])
+            # Keep the caller's copy in line with what is stored
+            entry.update(target)
+        if changed or content_changed:
+            save_catalog(catalog, bump=content_changed)
+
+# Function to identify snapshots by name and current content hash
+def snapshot_keys(names):
+    keys = current_keys([os.path.join(data_root, name) for name in names])
+    return [[name, key['sha256']] for name, key in zip(names, keys)]
+
+# Function to identify the dataset of a property: the content of its snapshots
+# and the column schema, so a published copy can be reused while they match
+def dataset_key(property_id=None):
+    entries = unique_snapshots(list_snapshots(property_id=property_id or default_property_id()))
+    keys = snapshot_keys([entry['file_name'] for entry in entries])
+    described = [schema_version] + [[entry['role'], name, sha] for entry, (name, sha) in zip(entries, keys)]
+    return hashlib.sha256(json.dumps(described).encode()).hexdigest()
+
+# Function to ingest a new snapshot: parse it once, add it to the catalog and
+# merge its rows into the consolidated store
+def ingest_snapshot(file_name, role="main", property_id=None):
+    property_id = property_id or default_property_id()
+
+    # A file identical to a catalogued snapshot (e.g. the same export uploaded
+    # twice) adds nothing: keep the catalog, and the loaded dataset, as they are
+    duplicate = find_snapshot_by_hash(file_hash(os.path.join(data_root, file_name)), property_id=property_id)
+    if duplicate is not None:
+        return duplicate
+
+    entry = register_snapshot(file_name, role, property_id=property_id)
+    catalog = load_catalog()
+    entries = [e for e in catalog['snapshots'] if e['file_name'] == file_name]
+    frames, infos = read_workbooks([file_name], workers=1)
+    refresh_catalog_stats(entries, frames, infos)
+
+    if role == "main":
+        # The store can be updated in place only if it holds exactly the snapshots
+        # ingested before this one; otherwise the next load_data rebuilds it
+        main_entries = unique_snapshots(list_snapshots("main", catalog, property_id))
+        previous_names = [e['file_name'] for e in main_entries if e['file_name'] != file_name]
+        # Upserting lets the new rows win, which is only right if it is the latest snapshot
+        ranks = snapshot_ranks(main_entries)
+        is_latest = ranks.get(file_name) == len(ranks) - 1
+        previous = store_snapshots(property_id=property_id)
+        if is_latest and previous is not None and previous == snapshot_keys(previous_names):
+            store_df = read_store(previous, property_id=property_id)
+            if store_df is not None:
+                new_df = transform_dataframe(frames[0])
+                # Concatenating categoricals with different categories widens them
+                merged = apply_schema(upsert_rows(store_df, new_df))
+                write_store(merged, previous + [[file_name, infos[0]['sha256']]], property_id=property_id)
+
+    # The aggregate cube covers main and separate files: update it in place when
+    # it holds exactly the other snapshots and the new one wins every overlap
+    all_entries = unique_snapshots(list_snapshots(catalog=catalog, property_id=property_id))
+    other_names = [e['file_name'] for e in all_entries if e['file_name'] != file_name]
+    all_ranks = snapshot_ranks(all_entries)
+    previous_cube = store_snapshots(cube_store, property_id)
+    if all_ranks.get(file_name) == len(all_ranks) - 1 and previous_cube is not None and previous_cube == snapshot_keys(other_names):
+        cube = read_store(previous_cube, name=cube_store, property_id=property_id)
+        if cube is not None:
+            cube = update_cube(cube, transform_dataframe(frames[0]))
+            write_store(cube, previous_cube + [[file_name, infos[0]['sha256']]], name=cube_store, property_id=property_id)
+
+    return entries[0] if entries else entry
+
+# Function to load the aggregate cube of a property, building it from the rows
+# (as returned by load_data, main and separate combined) when it is stale
+def load_cube(rows, property_id=None):
+    property_id = property_id or default_property_id()
+    entries = unique_snapshots(list_snapshots(property_id=property_id))
+    snapshots = snapshot_keys([entry['file_name'] for entry in entries])
+
+    cube = read_store(snapshots, name=cube_store, property_id=property_id)
+    if cube is None:
+        cube = build_cube(rows)
+        write_store(cube, snapshots, name=cube_store, property_id=property_id)
+    return cube
+
+# Function to load the data of one property (only its own snapshots and store are read)
+def load_data(workers=None, property_id=None):
+    property_id = property_id or default_property_id()
+
+    # The catalog lists every ingested snapshot, main files first
+    catalog = load_catalog()
+    # Files with identical content (e.g. 2025_PU.xlsx and its dated copy) are read once
+    unique_entries = unique_snapshots(list_snapshots(catalog=catalog, property_id=property_id))
+    main_entries = [entry for entry in unique_entries if entry['role'] == "main"]
+    separate_entries = [entry for entry in unique_entries if entry['role'] == "separate"]
+
+    # Where snapshots overlap on stay dates, the latest one (or the one given
+    # precedence in the catalog) wins
+    ranks = snapshot_ranks(unique_entries)
+
+    # Use the consolidated store when it matches the catalogued main files
+    main_names = [entry['file_name'] for entry in main_entries]
+    snapshots = snapshot_keys(main_names)
+    price = read_store(snapshots, property_id=property_id)
+
+    if price is None:
+        # Rebuild: parse the main files and merge them, later snapshots winning
+        frames, infos = read_workbooks(main_names, workers)
+        refresh_catalog_stats(main_entries, frames, infos)
+
+        # Aggregate all main DataFrames into one
+        price = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+        # Transform the DataFrame
+        if not price.empty:
+            price = deduplicate_rows(transform_dataframe(price), ranks)
+            write_store(price, snapshots, property_id=property_id)
+
+    # Use the separate files, or an empty DataFrame if there are none
+    separate_frames, separate_infos = read_workbooks([entry['file_name'] for entry in separate_entries], workers)
+    refresh_catalog_stats(separate_entries, separate_frames, separate_infos)
+    df_1 = pd.concat(separate_frames, ignore_index=True) if separate_frames else pd.DataFrame()
 
     if not df_1.empty:
         df_1 = transform_dataframe(df_1)
 
-    return price, df_1
-
+        # The pages add the separate rows to the main ones, so a stay date both
+        # cover is only kept from the snapshot that wins
+        if not price.empty:
+            combined = pd.concat([price.assign(_main=True), df_1.assign(_main=False)], ignore_index=True)
+            combined = apply_schema(deduplicate_rows(combined, ranks))
+            price = combined[combined['_main']].drop(columns='_main').reset_index(drop=True)
+            df_1 = combined[~combined['_main']].drop(columns='_main').reset_index(drop=True)
+        else:
+            df_1 = deduplicate_rows(df_1, ranks)
 
-# Call the load_data function
-price, df_1 = load_data()
\ No newline at end of file
+    return price, df_1
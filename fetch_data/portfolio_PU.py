@@ -0,0 +1,93 @@
+import os
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from fetch_data.capacity_PU import daily_capacity
+from fetch_data.fetch_data_PU import load_data
+from fetch_data.property_PU import list_properties
+from utils.kpi import rooms_available, sum_measures
+
+# Portfolio figures are built one property partition at a time: each worker
+# reads a partition, reduces it to a few aggregate rows and drops it, so the
+# whole portfolio is never held in memory at once. Threads are enough because
+# the Parquet reads and pandas group-bys release the GIL.
+rollup_workers = int(os.environ.get("PU_ROLLUP_WORKERS", min(8, os.cpu_count() or 1)))
+
+
+def _partition_summary(entry, by):
+    """Aggregate the rows of one property partition"""
+    price, df_1 = load_data(workers=1, property_id=entry["property_id"])
+    rows = price if df_1.empty else pd.concat([price, df_1], ignore_index=True)
+    if rows.empty:
+        return None
+
+    summary = sum_measures(rows, by)
+
+    # Occupancy uses the property's own capacity calendar over the nights of
+    # each group's period (whole years of the partition)
+    capacity = daily_capacity(entry["property_id"], rows['day'].min(), rows['day'].max())
+    summary['n_days'] = rooms_available(summary, by, capacity.index, 1)
+    summary['capacity'] = entry["capacity"]
+    summary['rooms_available'] = rooms_available(summary, by, capacity.index, capacity)
+    summary.insert(0, 'property_id', entry["property_id"])
+    return summary
+
+
+def portfolio_rollup(by=('year', 'month'), property_ids=None, workers=None):
+    """
+    Aggregate the rooms and revenue of several properties.
+
+    Args:
+        by (tuple, optional): Columns to aggregate on within each property
+            (default: ('year', 'month'))
+        property_ids (list, optional): Properties to include (default: all)
+        workers (int, optional): Partitions aggregated concurrently
+            (default: rollup_workers)
+
+    Returns:
+        pandas.DataFrame: One row per property and group with n_rooms,
+            n_customers, ca_room, n_days (calendar nights), capacity (nominal
+            rooms), rooms_available, occupancy (%) and adr
+    """
+    by = list(by)
+    properties = [entry for entry in list_properties() if property_ids is None or entry["property_id"] in property_ids]
+    if workers is None:
+        workers = rollup_workers
+
+    if workers > 1 and len(properties) > 1:
+        with ThreadPoolExecutor(max_workers=min(workers, len(properties))) as executor:
+            summaries = list(executor.map(lambda entry: _partition_summary(entry, by), properties))
+    else:
+        summaries = [_partition_summary(entry, by) for entry in properties]
+
+    summaries = [summary for summary in summaries if summary is not None]
+    if not summaries:
+        return pd.DataFrame(columns=['property_id'] + by)
+
+    rollup = pd.concat(summaries, ignore_index=True)
+    rollup['occupancy'] = (rollup['n_rooms'] / rollup['rooms_available'] * 100).round(1)
+    rollup['adr'] = (rollup['ca_room'] / rollup['n_rooms'].where(rollup['n_rooms'] > 0)).round(2)
+    return rollup
+
+
+def portfolio_totals(by=('year', 'month'), property_ids=None, workers=None):
+    """
+    Sum the per-property roll-up over the whole portfolio.
+
+    Args:
+        by (tuple, optional): Columns to aggregate on (default: ('year', 'month'))
+        property_ids (list, optional): Properties to include (default: all)
+        workers (int, optional): Partitions aggregated concurrently
+
+    Returns:
+        pandas.DataFrame: One row per group with the summed measures,
+            rooms_available, occupancy (%) and adr
+    """
+    by = list(by)
+    rollup = portfolio_rollup(by, property_ids, workers)
+    if rollup.empty:
+        return rollup
+
+    totals = rollup.groupby(by, observed=True)[['n_rooms', 'n_customers', 'ca_room', 'rooms_available']].sum().reset_index()
+    totals['occupancy'] = (totals['n_rooms'] / totals['rooms_available'] * 100).round(1)
+    totals['adr'] = (totals['ca_room'] / totals['n_rooms'].where(totals['n_rooms'] > 0)).round(2)
+    return totals
@@ -0,0 +1,111 @@
+import os
+import json
+from pathlib import Path
+
+# The property dimension lists the hotels of the portfolio with their room
+# capacity; every snapshot, store and cache belongs to one property
+project_root = Path(__file__).parent.parent
+data_root = os.path.join(project_root, 'data')
+properties_path = os.path.join(data_root, 'properties.json')
+
+# Used when properties.json does not exist: the hotel the dashboard was built for
+default_properties = {
+    "default": "paris_italie",
+    "properties": [
+        {
+            "property_id": "paris_italie",
+            "name": "HOTEL INN PARIS PLACE D'ITALIE",
+            "capacity": 70,
+        }
+    ],
+}
+
+
+def load_properties():
+    """
+    Load the property dimension.
+
+    Returns:
+        dict: {'default': property_id, 'properties': [entry, ...]}
+    """
+    if not os.path.exists(properties_path):
+        return default_properties
+
+    try:
+        with open(properties_path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default_properties
+
+
+def list_properties():
+    """
+    List the properties of the portfolio.
+
+    Returns:
+        list: Property entries (property_id, name, capacity)
+    """
+    return load_properties()["properties"]
+
+
+def default_property_id():
+    """
+    Return the property used when none is given.
+
+    Returns:
+        str: Property identifier
+    """
+    return load_properties()["default"]
+
+
+def get_property(property_id=None):
+    """
+    Return a property entry.
+
+    Args:
+        property_id (str, optional): Property identifier (default: the default property)
+
+    Returns:
+        dict: The property entry
+
+    Raises:
+        KeyError: If the property is unknown
+    """
+    properties = load_properties()
+    if property_id is None:
+        property_id = properties["default"]
+    for entry in properties["properties"]:
+        if entry["property_id"] == property_id:
+            return entry
+    raise KeyError(f"Unknown property: {property_id}")
+
+
+def property_capacity(property_id=None):
+    """
+    Return the number of rooms of a property, used for occupancy rates.
+
+    Args:
+        property_id (str, optional): Property identifier (default: the default property)
+
+    Returns:
+        int: Number of rooms
+    """
+    return int(get_property(property_id)["capacity"])
+
+
+def property_data_dir(property_id=None):
+    """
+    Return the directory, relative to data/, holding a property's workbooks.
+
+    The default property keeps its workbooks directly in data/, the others in
+    data/<property_id>/.
+
+    Args:
+        property_id (str, optional): Property identifier (default: the default property)
+
+    Returns:
+        str: Relative directory ('' for the default property)
+    """
+    if property_id is None or property_id == default_property_id():
+        return ''
+    return property_id
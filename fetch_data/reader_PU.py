@@ -0,0 +1,358 @@
+import os
+import re
+import time
+import datetime
+import tracemalloc
+import numpy as np
+import pandas as pd
+from openpyxl import load_workbook
+
+# Workbook parsers live in their own module with no import-time side effects,
+# so worker processes can import them without loading the whole dataset
+
+# Versioned registry of the PU export layouts: each version maps the headers of
+# one layout to our column names. A workbook is read with the newest version
+# whose headers it contains, so each of our columns comes from a single header
+# (older code mapped both 'Room_PM' and 'PM Total Chambre' to 'pm', which gave
+# duplicate columns when an export carried both).
+column_mappings = {
+    # Early exports, with a 'Room_PM' column
+    1: {
+        "Date": "day",
+        "Type.1": "type",
+        "Sous Type": "sous_type",
+        "Nbre Ch.": "n_rooms",
+        "Nbre Clients": "n_customers",
+        "Room_PM": "pm",
+        "C.A. Chambre": "ca_room",
+        "C.A. Total": "ca_tol",
+        "Nb CH Facturées": "Nb_room_billed",
+        "% C.A. / C.A. / C.A. GÇnÇral": "% C.A. / C.A. GÇnÇral",  # Corrected column name
+    },
+    # Current exports ('PM Chambre' and 'PM Total Chambre'); 'pm' is the total PM
+    2: {
+        "Date": "day",
+        "Type.1": "type",
+        "Sous Type": "sous_type",
+        "Nbre Ch.": "n_rooms",
+        "Nbre Clients": "n_customers",
+        "C.A. Chambre": "ca_room",
+        "PM Total Chambre": "pm",
+        "C.A. Total": "ca_tol",
+        "% C.A. / C.A. Général": "% C.A. / C.A. Général",
+    },
+}
+mapping_version = max(column_mappings)
+
+# Mapping of the current layout, used when the layout of a frame is not known
+column_renames = column_mappings[mapping_version]
+
+# Columns kept after renaming, with the array type used while streaming
+kept_columns = {
+    "day": "datetime64[ns]",
+    "type": "object",
+    "sous_type": "object",
+    "n_rooms": "float64",       # Float while streaming so empty cells can be NaN
+    "n_customers": "float64",
+    "ca_room": "float64",
+    "pm": "float64",
+}
+
+# Number of rows buffered per typed chunk by the streaming reader
+chunk_rows = 4096
+
+
+def match_mapping(header):
+    """
+    Find the column mapping matching a workbook header.
+
+    Args:
+        header (list): Column names of the header row (duplicates already
+            suffixed like pandas does: 'Type', 'Type.1')
+
+    Returns:
+        tuple: (version, renames) of the newest layout the header contains
+
+    Raises:
+        ValueError: If no layout matches; the message lists the headers missing
+            for the current layout
+    """
+    names = set(header)
+    for version in sorted(column_mappings, reverse=True):
+        renames = column_mappings[version]
+        required = [source for source, target in renames.items() if target in kept_columns]
+        if all(source in names for source in required):
+            return version, renames
+
+    required = [source for source, target in column_renames.items() if target in kept_columns]
+    missing = [source for source in required if source not in names]
+    raise ValueError(f"Unknown PU layout, missing columns: {', '.join(missing)}")
+
+
+def read_header(file):
+    """
+    Read the title and header rows of a PU workbook without loading its data.
+
+    Args:
+        file (str or file-like): Path of the workbook, or an open binary file
+
+    Returns:
+        tuple: (title, header) where header is the list of column names
+    """
+    workbook = load_workbook(file, read_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(max_row=2, values_only=True)
+        title = next(rows, (None,))
+        header = next(rows, ())
+    finally:
+        workbook.close()
+    return (title[0] if title else None), _mangle_header(header)
+
+
+def validate_header(file):
+    """
+    Check that a workbook is a PU export we can read, from its header only.
+
+    Args:
+        file (str or file-like): Path of the workbook, or an open binary file
+
+    Returns:
+        dict: {'valid': bool, 'version': layout version or None,
+            'message': str, 'header': list of column names}
+    """
+    try:
+        title, header = read_header(file)
+    except Exception as e:
+        return {"valid": False, "version": None, "message": f"Not a readable Excel workbook: {e}", "header": []}
+
+    try:
+        version, _ = match_mapping(header)
+    except ValueError as e:
+        return {"valid": False, "version": None, "message": str(e), "header": header}
+
+    if not title or "Main Courante" not in str(title):
+        message = f"PU layout v{version} (no 'Main Courante' title row found)."
+    else:
+        message = f"PU layout v{version}."
+    return {"valid": True, "version": version, "message": message, "header": header}
+
+
+def rename_columns(df):
+    """
+    Rename the export headers of a parsed workbook to our column names.
+
+    Frames whose columns were already renamed (e.g. streamed workbooks) are
+    returned unchanged.
+
+    Args:
+        df (pandas.DataFrame): Parsed workbook
+
+    Returns:
+        pandas.DataFrame: The renamed frame
+    """
+    if all(name in df.columns for name in kept_columns):
+        return df
+    _, renames = match_mapping(list(df.columns))
+    return df.rename(columns=renames)
+
+
+# Function to parse a workbook from Excel
+def parse_workbook(file_path):
+    return pd.read_excel(
+        file_path,
+        sheet_name=0,       # Read the first sheet
+        skiprows=1,         # Skip the first row
+        engine="openpyxl"   # Use the openpyxl engine
+    )
+
+
+def _mangle_header(header):
+    """Make duplicate header names unique the way pandas does ('Type', 'Type.1', ...)"""
+    seen = {}
+    names = []
+    for name in header:
+        name = str(name) if name is not None else "Unnamed"
+        if name in seen:
+            seen[name] += 1
+            names.append(f"{name}.{seen[name]}")
+        else:
+            seen[name] = 0
+            names.append(name)
+    return names
+
+
+def _to_datetime64(value):
+    """Convert one Excel cell to datetime64, NaT when it is empty or not a date"""
+    if value is None:
+        return np.datetime64("NaT")
+    try:
+        return np.datetime64(pd.Timestamp(value), "ns")
+    except (ValueError, TypeError):
+        return np.datetime64("NaT")
+
+
+def _to_float(value):
+    """Convert one Excel cell to float, NaN when it is empty or not a number"""
+    if value is None:
+        return np.nan
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return np.nan
+
+
+_converters = {
+    "datetime64[ns]": _to_datetime64,
+    "float64": _to_float,
+    "object": lambda value: value,
+}
+
+
+def stream_workbook(file_path, chunk_size=None):
+    """
+    Parse a PU workbook row by row with openpyxl's read-only iterator.
+
+    Only the columns we keep are materialised: the header row is matched to a
+    layout of column_mappings as soon as it is read, and every data row is written into
+    preallocated typed arrays of chunk_size rows. Peak memory is therefore
+    bounded by the final columns plus one chunk, instead of the whole workbook
+    object model built by pandas.read_excel.
+
+    Args:
+        file_path (str): Path of the workbook
+        chunk_size (int, optional): Rows per typed chunk (default: chunk_rows)
+
+    Returns:
+        pandas.DataFrame: The kept columns, already renamed
+    """
+    if chunk_size is None:
+        chunk_size = chunk_rows
+
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        sheet = workbook.worksheets[0]
+        rows = sheet.iter_rows(min_row=2, values_only=True)  # Skip the first row
+
+        # Resolve the position of every kept column from the header row
+        header = _mangle_header(next(rows, ()))
+        try:
+            _, renames = match_mapping(header)
+        except ValueError as e:
+            raise ValueError(f"{os.path.basename(file_path)}: {e}") from None
+        positions = {}
+        for position, name in enumerate(header):
+            target = renames.get(name)
+            if target in kept_columns and target not in positions:
+                positions[target] = position
+
+        columns = {name: [] for name in kept_columns}
+        buffers = {name: np.empty(chunk_size, dtype=dtype) for name, dtype in kept_columns.items()}
+        filled = 0
+
+        for row in rows:
+            # Skip the blank rows openpyxl reports at the end of the sheet
+            if not any(cell is not None for cell in row):
+                continue
+
+            for name, dtype in kept_columns.items():
+                position = positions[name]
+                value = row[position] if position < len(row) else None
+                buffers[name][filled] = _converters[dtype](value)
+            filled += 1
+
+            # Flush a full chunk and start a new one
+            if filled == chunk_size:
+                for name, dtype in kept_columns.items():
+                    columns[name].append(buffers[name])
+                    buffers[name] = np.empty(chunk_size, dtype=dtype)
+                filled = 0
+
+        for name in kept_columns:
+            columns[name].append(buffers[name][:filled])
+    finally:
+        workbook.close()
+
+    df = pd.DataFrame({name: np.concatenate(chunks) for name, chunks in columns.items()})
+
+    # Counts come back as integers when no cell was empty, like read_excel
+    for name in ("n_rooms", "n_customers"):
+        if not df[name].isna().any():
+            df[name] = df[name].astype("int64")
+
+    return df
+
+
+def read_as_of(file_path):
+    """
+    Return the date a PU export was taken ("as of" date of the snapshot).
+
+    The title row of the export carries the "Date de la Main Courante"; when it
+    is missing, the date in a file name like '2025_2025_03_13_PU.xlsx' is used,
+    and the file's modification date as a last resort.
+
+    Args:
+        file_path (str): Path of the workbook
+
+    Returns:
+        str: ISO date ('YYYY-MM-DD')
+    """
+    try:
+        workbook = load_workbook(file_path, read_only=True)
+        try:
+            title = next(workbook.worksheets[0].iter_rows(max_row=1, values_only=True), (None,))[0]
+        finally:
+            workbook.close()
+        match = re.search(r"Main Courante\s*:\s*\D*(\d{2})/(\d{2})/(\d{4})", str(title or ""))
+        if match:
+            day, month, year = match.groups()
+            return f"{year}-{month}-{day}"
+    except Exception:
+        pass
+
+    match = re.search(r"(\d{4})_(\d{2})_(\d{2})_PU", os.path.basename(file_path))
+    if match:
+        return "-".join(match.groups())
+
+    return datetime.date.fromtimestamp(os.path.getmtime(file_path)).isoformat()
+
+
+def timed_parse(parse, file_path):
+    """
+    Run a parser and measure how long it took.
+
+    Args:
+        parse (callable): parse_workbook or stream_workbook
+        file_path (str): Path of the workbook
+
+    Returns:
+        tuple: (DataFrame, seconds spent parsing)
+    """
+    start = time.perf_counter()
+    df = parse(file_path)
+    return df, time.perf_counter() - start
+
+
+def compare_peak_memory(file_path):
+    """
+    Measure the peak memory of the read_excel path against the streaming path.
+
+    Args:
+        file_path (str): Path of the workbook
+
+    Returns:
+        dict: Peak traced bytes of each path, the final frame sizes and their ratio
+    """
+    report = {}
+    for label, parse in (("read_excel", parse_workbook), ("streaming", stream_workbook)):
+        tracemalloc.start()
+        try:
+            df = parse(file_path)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        report[f"{label}_peak_bytes"] = peak
+        report[f"{label}_frame_bytes"] = int(df.memory_usage(deep=True).sum())
+        del df
+
+    report["peak_ratio"] = report["read_excel_peak_bytes"] / max(report["streaming_peak_bytes"], 1)
+    return report
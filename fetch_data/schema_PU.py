@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+
+# Compact dtypes of the transformed price frame. Dimension columns repeat a
+# handful of values over thousands of rows, so they are stored as categoricals;
+# counts fit in int32; 'pm' is an average so float32 is precise enough, while
+# 'ca_room' stays float64 because it is summed into revenue totals.
+schema_version = 2
+
+price_schema = {
+    "day": "datetime64[ns]",
+    "type": "category",
+    "sous_type": "category",
+    "n_rooms": "int32",
+    "n_customers": "int32",
+    "ca_room": "float64",
+    "pm": "float32",
+    "Source_File": "category",
+    "year": "int16",
+    "month": "int8",
+    "month_name": "category",
+    "year_month": "category",
+    "day_of_week": "category",
+}
+
+# Dtypes the frame had before the compact schema, used as the memory baseline
+legacy_dtypes = {
+    "day": "datetime64[ns]",
+    "n_rooms": "int64",
+    "n_customers": "int64",
+    "ca_room": "float64",
+    "pm": "float64",
+    "year": "int64",
+    "month": "int64",
+}
+
+
+def apply_schema(df):
+    """
+    Cast the transformed price frame to the compact schema.
+
+    Integer columns holding missing values are stored as float32 instead, and
+    columns missing from the frame are left alone.
+
+    Args:
+        df (pandas.DataFrame): Transformed price rows
+
+    Returns:
+        pandas.DataFrame: The same rows with compact dtypes
+    """
+    dtypes = {}
+    for column, dtype in price_schema.items():
+        if column not in df.columns:
+            continue
+        if dtype.startswith("int") and df[column].isna().any():
+            dtype = "float32"
+        dtypes[column] = dtype
+    return df.astype(dtypes)
+
+
+def _legacy_frame(df):
+    """Rebuild the frame with the dtypes it had before the compact schema"""
+    legacy = {}
+    for column in df.columns:
+        if column in legacy_dtypes and not df[column].isna().any():
+            legacy[column] = df[column].to_numpy().astype(legacy_dtypes[column])
+        elif column in legacy_dtypes:
+            legacy[column] = df[column].to_numpy().astype(np.float64)
+        else:
+            # Dimension columns were Python object strings
+            legacy[column] = df[column].astype(str).to_numpy(dtype=object)
+    return pd.DataFrame(legacy)
+
+
+def memory_report(df):
+    """
+    Compare the memory used by the price frame before and after the compact schema.
+
+    Args:
+        df (pandas.DataFrame): Transformed price rows (compact or not)
+
+    Returns:
+        pandas.DataFrame: Bytes and bytes per row for each column, plus a 'Total' row
+    """
+    before = _legacy_frame(df).memory_usage(index=False, deep=True)
+    after = apply_schema(df).memory_usage(index=False, deep=True)
+    rows = max(len(df), 1)
+
+    report = pd.DataFrame({"bytes_before": before, "bytes_after": after})
+    report.loc["Total"] = report.sum()
+    report["bytes_per_row_before"] = (report["bytes_before"] / rows).round(1)
+    report["bytes_per_row_after"] = (report["bytes_after"] / rows).round(1)
+    report["saving_pct"] = ((1 - report["bytes_after"] / report["bytes_before"]) * 100).round(1)
+    return report
@@ -0,0 +1,217 @@
+import threading
+import pandas as pd
+from fetch_data.catalog_PU import load_catalog, list_snapshots, unique_snapshots
+from fetch_data.fetch_data_PU import read_workbooks, snapshot_keys, transform_dataframe
+from fetch_data.property_PU import default_property_id
+from fetch_data.schema_PU import apply_schema
+from fetch_data.store_PU import deduplicate_rows, read_store, store_snapshots, write_store
+
+# Every main PU export is a point-in-time view of the books. The consolidated
+# store only keeps the latest figure of each stay date; the snapshot layers keep
+# every export, tagged with the date it was taken ('as_of'), so the books can be
+# rebuilt as they stood on any past date and compared between two exports.
+layers_store = 'snapshots'
+
+# Measures that are summed when rows are aggregated
+otb_measures = ['n_rooms', 'n_customers', 'ca_room']
+
+# Layers loaded in this process per property, keyed by the snapshots they were built from
+_lock = threading.Lock()
+_layers = {}
+
+
+def _layer_rows(names, entries):
+    """Parse (or read from cache) snapshots and tag their rows with the as-of date"""
+    frames, _ = read_workbooks(names)
+    as_of = {entry['file_name']: entry.get('as_of') for entry in entries}
+
+    layers = []
+    for name, df in zip(names, frames):
+        df = transform_dataframe(df)
+        df['as_of'] = pd.Timestamp(as_of.get(name))
+        layers.append(df)
+    return layers
+
+
+def load_layers(property_id=None):
+    """
+    Return the rows of every main snapshot of a property, tagged with their as-of date.
+
+    The layers are kept in their own Parquet store. When new snapshots were
+    catalogued since it was written, only those are read and appended.
+
+    Args:
+        property_id (str, optional): Property to read (default: the default property)
+
+    Returns:
+        pandas.DataFrame: Transformed rows plus 'as_of' (datetime64), in
+            ingestion order; empty if there are no snapshots
+    """
+    property_id = property_id or default_property_id()
+    catalog = load_catalog()
+    entries = unique_snapshots(list_snapshots("main", catalog, property_id))
+    names = [entry['file_name'] for entry in entries]
+    snapshots = snapshot_keys(names)
+
+    with _lock:
+        loaded = _layers.get(property_id)
+        if loaded is not None and loaded["snapshots"] == snapshots:
+            return loaded["df"]
+
+        df = read_store(snapshots, name=layers_store, property_id=property_id)
+        if df is None:
+            # Append to the stored layers if they are a prefix of the catalog
+            previous = store_snapshots(layers_store, property_id)
+            stored = read_store(previous, name=layers_store, property_id=property_id) if previous else None
+            if stored is None or previous != snapshots[:len(previous)]:
+                stored, previous = None, []
+
+            new_names = names[len(previous):]
+            frames = ([stored] if stored is not None else []) + _layer_rows(new_names, entries)
+            df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+            if not df.empty:
+                # Concatenating categoricals with different categories widens them
+                df = apply_schema(df)
+                write_store(df, snapshots, name=layers_store, property_id=property_id)
+
+        _layers[property_id] = {"snapshots": snapshots, "df": df}
+        return df
+
+
+def list_as_of_dates(layers=None):
+    """
+    Return the dates snapshots were taken, oldest first.
+
+    Args:
+        layers (pandas.DataFrame, optional): Snapshot layers (default: load_layers())
+
+    Returns:
+        list: pandas.Timestamp of every distinct as-of date
+    """
+    if layers is None:
+        layers = load_layers()
+    if layers.empty:
+        return []
+    return sorted(layers['as_of'].dropna().unique())
+
+
+def on_the_books(as_of, start=None, end=None, by=None, layers=None):
+    """
+    Return the business on the books as it stood on a given date.
+
+    For each stay date, the rows of the latest snapshot taken on or before
+    as_of are kept; a stay date no snapshot covered by then is absent.
+
+    Args:
+        as_of (date-like): Date the books are looked at
+        start (date-like, optional): First stay date included
+        end (date-like, optional): Last stay date included
+        by (list, optional): Columns to aggregate on (default: ['day']);
+            pass [] to get the raw rows
+        layers (pandas.DataFrame, optional): Snapshot layers (default: load_layers())
+
+    Returns:
+        pandas.DataFrame: Summed n_rooms, n_customers and ca_room per group,
+            with the as-of date of the snapshot each stay date came from
+    """
+    if layers is None:
+        layers = load_layers()
+    if by is None:
+        by = ['day']
+
+    mask = layers['as_of'] <= pd.Timestamp(as_of)
+    if start is not None:
+        mask &= layers['day'] >= pd.Timestamp(start)
+    if end is not None:
+        mask &= layers['day'] <= pd.Timestamp(end)
+    rows = layers[mask]
+
+    # Latest snapshot per stay date, then the last row of each segment in it
+    latest = rows.groupby('day')['as_of'].transform('max')
+    rows = deduplicate_rows(rows[rows['as_of'] == latest])
+
+    if not by:
+        return rows
+    return rows.groupby(by, observed=True).agg(
+        **{measure: (measure, 'sum') for measure in otb_measures},
+        as_of=('as_of', 'max'),
+    ).reset_index()
+
+
+def pickup(from_as_of, to_as_of, start=None, end=None, by=None, layers=None):
+    """
+    Compare the books between two snapshot dates.
+
+    Only stay dates both dates' books cover (i.e. have rows for) are
+    compared: a stay date beyond the earlier export's horizon is unknown
+    then, not 0 rooms on the books, so it is left out rather than showing
+    its whole volume as pickup. Within a covered date, a group booked at
+    only one of the two dates counts as 0 at the other.
+
+    Args:
+        from_as_of (date-like): Earlier date the books are looked at
+        to_as_of (date-like): Later date the books are looked at
+        start (date-like, optional): First stay date included
+        end (date-like, optional): Last stay date included
+        by (list, optional): Columns to compare on (default: ['day'])
+        layers (pandas.DataFrame, optional): Snapshot layers (default: load_layers())
+
+    Returns:
+        pandas.DataFrame: For each group, the measures at both dates
+            (suffixes '_from' and '_to') and their difference ('<measure>_pickup')
+    """
+    if layers is None:
+        layers = load_layers()
+    if by is None:
+        by = ['day']
+
+    before = on_the_books(from_as_of, start, end, [], layers)
+    after = on_the_books(to_as_of, start, end, [], layers)
+
+    # Stay dates covered at both dates
+    covered = set(before['day'].unique()) & set(after['day'].unique())
+    before = before[before['day'].isin(covered)].groupby(by, observed=True)[otb_measures].sum().reset_index()
+    after = after[after['day'].isin(covered)].groupby(by, observed=True)[otb_measures].sum().reset_index()
+
+    # Groups booked at only one of the two dates count as zero at the other
+    merged = before.merge(after, on=by, how='outer', suffixes=('_from', '_to'))
+    for measure in otb_measures:
+        merged[[f'{measure}_from', f'{measure}_to']] = merged[[f'{measure}_from', f'{measure}_to']].fillna(0)
+        merged[f'{measure}_pickup'] = merged[f'{measure}_to'] - merged[f'{measure}_from']
+
+    return merged.sort_values(by).reset_index(drop=True)
+
+
+def pace_curve(stay_start, stay_end, measure='n_rooms', layers=None):
+    """
+    Return how the books of a stay period built up across snapshots.
+
+    Snapshot figures are pivoted into an (as_of x stay date) matrix; a stay
+    date missing from a snapshot keeps its figure from the previous snapshot,
+    so the curve is one forward fill and one row sum over the matrix.
+
+    Args:
+        stay_start (date-like): First stay date of the period
+        stay_end (date-like): Last stay date of the period
+        measure (str, optional): Measure to follow (default: 'n_rooms')
+        layers (pandas.DataFrame, optional): Snapshot layers (default: load_layers())
+
+    Returns:
+        pandas.DataFrame: One row per as-of date with the measure on the books
+            and 'days_before' (days between the snapshot and stay_start)
+    """
+    if layers is None:
+        layers = load_layers()
+
+    stay_start = pd.Timestamp(stay_start)
+    rows = layers[(layers['day'] >= stay_start) & (layers['day'] <= pd.Timestamp(stay_end))]
+    if rows.empty:
+        return pd.DataFrame(columns=['as_of', measure, 'days_before'])
+
+    # Several files taken the same day are one snapshot; sum their segments
+    matrix = rows.pivot_table(index='as_of', columns='day', values=measure, aggfunc='sum', observed=True)
+    matrix = matrix.sort_index().ffill().fillna(0)
+
+    curve = matrix.sum(axis=1).rename(measure).reset_index()
+    curve['days_before'] = (stay_start - curve['as_of']).dt.days
+    return curve
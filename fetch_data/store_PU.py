@@ -0,0 +1,177 @@
+import os
+import threading
+import json
+import pandas as pd
+from fetch_data.cache_PU import PARQUET_AVAILABLE, cache_root
+from fetch_data.property_PU import default_property_id
+from fetch_data.schema_PU import schema_version
+
+# The consolidated store holds the transformed rows of every main snapshot, so a
+# new snapshot only has to be parsed and merged instead of rebuilding history.
+# Other stores built from the same snapshots (e.g. the snapshot layers) use the
+# same files and manifest under another name. Stores are partitioned by
+# property, so a single-property view only ever reads its own files.
+
+
+def partition_root(property_id=None):
+    """
+    Return the cache directory of a property.
+
+    Args:
+        property_id (str, optional): Property identifier (default: the default property)
+
+    Returns:
+        str: Directory holding the property's stores
+    """
+    return os.path.join(cache_root, 'properties', property_id or default_property_id())
+
+
+def _paths(name, property_id=None):
+    """Return the Parquet and manifest paths of a named store"""
+    root = partition_root(property_id)
+    return os.path.join(root, f'{name}.parquet'), os.path.join(root, f'{name}.json')
+
+# A row is identified by its stay date and segment; later snapshots replace
+# whole stay dates (see deduplicate_rows)
+key_columns = ['day', 'type', 'sous_type']
+
+
+def _load_manifest(name='consolidated', property_id=None):
+    """Load the list of [file_name, sha256] pairs the store was built from"""
+    _, manifest_path = _paths(name, property_id)
+    if not os.path.exists(manifest_path):
+        return None
+
+    try:
+        with open(manifest_path, 'r') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    # A store written with another column schema has to be rebuilt
+    if manifest.get('schema') != schema_version:
+        return None
+    return manifest.get('snapshots')
+
+
+def store_snapshots(name='consolidated', property_id=None):
+    """
+    Return the snapshots a store currently contains.
+
+    Args:
+        name (str, optional): Name of the store (default: the consolidated store)
+        property_id (str, optional): Property partition (default: the default property)
+
+    Returns:
+        list: [file_name, sha256] pairs in ingestion order, or None if there is no store
+    """
+    store_path, _ = _paths(name, property_id)
+    if not os.path.exists(store_path):
+        return None
+    return _load_manifest(name, property_id)
+
+
+def read_store(snapshots, name='consolidated', property_id=None):
+    """
+    Read a store if it was built from exactly these snapshots.
+
+    Args:
+        snapshots (list): [file_name, sha256] pairs in ingestion order
+        name (str, optional): Name of the store (default: the consolidated store)
+        property_id (str, optional): Property partition (default: the default property)
+
+    Returns:
+        pandas.DataFrame or None: The stored rows, None if the store is stale
+    """
+    store_path, _ = _paths(name, property_id)
+    if not PARQUET_AVAILABLE or store_snapshots(name, property_id) != snapshots:
+        return None
+
+    try:
+        return pd.read_parquet(store_path)
+    except Exception:
+        return None
+
+
+def write_store(df, snapshots, name='consolidated', property_id=None):
+    """
+    Replace a store.
+
+    Args:
+        df (pandas.DataFrame): Transformed rows of every main snapshot
+        snapshots (list): [file_name, sha256] pairs the rows come from
+        name (str, optional): Name of the store (default: the consolidated store)
+        property_id (str, optional): Property partition (default: the default property)
+    """
+    if not PARQUET_AVAILABLE:
+        return
+
+    store_path, manifest_path = _paths(name, property_id)
+    try:
+        os.makedirs(os.path.dirname(store_path), exist_ok=True)
+        tmp_path = f"{store_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        df.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, store_path)
+
+        tmp_path = f"{manifest_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'schema': schema_version, 'snapshots': snapshots}, f, indent=2)
+        os.replace(tmp_path, manifest_path)
+    except Exception:
+        # The store is an optimisation only; load_data rebuilds it when stale
+        pass
+
+
+def deduplicate_rows(df, ranks=None):
+    """
+    Keep, for every stay date, the rows of the snapshot that wins it.
+
+    A snapshot replaces whole stay dates: a segment missing from the winning
+    snapshot (e.g. cancelled since the older export) is dropped along with the
+    older rows of that date. Without ranks, rows must be ordered by snapshot,
+    oldest first, and the last snapshot covering a date wins. With ranks, the
+    highest ranked snapshot wins whatever the row order. Within the winner,
+    the last row of each (day, type, sous_type) key is kept. Both rules hash
+    the keys once, so the cost is linear in the number of rows.
+
+    Args:
+        df (pandas.DataFrame): Transformed rows
+        ranks (dict, optional): {Source_File: rank}, e.g. from snapshot_ranks()
+
+    Returns:
+        pandas.DataFrame: One row per key, all rows of a date from one snapshot
+    """
+    if not df.empty and 'Source_File' in df.columns:
+        files = df['Source_File'].astype(object)
+        if ranks is None:
+            # Snapshots rank in the order their rows appear
+            ranks = {name: i for i, name in enumerate(pd.unique(files))}
+        # Unknown files rank below every catalogued snapshot
+        rank = files.map(ranks).fillna(-1)
+        best = rank.groupby(df['day'].to_numpy(), dropna=False).transform('max')
+        df = df[(rank == best).to_numpy()]
+    return df.drop_duplicates(subset=key_columns, keep='last').reset_index(drop=True)
+
+
+def upsert_rows(store_df, new_df):
+    """
+    Merge the rows of a new snapshot into the consolidated rows.
+
+    Every stay date the new snapshot covers is replaced as a whole, so a
+    segment it no longer has does not survive from the stored rows; other
+    dates are kept. The cost is a hash of the days, linear in the size of
+    both frames.
+
+    Args:
+        store_df (pandas.DataFrame): Current consolidated rows
+        new_df (pandas.DataFrame): Transformed rows of the new snapshot
+
+    Returns:
+        pandas.DataFrame: The updated consolidated rows
+    """
+    new_df = deduplicate_rows(new_df)
+    if store_df is None or store_df.empty:
+        return new_df
+
+    replaced = store_df['day'].isin(new_df['day'].unique()).to_numpy()
+    return pd.concat([store_df[~replaced], new_df], ignore_index=True)
@@ -8,7 +8,10 @@ import calendar
 import plotly.express as px
 from utils.page_protection import check_authentication
 from utils.logging_system import log_page_access, log_data_operation, log_error, log_action
-from fetch_data.fetch_data_PU import load_data
+from fetch_data.dataset_PU import get_cube, get_data
+from utils.property_selector import select_property
+from utils.budget import annual_budget, budget_matrix, budget_columns, simulate_budget, budget_bands
+from fetch_data.catalog_PU import list_snapshots
 
 # Add the project root to the path to ensure imports work correctly
 root_dir = Path(__file__).parent.parent
@@ -32,13 +35,16 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Property the budget is planned for
+selected_property = select_property()
+
 # Set page title and header
 st.title("Budget Planning & Forecasting")
 
 # Load the data
 try:
     log_data_operation("loading", "price data")
-    price, df_1 = load_data()
+    price, df_1 = get_data(selected_property["property_id"])
     
     # Combine the dataframes if df_1 is not empty
     if not df_1.empty:
@@ -54,6 +60,9 @@ try:
             st.stop()
     
     log_data_operation("loaded", "price data", f"Successfully loaded {len(price)} records with {len(price.columns)} columns")
+
+    # Budgets only need month totals, read from the aggregate cube
+    monthly_totals = get_cube('month', by=(), property_id=selected_property["property_id"])
 except Exception as e:
     error_msg = f"Error loading data: {e}"
     log_error(error_msg, e)
@@ -65,83 +74,26 @@ tab_overview, tab_forecast, tab_budget_vs_actual, tab_budget_creation = st.tabs(
     "Budget Overview", "Revenue Forecast", "Budget vs. Actual", "Create Budget"
 ])
 
-# Helper functions for budget calculations
-def calculate_monthly_budget(df, year, month, growth_rate=0.05):
-    """Calculate budget based on previous year data with growth rate"""
-    # Filter data for the previous year and month
-    prev_year = year - 1
-    prev_year_data = df[(df['year'] == prev_year) & (df['month'] == month)]
-    
-    if prev_year_data.empty:
-        # If no data for previous year, use average of available data
-        avg_data = df[df['month'] == month].groupby('year').agg({
-            'ca_room': 'sum',
-            'n_rooms': 'sum'
-        }).mean()
-        
-        if avg_data.empty:
-            # If still no data, return zeros
-            return {
-                'year': year,
-                'month': month,
-                'budget_revenue': 0,
-                'budget_rooms': 0,
-                'budget_adr': 0
-            }
-        
-        budget_revenue = avg_data['ca_room'] * (1 + growth_rate)
-        budget_rooms = avg_data['n_rooms']
-    else:
-        # Calculate budget based on previous year with growth
-        budget_revenue = prev_year_data['ca_room'].sum() * (1 + growth_rate)
-        budget_rooms = prev_year_data['n_rooms'].sum()
-    
-    # Calculate ADR (Average Daily Rate)
-    budget_adr = budget_revenue / budget_rooms if budget_rooms > 0 else 0
-    
-    return {
-        'year': year,
-        'month': month,
-        'budget_revenue': budget_revenue,
-        'budget_rooms': budget_rooms,
-        'budget_adr': budget_adr
-    }
-
+# Helper functions for budget calculations (one grouped pass, see utils/budget.py)
 def generate_annual_budget(df, year, growth_rate=0.05):
     """Generate a budget for the entire year"""
-    budget_data = []
-    
-    for month in range(1, 13):
-        monthly_budget = calculate_monthly_budget(df, year, month, growth_rate)
-        budget_data.append(monthly_budget)
-    
-    return pd.DataFrame(budget_data)
+    return annual_budget(df, year, growth_rate)
 
 def forecast_revenue(df, months_ahead=3):
     """Forecast revenue for the next few months"""
-    # Get the most recent data
-    latest_date = df['day'].max()
-    latest_year = latest_date.year
-    latest_month = latest_date.month
+    # Get the most recent data (month totals carry the last stay date of each month)
+    latest_date = df['last_day'].max() if 'last_day' in df.columns else df['day'].max()
     
-    forecast_data = []
+    # Target (year, month) of each of the next few months
+    targets = pd.period_range(pd.Period(latest_date, freq='M') + 1, periods=months_ahead, freq='M')
     
-    # Generate forecast for the next few months
-    for i in range(1, months_ahead + 1):
-        # Calculate the target month and year
-        target_month = (latest_month + i) % 12
-        if target_month == 0:
-            target_month = 12
-        target_year = latest_year + ((latest_month + i - 1) // 12)
-        
-        # Calculate the budget for this month
-        monthly_forecast = calculate_monthly_budget(df, target_year, target_month)
-        
-        # Add month name for display
-        monthly_forecast['month_name'] = calendar.month_name[target_month]
-        forecast_data.append(monthly_forecast)
+    # Budget every month of the years involved at once, then keep the targets
+    budget = budget_matrix(df, sorted(set(targets.year)))[budget_columns]
+    forecast_data = pd.DataFrame({'year': targets.year, 'month': targets.month}).merge(budget, on=['year', 'month'], how='left')
     
-    return pd.DataFrame(forecast_data)
+    # Add month name for display
+    forecast_data['month_name'] = forecast_data['month'].map(lambda m: calendar.month_name[m])
+    return forecast_data
 
 # Function to load or create budget data
 def load_budget_data(year):
@@ -156,7 +108,7 @@ def load_budget_data(year):
         else:
             # Create new budget based on historical data
             log_data_operation("generating", f"budget_{year}", "Creating new budget based on historical data")
-            return generate_annual_budget(price, year)
+            return generate_annual_budget(monthly_totals, year)
     except Exception as e:
         error_msg = f"Error loading budget data for {year}: {e}"
         log_error(error_msg, e)
@@ -246,7 +198,7 @@ with tab_forecast:
     growth_rate = st.slider("Growth Rate (%)", -10.0, 20.0, 5.0) / 100
     
     # Generate forecast
-    forecast_data = forecast_revenue(price, forecast_months)
+    forecast_data = forecast_revenue(monthly_totals, forecast_months)
     forecast_data['growth_rate'] = growth_rate
     
     # Apply growth rate to forecast
@@ -266,3 +218,52 @@ with tab_forecast:
         color_discrete_sequence=['#FF9900']
     )
     st.plotly_chart(fig, use_container_width=True)
+    
+    # Scenario simulation around the forecast
+    st.subheader("Scenario Simulation")
+    st.write("Thousands of scenarios drawn with the month-to-month spread of rooms, ADR and growth seen in the history.")
+    
+    sim_col1, sim_col2 = st.columns(2)
+    with sim_col1:
+        simulation_months = st.slider("Months to Simulate", 12, 36, 12, step=12)
+    with sim_col2:
+        scenario_count = st.select_slider("Scenarios", options=[1000, 5000, 10000], value=10000)
+    
+    try:
+        # Months of the latest snapshot are still being booked; leave them out of the fit
+        as_of_dates = [entry.get("as_of") for entry in list_snapshots(property_id=selected_property["property_id"]) if entry.get("as_of")]
+        as_of = max(as_of_dates) if as_of_dates else None
+        
+        simulation = simulate_budget(
+            monthly_totals,
+            months=simulation_months,
+            scenarios=scenario_count,
+            growth_rate=growth_rate,
+            capacity=selected_property["capacity"],
+            as_of=as_of,
+            seed=0
+        )
+        bands = budget_bands(simulation)
+        log_action("Simulated budget scenarios", details=f"{scenario_count} scenarios over {simulation_months} months")
+    except Exception as e:
+        error_msg = f"Error simulating budget scenarios: {e}"
+        log_error(error_msg, e)
+        st.error(error_msg)
+        st.stop()
+    
+    fig3 = px.line(
+        bands,
+        x='month_name',
+        y=['revenue_p10', 'revenue_p50', 'revenue_p90'],
+        title="Simulated Revenue (P10 / P50 / P90)",
+        labels={'value': 'Revenue (€)', 'month_name': 'Month', 'variable': 'Percentile'},
+        color_discrete_sequence=['#FFCC80', '#FF9900', '#E65100']
+    )
+    st.plotly_chart(fig3, use_container_width=True)
+    
+    display_bands = bands[['month_name', 'revenue_p10', 'revenue_p50', 'revenue_p90', 'ebitda_p10', 'ebitda_p50', 'ebitda_p90']].copy()
+    for column in display_bands.columns[1:]:
+        display_bands[column] = display_bands[column].map('€{:,.0f}'.format)
+    display_bands.columns = ['Month', 'Revenue P10', 'Revenue P50', 'Revenue P90', 'EBITDA P10', 'EBITDA P50', 'EBITDA P90']
+    st.dataframe(display_bands, use_container_width=True)
+    st.caption("EBITDA assumes costs of 30% of revenue plus fixed costs of 45% of the average monthly revenue.")
@@ -4,7 +4,10 @@ import pandas as pd
 from pathlib import Path
 from utils.page_protection import check_authentication
 from utils.logging_system import log_page_access, log_data_operation, log_error, log_action
-from fetch_data.fetch_data_PU import price  # Adjusted import path
+from fetch_data.dataset_PU import get_cube
+from fetch_data.capacity_PU import daily_capacity
+from utils.kpi import rooms_available
+from utils.property_selector import select_property
 #from fetch_data.fetch_data_OTA_Accor import tarifs_df, tarifs_df_1  # Adjusted import path
 
 # Add the project root to the path to ensure imports work correctly
@@ -29,6 +32,9 @@ st.set_page_config(
     initial_sidebar_state="expanded"  # Set sidebar to be expanded initially
 )
 
+# Property shown on the page; occupancy rates use its capacity calendar
+selected_property = select_property()
+
 # Set the title of the page
 st.title("Suivi mensuel")
 
@@ -47,12 +53,14 @@ selected_tab = st.tabs(tabs)
 #st.write(price.sample(2).to_html(escape=False, index=False), unsafe_allow_html=True)
 
 try:
-    log_data_operation("processing", "price data", "Processing date columns")
-    price['day'] = pd.to_datetime(price['day'], format='%d-%m-%Y', errors='coerce')
-    price['month'] = pd.to_datetime(price['day'], format='%m-%Y', errors='coerce')
-    #price['month_of_year'] = pd.to_datetime(price['month'], format='%m-%Y').dt.month
-    price['month_name'] = price['month'].dt.strftime('%B')
-    log_data_operation("processed", "price data", "Successfully processed date columns")
+    log_data_operation("loading", "price data")
+    # Month totals (with month name and year) come from the aggregate cube
+    price = get_cube('month', by=(), property_id=selected_property["property_id"])
+    log_data_operation("processed", "price data", "Successfully loaded monthly totals")
+
+    # The capacity calendar covers every year the cube has
+    years = sorted(int(year) for year in price['year'].unique()) or [pd.Timestamp.now().year]
+    capacity = daily_capacity(selected_property["property_id"], f'{years[0]}-01-01', f'{years[-1]}-12-31')
 except Exception as e:
     error_msg = f"Error processing date columns: {e}"
     log_error(error_msg, e)
@@ -65,13 +73,9 @@ with selected_tab[0]:  # Variations tab
         log_action("Viewing monthly tab")
         # Prepare the price_summary DataFrame
         #   st.write(price.sample(2))
-        # Ensure the 'year' column is available
-        price['year'] = price['day'].dt.year
-        log_data_operation("extracted", "year data", "Extracted year from date column")
-    
         # Group by month_name and year, then sum n_rooms and ca_room
         log_data_operation("aggregating", "monthly summary", "Grouping data by month and year")
-        monthly_summary = price.groupby(['month_name', 'year']).agg({'n_rooms': 'sum', 'ca_room': 'sum'}).reset_index()
+        monthly_summary = price.groupby(['month_name', 'year'], observed=True).agg({'n_rooms': 'sum', 'ca_room': 'sum'}).reset_index()
         log_data_operation("aggregated", "monthly summary", f"Created summary with {len(monthly_summary)} records")
 
         # Pivot the DataFrame to have separate columns for each year
@@ -136,26 +140,18 @@ with selected_tab[0]:  # Variations tab
         st.write(monthly_summary_pivot_html, unsafe_allow_html=True)
         log_action("Displayed KPI summary table")
 
-        # Define the number of days for each month
-        days_in_month = {
-            'January': 31,
-            'February': 28,  # Adjust for leap year if necessary
-            'March': 31,
-            'April': 30,
-            'May': 31,
-            'June': 30,
-            'July': 31,
-            'August': 31,
-            'September': 30,
-            'October': 31,
-            'November': 30,
-            'December': 31
+        # Nights and rooms on sale of each month, from the capacity calendar
+        months = pd.DataFrame({'month_name': list(monthly_summary_pivot['month_name'])[:-1]})
+        nights = rooms_available(months.assign(year=years[-1]), ['year', 'month_name'], capacity.index, 1)
+        available = {
+            year: rooms_available(months.assign(year=year), ['year', 'month_name'], capacity.index, capacity)
+            for year in years
         }
 
         # Create a new DataFrame for rations using total values
         rations = pd.DataFrame({
             'Month': list(monthly_summary_pivot['month_name'])[:-1],
-            'Number of Days': list(days_in_month.values()),
+            'Number of Days': nights.astype(int),
             'n_rooms_2023': list(monthly_summary_pivot['n_rooms_2023'])[:-1],
             'n_rooms_2024': list(monthly_summary_pivot['n_rooms_2024'])[:-1],
             'n_rooms_2025': list(monthly_summary_pivot['n_rooms_2025'])[:-1],
@@ -165,9 +161,9 @@ with selected_tab[0]:  # Variations tab
         })
 
         # Compute the required ratios and format as percentages
-        rations['Ratio_n_rooms_2023'] = (rations['n_rooms_2023'] / (rations['Number of Days'] * 70)) * 100
-        rations['Ratio_n_rooms_2024'] = (rations['n_rooms_2024'] / (rations['Number of Days'] * 70)) * 100
-        rations['Ratio_n_rooms_2025'] = (rations['n_rooms_2025'] / (rations['Number of Days'] * 70)) * 100
+        rations['Ratio_n_rooms_2023'] = (rations['n_rooms_2023'] / available[2023]) * 100
+        rations['Ratio_n_rooms_2024'] = (rations['n_rooms_2024'] / available[2024]) * 100
+        rations['Ratio_n_rooms_2025'] = (rations['n_rooms_2025'] / available[2025]) * 100
 
         # Round to one decimal place
         rations['Ratio_n_rooms_2023'] = rations['Ratio_n_rooms_2023'].round(1)
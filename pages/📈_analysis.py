@@ -10,7 +10,15 @@ import plotly.graph_objects as go
 import warnings
 from utils.page_protection import check_authentication
 from utils.logging_system import log_page_access, log_data_operation, log_error, log_action
-from fetch_data.fetch_data_PU import load_data
+from fetch_data.capacity_PU import daily_capacity
+from fetch_data.dataset_PU import get_cube, get_data, get_period_sums, query
+from fetch_data.snapshots_PU import load_layers, list_as_of_dates, pace_curve, pickup
+from utils.calendar_dimension import join_calendar
+from utils.calendar_alignment import previous_year_dates
+from utils.event_calendar import label_dates
+from utils.kpi import compute_kpis, kpi_pivot
+from utils.period_to_date import period_to_date
+from utils.property_selector import select_property
 from utils.analysis import calculate_metrics, plot_revenue_trend, plot_occupancy_by_day_of_week, forecast_revenue, plot_revenue_by_type, compare_years
 
 # Add the project root to the path to ensure imports work correctly
@@ -27,29 +35,67 @@ if not check_authentication():
 # Log page access
 log_page_access("Analysis Dashboard")
 
+# Property shown on the page
+selected_property = select_property()
+property_id = selected_property["property_id"]
+
 # Suppress warnings
 warnings.filterwarnings('ignore')
 
+# Define the mapping for categories
+category_mapping = {
+    'INDIV PUBL DIRECT': 'INDIV D',
+    'INDIV PUBL INDIRECT': 'INDIV I',
+    'NEGOCIES': 'NEGOCIES',
+    'GROUPES': 'GROUPES',
+    'B': 'OTHER',
+    'AUTRE': 'OTHER',
+    '** Type Non défini': 'OTHER'  
+}
+
+# Map segment types to their display names (stored as a categorical)
+# (the mapping is bound here because the tabs below redefine category_mapping)
+def map_segments(types, mapping=category_mapping):
+    return types.astype(str).replace(mapping)
+
+# Prepare rows for display (dates, calendar columns, segment mapping)
+def prepare_rows(df):
+    # Ensure that the 'day' column is correctly set up
+    df['day'] = pd.to_datetime(df['day'], format='%d-%m-%Y', errors='coerce')
+
+    # Look the formatted day, month name (ordered 'January'..'December'), year
+    # and ISO week up in the calendar dimension instead of deriving them per row
+    df = join_calendar(df, {
+        'formatted_day': 'formatted_day',  # Format as 'Wednesday, January 1'
+        'month': 'month_name',
+        'year': 'year',
+        'week': 'iso_week',
+    })
+
+    # Order the DataFrame by year and month
+    df = df.sort_values(by=['year', 'month'])
+
+    # Apply the mapping to the 'type' column
+    if 'type' in df.columns:
+        df['type'] = map_segments(df['type'])
+
+    return df
+
 # Load the data
 try:
     log_data_operation("loading", "price data")
-    price, df_1 = load_data()
+    price, df_1 = get_data(property_id)
     
     # Combine the dataframes if df_1 is not empty
     if not df_1.empty:
         price = pd.concat([price, df_1], ignore_index=True)
         log_data_operation("combining", "price data", "Combined multiple dataframes")
         
-    # Ensure that the 'day' column is correctly set up
-    price['day'] = pd.to_datetime(price['day'], errors='coerce')
-    
-    # Create formatted columns without losing the datetime object
-    price['formatted_day'] = price['day'].dt.strftime('%A, %B %d').str.replace(' 0', ' ')  # Format as 'Wednesday, January 1'
-    price['month'] = price['day'].dt.strftime('%B')  # Format month as 'January'
-    price['year'] = price['day'].dt.year  # Keep year as a separate column
-    
-    # Get week number
-    price['week'] = price['day'].dt.isocalendar().week
+    # Prepare the rows for display (dates, calendar columns, segment mapping)
+    price = prepare_rows(price)
+
+    # Occupancy rates use the property's capacity calendar (closures, renovations)
+    capacity = daily_capacity(property_id, price['day'].min(), max(price['day'].max(), pd.Timestamp(datetime.now())))
     
     log_data_operation("processed", "price data", f"Successfully processed {len(price)} records")
     st.success(f"Data loaded successfully! {len(price)} records found.")
@@ -58,6 +104,7 @@ except Exception as e:
     log_error(error_msg, e)
     st.error(error_msg)
     price = pd.DataFrame()
+    capacity = selected_property["capacity"]
     # Show detailed error information in an expander
     with st.expander("Error Details"):
         st.code(str(e))
@@ -83,79 +130,10 @@ st.title("Pricing Analysis")
 st.write("")
 
 # Change the order of the tabs
-tabs = ['Monthly_recap', 'Y-Y_recap', 'Daily', 'Daily_y_Y', 'Summary']
+tabs = ['Monthly_recap', 'Y-Y_recap', 'Daily', 'Daily_y_Y', 'Pace', 'Summary']
 
 # Create tabs in the Streamlit app
-tab_monthly_recap, tab_y_y_recap, tab_daily, tab_daily_y_y, _ = st.tabs(tabs)
-
-# Ensure that the 'day' column is correctly set up
-price['day'] = pd.to_datetime(price['day'], format='%d-%m-%Y', errors='coerce')
-
-# Create formatted columns without losing the datetime object
-price['formatted_day'] = price['day'].dt.strftime('%A, %B %d').str.replace(' 0', ' ')  # Format as 'Wednesday, January 1'
-price['month'] = price['day'].dt.strftime('%B')  # Format month as 'January'
-price['year'] = price['day'].dt.year  # Keep year as a separate column
-
-# Get week number
-price['week'] = price['day'].dt.isocalendar().week  
-
-vacation_periods = [
-    ('2025-01-01', '2025-01-06'),
-    ('2025-02-15', '2025-03-03'),
-    ('2025-04-21', '2025-04-28'),
-    ('2025-07-05', '2025-09-01'),
-    ('2025-10-20', '2025-10-31'),
-    ('2025-12-22', '2025-12-31')
-]
-
-# Define French public holidays in 2025
-public_holidays = [
-    '2025-01-01',  # New Year's Day
-    '2025-04-21',  # Easter Monday
-    '2025-05-01',  # Labour Day
-    '2025-05-08',  # Victory Day
-    '2025-05-29',  # Ascension Day
-    '2025-06-09',  # Whit Monday
-    '2025-07-14',  # Bastille Day
-    '2025-11-01',  # All Saints' Day
-    '2025-11-11',  # Armistice Day
-    '2025-12-25',  # Christmas Day,
-]
-
-special_events = [
-    ('2025-02-22', '2025-03-02', "Salon de l'agriculture", 18),  
-    ('2025-05-25', '2025-06-08', "Rolland Garros", 30),  
-    ('2025-06-15', '2025-06-23', "AIRSHOW", 110),  
-    ('2025-11-16', '2025-11-21', "Congrès des Maires", 60),  
-    ('2025-01-30', '2025-01-30', "veille de match", 20),  
-    ('2025-03-14', '2025-03-14', "veille de match", 20),  
-    ('2025-10-14', '2025-10-18', "equip auto", 60),  
-    ('2025-10-29', '2025-11-02', "salon chocolat", 20),  
-    ('2025-11-04', '2025-11-06', "salon nucléaire", 50)    
-]
-
-
-# Define the month order
-month_order = ['January', 'February', 'March', 'April', 'May', 'June', 'July', 'August', 'September', 'October', 'November', 'December']
-
-# Order the DataFrame by year and month
-price['month'] = pd.Categorical(price['month'], categories=month_order, ordered=True)
-price = price.sort_values(by=['year', 'month'])
-
-# Define the mapping for categories
-category_mapping = {
-    'INDIV PUBL DIRECT': 'INDIV D',
-    'INDIV PUBL INDIRECT': 'INDIV I',
-    'NEGOCIES': 'NEGOCIES',
-    'GROUPES': 'GROUPES',
-    'B': 'OTHER',
-    'AUTRE': 'OTHER',
-    '** Type Non défini': 'OTHER'  
-}
-
-# Apply the mapping to the 'type' column
-if 'type' in price.columns:
-    price['type'] = price['type'].replace(category_mapping)
+tab_monthly_recap, tab_y_y_recap, tab_daily, tab_daily_y_y, tab_pace, tab_summary = st.tabs(tabs)
 
 # Check which tab is selected and display content accordingly
 with tab_monthly_recap:
@@ -166,51 +144,26 @@ with tab_monthly_recap:
     selected_year = st.selectbox('Select Year:', years, index=default_index)
     period = st.selectbox('Select Period for Analysis:', ['Monthly', 'Weekly'], index=0)
 
-    # Filter the price DataFrame by the selected year
-    filtered_price = price[price['year'] == selected_year]
+    # Read the selected year from the month or week roll-up of the aggregate cube
+    recap = get_cube('month' if period == 'Monthly' else 'week', by=('type',), property_id=property_id)
+    recap = recap[recap['year'] == selected_year].copy()
+    recap['type'] = map_segments(recap['type'])
 
-    # Create a pivot table based on the selected period
+    # Segments side by side with the totals, PM and OR of the KPI engine
+    price_type, totals = kpi_pivot(recap, ['month_name' if period == 'Monthly' else 'week'], segment='type',
+                                   kpis=('pm', 'occupancy'), capacity=capacity, total_row='Total')
     if period == 'Monthly':
-        price_type = filtered_price.pivot_table(index='month', columns='type', values=['n_rooms', 'ca_room'], aggfunc='sum', fill_value=0)
-    elif period == 'Weekly':
-        price_type = filtered_price.pivot_table(index='week', columns='type', values=['n_rooms', 'ca_room'], aggfunc='sum', fill_value=0)
+        price_type = price_type.rename_axis('month')
 
     # Format the CA_room values to show no figures after the decimal point
     price_type['ca_room'] = price_type['ca_room'].astype(int)
 
-    # Add total row for n_rooms and ca_room
-    price_type.loc['Total'] = price_type.sum(numeric_only=True)
-
-    # Separate total rooms and total CA rooms into distinct columns
-    price_type['Total Rooms'] = (
-        price_type[('n_rooms', 'GROUPES')] + 
-        price_type[('n_rooms', 'INDIV I')] + 
-        price_type[('n_rooms', 'INDIV D')] + 
-        price_type[('n_rooms', 'NEGOCIES')] +
-        price_type[('n_rooms', 'OTHER')] 
-    )
-
-    price_type['Total CA Rooms'] = (
-        price_type[('ca_room', 'GROUPES')] + 
-        price_type[('ca_room', 'INDIV I')] + 
-        price_type[('ca_room', 'INDIV D')] + 
-        price_type[('ca_room', 'NEGOCIES')] +
-        price_type[('ca_room', 'OTHER')]
-    )
-
-    # Calculate PM and OR columns
-    if period == 'Monthly':
-        # Get the number of days in the selected month
-        month_days = filtered_price['day'].dt.days_in_month.unique()[0]  
-        price_type['PM'] = (price_type['Total CA Rooms'] / price_type['Total Rooms']).fillna(0) 
-        price_type['OR'] = price_type['Total Rooms'] / (70 * month_days)  
-    elif period == 'Weekly':
-        price_type['PM'] = (price_type['Total CA Rooms'] / price_type['Total Rooms']).fillna(0)   
-        price_type['OR'] = price_type['Total Rooms'] / (70 * 7)
+    price_type['Total Rooms'] = totals['n_rooms'].astype(int)
+    price_type['Total CA Rooms'] = totals['ca_room'].astype(int)
 
     # Format PM and OR columns
-    price_type['PM'] = price_type['PM'].round(0).astype(int)  
-    price_type['OR'] = (price_type['OR'] * 100).round(1)  
+    price_type['PM'] = totals['pm'].round(0).astype(int)
+    price_type['OR'] = totals['occupancy'].round(1)
 
     # Drop the 'OTHER' columns
     price_type = price_type.drop(columns=[('n_rooms', 'OTHER'), ('ca_room', 'OTHER')], errors='ignore')
@@ -233,9 +186,9 @@ with tab_y_y_recap:
         '** Type Non défini': 'OTHER'
     }
 
-    # Group the price DataFrame by type using the category mapping
-    grouped_data = price.copy()
-    grouped_data['type'] = grouped_data['type'].replace(category_mapping)  # Apply mapping
+    # Month totals by type come from the aggregate cube, with the category mapping applied
+    grouped_data = get_cube('month', by=('type',), property_id=property_id)
+    grouped_data['type'] = map_segments(grouped_data['type']).replace(category_mapping)  # Apply mapping
 
     # Get the current month
     today = datetime.now()
@@ -244,30 +197,24 @@ with tab_y_y_recap:
     # Select month for comparison with default values
     selected_month = st.selectbox('Select Month:', ['January', 'February', 'March', 'April', 'May', 'June', 'July', 'August', 'September', 'October', 'November', 'December'], index=current_month - 1)
 
+    # Totals and PM by year and type, with a Total row per year, from the KPI engine
+    month_data = grouped_data[grouped_data['month_name'] == selected_month]
+    y_y_kpis = compute_kpis(month_data, by=['year', 'type'], kpis=('pm',), subtotal='Total')
+
     # Prepare DataFrames for available years
     y_y_dataframes = {}
     available_years = sorted(grouped_data['year'].unique())
     for year in available_years:
-        filtered_data = grouped_data[grouped_data['year'] == year]
-        filtered_data = filtered_data[filtered_data['month'] == selected_month]  # Filter by selected month
-        y_y_dataframes[year] = filtered_data.groupby('type').agg({'n_rooms': 'sum', 'ca_room': 'sum'}).reset_index()
+        year_kpis = y_y_kpis[y_y_kpis['year'] == year]
+        y_y_dataframes[year] = year_kpis[['type', 'n_rooms', 'ca_room', 'pm']].rename(columns={'pm': 'PM'}).reset_index(drop=True)
 
-        # Add a sum row to each DataFrame
-        sum_row = y_y_dataframes[year].sum(numeric_only=True)
-        sum_row['type'] = 'Total'
-        y_y_dataframes[year] = pd.concat([y_y_dataframes[year], sum_row.to_frame().T], ignore_index=True)
-
-        # Calculate PM and add it as a new column
-        y_y_dataframes[year]['PM'] = (y_y_dataframes[year]['ca_room'] / y_y_dataframes[year]['n_rooms']).fillna(0) 
-        y_y_dataframes[year]['PM'] = y_y_dataframes[year]['PM'].astype(int)  # No figures after the decimal point
-
-    # Format 'ca_room' values to show no figures after the decimal point
-    for year in y_y_dataframes:
+        # No figures after the decimal point
+        y_y_dataframes[year]['PM'] = y_y_dataframes[year]['PM'].astype(int)
         y_y_dataframes[year]['ca_room'] = y_y_dataframes[year]['ca_room'].astype(int)
 
     # Display the comparison results side by side
     st.subheader('Comparison Results')
-    cols = st.columns(3)  # Create 3 columns for the 3 years
+    cols = st.columns(max(len(y_y_dataframes), 1))  # One column per year
     for i, (year, data) in enumerate(y_y_dataframes.items()):
         with cols[i]:
             st.write(f'Data for {year}:')
@@ -284,22 +231,18 @@ with tab_daily:
         '** Type Non défini': 'OTHER'
     }
 
-    # Group the price DataFrame by type using the category mapping
-    grouped_data = price.copy()
-    grouped_data['type'] = grouped_data['type'].replace(category_mapping)  # Apply mapping
-
-    # Convert 'day' column to datetime format
-    grouped_data['day'] = pd.to_datetime(grouped_data['day'], format='%A %B %d', errors='coerce')
-
-    # Filter data for the next 30 days
+    # Fetch the next 30 days through the indexed fact store
     today = datetime.now()
     next_30_days = pd.date_range(start=today, periods=30).date
+    grouped_data = query(start=next_30_days[0], end=next_30_days[-1], property_id=property_id)
 
-    # Prepare DataFrame for the next 30 days
-    daily_data = grouped_data[grouped_data['day'].dt.date.isin(next_30_days)]
+    # Group the price DataFrame by type using the category mapping
+    grouped_data['type'] = map_segments(grouped_data['type']).replace(category_mapping)  # Apply mapping
 
-    # Pivot the DataFrame to have a column for each type
-    daily_summary = daily_data.pivot_table(index='day', columns='type', values=['n_rooms', 'ca_room'], aggfunc='sum').fillna(0)
+    # Types side by side with the daily totals, PM and OR of the KPI engine
+    # (capacity counted over the 30 nights, even when none has bookings yet)
+    daily_summary, totals = kpi_pivot(grouped_data, ['day'], segment='type', kpis=('pm', 'occupancy'),
+                                      capacity=capacity, days=pd.DatetimeIndex(next_30_days))
 
     # Combine column names to make them unique and remove 'room'
     daily_summary.columns = [f'{value}_{key}'.replace('rooms', '').replace('room', '') for key, value in daily_summary.columns]
@@ -310,17 +253,11 @@ with tab_daily:
     # Format 'ca_room' values to show no figures after the decimal point
     daily_summary = daily_summary.astype(int)
 
-    # Calculate total rooms and total CA rooms
-    daily_summary['Total_n'] = daily_summary.filter(like='n_').sum(axis=1)
-    daily_summary['Total_ca'] = daily_summary.filter(like='ca_').sum(axis=1)
-
-    # Calculate PM (Performance Metric) and OR (Occupancy Rate)
-    daily_summary['PM'] = (daily_summary['Total_ca'] / daily_summary['Total_n']).fillna(0) 
-    daily_summary['OR'] = (daily_summary['Total_n'] / 70).fillna(0) * 100
-
-    # Format PM to show one decimal place
-    daily_summary['PM'] = daily_summary['PM'].round(1)  # One decimal place
-    daily_summary['OR'] = daily_summary['OR'].astype(int)  # Format OR to show no figures after the decimal point
+    # Total rooms and total CA rooms, PM (one decimal place) and OR (no decimals)
+    daily_summary['Total_n'] = totals['n_rooms'].to_numpy().astype(int)
+    daily_summary['Total_ca'] = totals['ca_room'].to_numpy().astype(int)
+    daily_summary['PM'] = totals['pm'].round(1).to_numpy()
+    daily_summary['OR'] = totals['occupancy'].to_numpy().astype(int)
 
     # Display the daily summary
     st.subheader('Room Details for the Next 30 Days')
@@ -335,33 +272,20 @@ with tab_daily_y_y:
     # Create date range starting from today for the next 30 days
     date_range = pd.date_range(start=today, periods=30)
 
-    # Filter data for the next 30 days
-    filtered_data = price[price['day'].dt.normalize().isin(date_range)]
+    # Fetch the next 30 days through the indexed fact store
+    filtered_data = query(start=date_range[0], end=date_range[-1], property_id=property_id)
 
-    # Group by day and calculate totals for 2025
-    daily_summary = filtered_data.groupby('day').agg({
-        'n_rooms': 'sum',
-        'ca_room': 'sum'
-    }).reset_index()
+    # Daily totals, PM and OR for 2025 from the KPI engine
+    daily_columns = ['day', 'n_rooms', 'ca_room', 'pm', 'occupancy']
+    daily_summary = compute_kpis(filtered_data, by=['day'], kpis=('pm', 'occupancy'), capacity=capacity, days=date_range)[daily_columns]
 
     # Make sure we have all dates in the range (even if no data)
     all_dates = pd.DataFrame({'day': date_range})
     daily_summary = pd.merge(all_dates, daily_summary, on='day', how='left')
     daily_summary = daily_summary.fillna(0)
 
-    # Function to get the same day of week from previous year
-    def get_same_day_previous_year(date):
-        # Get the same weekday from previous year
-        days_to_subtract = 365
-        if date.year % 4 == 0:  # If current year is leap year
-            days_to_subtract = 366
-        target_date = date - pd.Timedelta(days=days_to_subtract)
-        # Adjust to get the same weekday
-        while target_date.weekday() != date.weekday():
-            target_date += pd.Timedelta(days=1)
-        return target_date
-
-    daily_summary['2024_date'] = daily_summary['day'].apply(get_same_day_previous_year)
+    # Same weekday of the previous year (364 days back), from the precomputed alignment
+    daily_summary['2024_date'] = previous_year_dates(daily_summary['day'], mode='weekday')
     
     # Get data for the previous year
     available_years = sorted(price['year'].unique())
@@ -370,14 +294,11 @@ with tab_daily_y_y:
     else:
         prev_year = available_years[0]  # Use the only available year
     
-    data_prev_year = price[price['year'] == prev_year].copy()
+    data_prev_year = query(year=prev_year, property_id=property_id)
     data_prev_year['day'] = data_prev_year['day'].dt.normalize()
     
-    # Group previous year data by day
-    daily_prev_year = data_prev_year.groupby('day').agg({
-        'n_rooms': 'sum',
-        'ca_room': 'sum'
-    }).reset_index()
+    # Daily totals, PM and OR of the previous year
+    daily_prev_year = compute_kpis(data_prev_year, by=['day'], kpis=('pm', 'occupancy'), capacity=capacity)[daily_columns]
     
     # Merge previous year data with current summary
     daily_summary = pd.merge(
@@ -393,19 +314,19 @@ with tab_daily_y_y:
     current_year = str(max(available_years))
     previous_year = str(prev_year)
     
-    # First rename columns for current year data
-    daily_summary = daily_summary.rename(columns={
-        'n_rooms': f'n_rooms_{current_year}',
-        'ca_room': f'ca_room_{current_year}'
-    })
-
-    # Calculate metrics for both years, but only if the columns exist
+    # Name the columns after their year
+    year_columns = {'n_rooms': 'n_rooms', 'ca_room': 'ca_room', 'pm': 'PM', 'occupancy': 'OR'}
+    renames = {column: f'{name}_{current_year}' for column, name in year_columns.items()}
+    if previous_year != current_year:
+        renames.update({f'{column}_prev': f'{name}_{previous_year}' for column, name in year_columns.items()})
+    daily_summary = daily_summary.rename(columns=renames)
+
+    # Format the metrics of both years, but only if the columns exist
     for year in [previous_year, current_year]:
         suffix = f'_{year}'
-        # Check if both required columns exist before calculating metrics
-        if f'ca_room{suffix}' in daily_summary.columns and f'n_rooms{suffix}' in daily_summary.columns:
-            daily_summary[f'PM{suffix}'] = (daily_summary[f'ca_room{suffix}'] / daily_summary[f'n_rooms{suffix}']).fillna(0).round(0).astype(int)
-            daily_summary[f'OR{suffix}'] = (daily_summary[f'n_rooms{suffix}'] / 70 * 100).round(1)
+        if f'PM{suffix}' in daily_summary.columns:
+            daily_summary[f'PM{suffix}'] = daily_summary[f'PM{suffix}'].fillna(0).round(0).astype(int)
+            daily_summary[f'OR{suffix}'] = daily_summary[f'OR{suffix}'].fillna(0).round(1)
             daily_summary[f'ca_room{suffix}'] = daily_summary[f'ca_room{suffix}'].fillna(0).astype(int)
             daily_summary[f'n_rooms{suffix}'] = daily_summary[f'n_rooms{suffix}'].fillna(0).astype(int)
 
@@ -445,13 +366,8 @@ with tab_daily_y_y:
 
     daily_summary['day_display'] = daily_summary['day'].dt.strftime('%A, %B %d')
     daily_summary['day_display_2024'] = daily_summary['2024_date'].dt.strftime('%A, %B %d')
-    daily_summary['Period'] = daily_summary['day'].apply(lambda date: "")
-    for start, end in vacation_periods:
-        daily_summary.loc[(daily_summary['day'] >= start) & (daily_summary['day'] <= end), 'Period'] = "Vacation"
-    for date in public_holidays:
-        daily_summary.loc[daily_summary['day'] == date, 'Period'] = "Holiday"
-    for start, end, event_name, _ in special_events:
-        daily_summary.loc[(daily_summary['day'] >= start) & (daily_summary['day'] <= end), 'Period'] = event_name
+    # Vacations, public holidays and events from the event calendar (data/events.json)
+    daily_summary['Period'] = label_dates(daily_summary['day'])
 
     # Sort by date
     daily_summary = daily_summary.sort_values('day')
@@ -495,4 +411,74 @@ with tab_daily_y_y:
         ], subset=['PM Diff %', 'OR Diff %'])
 
     # Display the styled DataFrame
-    st.dataframe(style_df(display_df), height=800)
\ No newline at end of file
+    st.dataframe(style_df(display_df), height=800)
+
+
+with tab_pace:
+    st.title('Pace & Pickup')
+
+    try:
+        # Every snapshot of the books, tagged with the date it was exported
+        layers = load_layers(property_id)
+        as_of_dates = list_as_of_dates(layers)
+    except Exception as e:
+        log_error("Error loading snapshot layers", e)
+        as_of_dates = []
+
+    if not as_of_dates:
+        st.info("No snapshots available yet.")
+    else:
+        # Stay period whose build-up is followed across snapshots
+        pace_period = st.date_input(
+            "Stay period",
+            value=(datetime.now().date(), (datetime.now() + timedelta(days=29)).date()),
+            key="pace_period",
+        )
+        # While a range is being picked only its first date is set
+        pace_start, pace_end = (pace_period[0], pace_period[-1]) if isinstance(pace_period, tuple) else (pace_period, pace_period)
+        pace_measure = st.selectbox("Measure", ['n_rooms', 'ca_room'], key="pace_measure")
+
+        curve = pace_curve(pace_start, pace_end, pace_measure, layers)
+        if curve.empty:
+            st.info("No snapshot covers this stay period.")
+        else:
+            fig = px.line(curve, x='as_of', y=pace_measure, markers=True,
+                          hover_data=['days_before'], title='On the books by snapshot date')
+            st.plotly_chart(fig, use_container_width=True)
+
+        # Pickup between two snapshots over the same stay period
+        as_of_labels = [pd.Timestamp(date).strftime('%Y-%m-%d') for date in as_of_dates]
+        col1, col2 = st.columns(2)
+        with col1:
+            from_label = st.selectbox("From snapshot", as_of_labels, index=max(len(as_of_labels) - 2, 0), key="pickup_from")
+        with col2:
+            to_label = st.selectbox("To snapshot", as_of_labels, index=len(as_of_labels) - 1, key="pickup_to")
+
+        pickup_df = pickup(from_label, to_label, start=pace_start, end=pace_end, layers=layers)
+        st.subheader(f'Pickup between {from_label} and {to_label}')
+        st.dataframe(pickup_df[['day', 'n_rooms_from', 'n_rooms_to', 'n_rooms_pickup',
+                                'ca_room_from', 'ca_room_to', 'ca_room_pickup']],
+                     use_container_width=True)
+
+with tab_summary:
+    st.title('Period to Date')
+
+    # Month to date, year to date and rolling 12 months against the same dates last year
+    ptd_as_of = st.date_input("As of", value=datetime.now().date(), key="ptd_as_of")
+    ptd = period_to_date(get_period_sums(property_id=property_id), ptd_as_of)
+
+    ptd_summary = pd.DataFrame({
+        'Period': ptd['label'],
+        'From': ptd['start'].dt.strftime('%Y-%m-%d'),
+        'To': ptd['end'].dt.strftime('%Y-%m-%d'),
+        'Rooms': ptd['n_rooms'].astype(int),
+        'Rooms LY': ptd['n_rooms_ly'].astype(int),
+        'Rooms Diff %': ptd['n_rooms_change'].round(1),
+        'Revenue': ptd['ca_room'].astype(int),
+        'Revenue LY': ptd['ca_room_ly'].astype(int),
+        'Revenue Diff %': ptd['ca_room_change'].round(1),
+        'PM': ptd['pm'].round(0).astype(int),
+        'PM LY': ptd['pm_ly'].round(0).astype(int),
+        'PM Diff %': ptd['pm_change'].round(1),
+    })
+    st.dataframe(ptd_summary, use_container_width=True, hide_index=True)
@@ -13,13 +13,19 @@ if str(root_dir) not in sys.path:
 # Import the authentication protection
 from utils.page_protection import check_authentication
 from utils.file_upload import validate_pu_file, save_uploaded_file
-from fetch_data.fetch_data_PU import load_data
+from fetch_data.dataset_PU import get_data, invalidate
+from fetch_data.catalog_PU import list_snapshots
+from utils.property_selector import select_property
 
 # Check if user is authenticated before proceeding
 if not check_authentication():
     # If not authenticated, the check_authentication function will stop execution
     st.stop()
 
+# Property the uploaded export belongs to
+selected_property = select_property()
+property_id = selected_property["property_id"]
+
 # Set page title and header
 st.title("Upload Financial Data")
 st.header("Update Hotel Financial Data")
@@ -54,7 +60,7 @@ if uploaded_file is not None:
         # Add a button to process the file
         if st.button("Process and Update Financial Data"):
             # Save the file
-            success, message, file_path = save_uploaded_file(uploaded_file)
+            success, message, file_path = save_uploaded_file(uploaded_file, property_id)
             
             if success:
                 st.success(message)
@@ -73,9 +79,10 @@ if uploaded_file is not None:
                     st.write(f"Number of rows: {df.shape[0]}")
                     st.write(f"Number of columns: {df.shape[1]}")
                     
-                    # Reload the data to update the dashboard
+                    # Drop the cached dataset of this property and reload it for the dashboard
                     st.info("Reloading data for the dashboard...")
-                    price, df_1 = load_data()
+                    invalidate(property_id)
+                    price, df_1 = get_data(property_id)
                     
                     st.success(f"Financial data successfully updated with {price.shape[0]} records!")
                     
@@ -94,25 +101,23 @@ else:
 st.markdown("---")
 st.subheader("Data Update History")
 
-# Try to list previously uploaded files
+# List previously ingested snapshots from the catalog
 try:
-    data_dir = os.path.join(root_dir, 'data')
-    if os.path.exists(data_dir):
-        files = [f for f in os.listdir(data_dir) if f.endswith('_PU.xlsx')]
-        files.sort(reverse=True)  # Show newest files first
-        
-        if files:
-            st.write("Previously uploaded files:")
-            for file in files:
-                file_path = os.path.join(data_dir, file)
-                file_stats = os.stat(file_path)
-                file_size = file_stats.st_size / 1024  # Convert to KB
-                modified_time = datetime.datetime.fromtimestamp(file_stats.st_mtime).strftime('%Y-%m-%d %H:%M:%S')
-                
-                st.write(f"- **{file}** (Size: {file_size:.2f} KB, Last modified: {modified_time})")
-        else:
-            st.write("No previous uploads found.")
+    snapshots = list_snapshots(property_id=property_id)
+    if snapshots:
+        st.write("Previously uploaded files:")
+        # Show newest snapshots first
+        for entry in reversed(snapshots):
+            file_size = entry['size'] / 1024  # Convert to KB
+            ingested_at = datetime.datetime.fromisoformat(entry['ingested_at']).strftime('%Y-%m-%d %H:%M:%S')
+            details = f"Size: {file_size:.2f} KB, Ingested: {ingested_at}"
+            if entry.get('rows') is not None:
+                details += f", Rows: {entry['rows']}, Dates: {entry['date_min']} to {entry['date_max']}"
+            if entry.get('parse_seconds') is not None:
+                details += f", Parse time: {entry['parse_seconds']:.2f} s"
+
+            st.write(f"- **{entry['file_name']}** ({details})")
     else:
-        st.write("Data directory not found.")
+        st.write("No previous uploads found.")
 except Exception as e:
     st.error(f"Error listing files: {str(e)}")
@@ -0,0 +1,110 @@
+import numpy as np
+import pandas as pd
+import pytest
+from utils.budget import annual_budget, budget_bands, budget_columns, budget_matrix, fit_budget_variance, monthly_history, simulate_budget
+
+
+def month_totals(rows):
+    """Month totals from (year, month, n_rooms, ca_room) tuples"""
+    return pd.DataFrame(rows, columns=['year', 'month', 'n_rooms', 'ca_room'])
+
+
+history = month_totals([
+    (2023, 1, 100, 10000.0),
+    (2023, 2, 90, 8100.0),
+    (2024, 1, 120, 13200.0),
+    (2024, 3, 50, 5500.0),
+])
+
+
+def test_annual_budget_schema_and_rules():
+    budget = annual_budget(history, 2025, growth_rate=0.1)
+    assert list(budget.columns) == budget_columns
+    assert budget['budget_rooms'].dtype.kind == 'i'
+
+    by_month = budget.set_index('month')
+    # Previous year's month, revenue grown
+    assert by_month.loc[1, 'budget_rooms'] == 120
+    assert by_month.loc[1, 'budget_revenue'] == pytest.approx(13200.0 * 1.1)
+    assert by_month.loc[1, 'budget_adr'] == pytest.approx(13200.0 * 1.1 / 120)
+    # Missing last year: average of the years on record
+    assert by_month.loc[2, 'budget_rooms'] == 90
+    # Never seen: zeros
+    assert by_month.loc[12, ['budget_revenue', 'budget_rooms', 'budget_adr']].tolist() == [0, 0, 0]
+
+
+def test_budget_matrix_covers_years_and_rates():
+    budget = budget_matrix(history, [2024, 2025], [0.0, 0.05, 0.1])
+    assert len(budget) == 3 * 2 * 12
+
+    one = budget[(budget['year'] == 2025) & (budget['growth_rate'] == 0.05)].reset_index(drop=True)
+    pd.testing.assert_frame_equal(one[budget_columns], annual_budget(history, 2025, 0.05))
+
+    # 2024 is budgeted from 2023
+    jan_2024 = budget[(budget['year'] == 2024) & (budget['month'] == 1) & (budget['growth_rate'] == 0.0)]
+    assert jan_2024['budget_revenue'].item() == pytest.approx(10000.0)
+
+
+def test_budget_matrix_by_segment():
+    rows = pd.concat([history.assign(type='A'), history.assign(type='B', n_rooms=history['n_rooms'] * 2)])
+    budget = budget_matrix(rows, [2025], 0.0, by=('type',))
+    jan = budget[budget['month'] == 1].set_index('type')
+    assert jan['budget_rooms'].to_dict() == {'A': 120, 'B': 240}
+
+
+def test_empty_history():
+    budget = annual_budget(month_totals([]), 2025)
+    assert len(budget) == 12
+    assert np.all(budget[['budget_revenue', 'budget_rooms', 'budget_adr']].to_numpy() == 0)
+
+
+# Three full years, the same rooms every year and 10% more revenue each year,
+# then the first months of 2025 still being booked
+steady = month_totals([
+    (year, month, 100 + month, (100 + month) * 100.0 * 1.1 ** (year - 2022))
+    for year in (2022, 2023, 2024) for month in range(1, 13)
+] + [(2025, 1, 10, 500.0), (2025, 2, 5, 250.0)])
+
+
+def test_fit_budget_variance_on_steady_growth():
+    variance = fit_budget_variance(monthly_history(steady[steady['year'] < 2025]))
+    assert variance['growth_mean'] == pytest.approx(0.1)
+    assert variance['growth_std'] == pytest.approx(0.0, abs=1e-9)
+    assert np.allclose(variance['rooms_std'], 0.0)
+    assert np.allclose(variance['adr_std'], 0.0)
+
+
+def test_simulate_budget_leaves_months_on_the_books_out():
+    simulation = simulate_budget(steady, months=6, scenarios=50, as_of='2025-01-15', seed=1)
+    assert simulation['periods'].strftime('%Y-%m').tolist() == ['2025-02', '2025-03', '2025-04', '2025-05', '2025-06', '2025-07']
+    assert simulation['revenue'].shape == (50, 6)
+    # No spread on record: every scenario is the 2024 month grown by 10%
+    assert simulation['variance']['growth_mean'] == pytest.approx(0.1)
+    assert np.allclose(simulation['rooms'], [102, 103, 104, 105, 106, 107])
+    assert np.allclose(simulation['adr'][:, 0], 100 * 1.1 ** 3)
+
+
+def test_simulate_budget_is_reproducible_and_capped():
+    history = monthly_history(month_totals([(2024, month, 3000, 300000.0) for month in range(1, 13)]))
+    first = simulate_budget(None, scenarios=200, capacity=90, start='2025-01', seed=7, history=history)
+    second = simulate_budget(None, scenarios=200, capacity=90, start='2025-01', seed=7, history=history)
+    np.testing.assert_array_equal(first['revenue'], second['revenue'])
+    assert (first['rooms'] <= 90 * first['periods'].days_in_month.to_numpy()).all()
+    assert np.allclose(first['ebitda'], first['revenue'] * 0.7 - 0.45 * 300000.0)
+
+
+def test_budget_bands_are_ordered():
+    # Months that vary from year to year give the scenarios a spread
+    noisy = steady[steady['year'] < 2025].assign(n_rooms=lambda df: df['n_rooms'] + df['year'] * df['month'] % 7)
+    simulation = simulate_budget(noisy, scenarios=500, growth_rate=0.05, start='2025-01', seed=3)
+    bands = budget_bands(simulation)
+    assert len(bands) == 12
+    assert (bands['revenue_p10'] < bands['revenue_p50']).all()
+    assert (bands['revenue_p50'] < bands['revenue_p90']).all()
+    assert bands['month_name'].iloc[0] == 'January 2025'
+
+
+def test_simulate_budget_from_history_starts_after_last_month_on_record():
+    history = monthly_history(steady)
+    simulation = simulate_budget(None, months=3, scenarios=10, seed=0, history=history)
+    assert simulation['periods'].strftime('%Y-%m').tolist() == ['2025-03', '2025-04', '2025-05']
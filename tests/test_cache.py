@@ -0,0 +1,58 @@
+import os
+from pathlib import Path
+import pandas as pd
+import pytest
+from fetch_data import cache_PU
+from fetch_data.cache_PU import current_keys, file_hash, read_cached
+
+pytestmark = pytest.mark.skipif(not cache_PU.PARQUET_AVAILABLE, reason="pyarrow is not installed")
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    root = tmp_path / 'cache'
+    monkeypatch.setattr(cache_PU, 'cache_root', str(root))
+    monkeypatch.setattr(cache_PU, 'index_path', str(root / 'index.json'))
+    return root
+
+
+def workbook(path, content):
+    path.write_bytes(content)
+    return str(path)
+
+
+def counting_parser(calls):
+    def parse(file_path):
+        calls.append(os.path.basename(file_path))
+        return pd.DataFrame({'n_rooms': [1, 2], 'source': [Path(file_path).read_text()] * 2})
+    return parse
+
+
+def test_unchanged_workbook_is_parsed_once(tmp_path, cache_dir):
+    calls = []
+    path = workbook(tmp_path / '2025_PU.xlsx', b'v1')
+    first = read_cached(path, counting_parser(calls))
+    second = read_cached(path, counting_parser(calls))
+    assert calls == ['2025_PU.xlsx']
+    pd.testing.assert_frame_equal(first, second)
+
+
+def test_changed_content_is_parsed_again(tmp_path, cache_dir):
+    calls = []
+    path = workbook(tmp_path / '2025_PU.xlsx', b'v1')
+    read_cached(path, counting_parser(calls))
+    workbook(tmp_path / '2025_PU.xlsx', b'v2')
+    os.utime(path, ns=(0, 0))
+    assert read_cached(path, counting_parser(calls))['source'].tolist() == ['v2', 'v2']
+    assert calls == ['2025_PU.xlsx', '2025_PU.xlsx']
+
+
+def test_identical_copies_share_one_entry(tmp_path, cache_dir):
+    calls = []
+    original = workbook(tmp_path / '2025_PU.xlsx', b'same')
+    copy = workbook(tmp_path / '2025_PU_copy.xlsx', b'same')
+    read_cached(original, counting_parser(calls))
+    read_cached(copy, counting_parser(calls))
+    assert calls == ['2025_PU.xlsx']
+    assert [key['sha256'] for key in current_keys([original, copy])] == [file_hash(original)] * 2
+    assert len(list(cache_dir.glob('*.parquet'))) == 1
@@ -0,0 +1,44 @@
+import pandas as pd
+import pytest
+from utils.calendar_alignment import align_dates, previous_year_dates
+
+
+def dates(*values):
+    return pd.Series(pd.to_datetime(list(values)))
+
+
+def as_strings(series):
+    return series.dt.strftime('%Y-%m-%d').tolist()
+
+
+def test_weekday_alignment_keeps_the_weekday():
+    days = pd.Series(pd.date_range('2025-01-01', '2025-12-31', freq='D'))
+    aligned = previous_year_dates(days)
+    assert (aligned.dt.weekday == days.dt.weekday).all()
+    # Never more than 3 days from the same calendar date
+    assert ((days - pd.DateOffset(years=1)) - aligned).abs().max() <= pd.Timedelta(days=3)
+
+
+def test_date_alignment_clips_29_february():
+    aligned = previous_year_dates(dates('2024-02-29', '2024-03-01'), mode='date')
+    assert as_strings(aligned) == ['2023-02-28', '2023-03-01']
+
+
+def test_holiday_alignment_follows_moving_feasts():
+    # Easter Monday moved from 1 April 2024 to 21 April 2025
+    aligned = previous_year_dates(dates('2025-04-21', '2025-07-14'), mode='holiday')
+    assert as_strings(aligned) == ['2024-04-01', '2024-07-14']
+
+
+def test_align_dates_several_years_keeps_index_and_nat():
+    days = pd.Series(pd.to_datetime(['2025-03-14', None]), index=[10, 20])
+    aligned = align_dates(days, years_back=2, mode='date')
+    assert list(aligned.index) == [10, 20]
+    assert list(aligned.columns) == [1, 2]
+    assert as_strings(aligned.loc[[10]].stack()) == ['2024-03-14', '2023-03-14']
+    assert aligned.loc[20].isna().all()
+
+
+def test_unknown_mode():
+    with pytest.raises(ValueError):
+        align_dates(dates('2025-01-01'), mode='fiscal')
@@ -0,0 +1,44 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+import pytest
+from fetch_data import catalog_PU
+from fetch_data.catalog_PU import find_snapshot_by_hash, load_catalog, save_catalog
+from fetch_data.fetch_data_PU import refresh_catalog_stats
+
+
+@pytest.fixture
+def catalog_file(tmp_path, monkeypatch):
+    path = tmp_path / 'catalog.json'
+    monkeypatch.setattr(catalog_PU, 'catalog_path', str(path))
+    entries = [
+        {'file_name': f'{property_id}.xlsx', 'role': 'main', 'property_id': property_id,
+         'sha256': 'same' if property_id == 'a' else property_id, 'as_of': '2025-01-01', 'rows': None}
+        for property_id in 'abcdefgh'
+    ]
+    save_catalog({'version': 0, 'snapshots': entries})
+    return path
+
+
+def test_find_snapshot_by_hash_per_property(catalog_file):
+    assert find_snapshot_by_hash('same', property_id='a')['file_name'] == 'a.xlsx'
+    # The same file uploaded for another property is not a duplicate there
+    assert find_snapshot_by_hash('same', property_id='b') is None
+
+
+def test_concurrent_stats_refresh_keeps_every_update(catalog_file):
+    version = json.loads(catalog_file.read_text())['version']
+    frame = pd.DataFrame({'day': pd.to_datetime(['2025-01-01', '2025-01-02'])})
+
+    def refresh(entry):
+        info = {'sha256': entry['sha256'], 'parse_seconds': 0.5}
+        refresh_catalog_stats([entry], [frame], [info])
+
+    # Each worker holds its own copy of the catalog, as parallel property loads do
+    entries = [dict(entry) for entry in load_catalog()['snapshots']]
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(refresh, entries))
+
+    catalog = load_catalog()
+    assert [entry['rows'] for entry in catalog['snapshots']] == [2] * 8
+    assert catalog['version'] == version
@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+import pytest
+from utils.data_processing import (default_month_seasonality, estimate_seasonality, generate_budget_plan,
+                                   generate_budget_plans)
+
+
+def monthly(revenue, start='2023-01-31'):
+    dates = pd.date_range(start, periods=len(revenue), freq=pd.offsets.MonthEnd())
+    revenue = np.asarray(revenue, dtype=float)
+    return pd.DataFrame({'date': dates, 'revenue': revenue, 'cost': revenue * 0.7})
+
+
+def test_seasonality_recovers_pattern():
+    pattern = np.array([default_month_seasonality[m] for m in range(1, 13)])
+    data = monthly(np.tile(pattern, 3) * 1000 * np.repeat([1.0, 1.1, 1.2], 12))
+    index = estimate_seasonality(data)['month'][0]
+    assert index == pytest.approx(pattern / pattern.mean(), rel=1e-6)
+
+
+def test_flat_history_gives_flat_plan():
+    plan = generate_budget_plan(monthly([1000.0] * 24), forecast_months=6, growth_rate=0.0)
+    assert plan['revenue'].tolist() == pytest.approx([1000.0] * 6)
+    assert plan['date'].tolist() == list(pd.date_range('2025-01-31', periods=6, freq=pd.offsets.MonthEnd()))
+
+
+def test_daily_rows_plan_monthly_totals():
+    days = pd.date_range('2024-01-01', '2024-12-31')
+    daily = pd.DataFrame({'date': days, 'revenue': 100.0, 'cost': 70.0})
+    plan = generate_budget_plan(daily, forecast_months=1, growth_rate=0.0)
+
+    # Base: average of the last 3 monthly totals, not of the last 3 rows
+    assert plan['revenue'].iloc[0] == pytest.approx(3100.0, rel=0.05)
+
+
+def test_segments_share_the_plan_months():
+    rooms = monthly([1000.0] * 12).assign(revenue_category='Rooms')
+    spa = monthly([100.0] * 9).assign(revenue_category='Spa')
+    plan = generate_budget_plan(pd.concat([rooms, spa]), forecast_months=3, by='revenue_category')
+
+    dates = plan.groupby('revenue_category')['date'].apply(list)
+    assert dates['Rooms'] == dates['Spa'] == list(pd.date_range('2024-01-31', periods=3, freq=pd.offsets.MonthEnd()))
+
+
+def test_batch_matches_single_plans():
+    datasets = {'a': monthly([1000.0, 1200.0, 900.0] * 8), 'b': monthly([500.0] * 18)}
+    batch = generate_budget_plans(datasets, forecast_months=4, growth_rate={'a': 0.05, 'b': 0.1})
+    for name, rate in (('a', 0.05), ('b', 0.1)):
+        single = generate_budget_plan(datasets[name], forecast_months=4, growth_rate=rate)
+        pd.testing.assert_frame_equal(batch[batch['plan'] == name].drop(columns='plan').reset_index(drop=True), single)
@@ -0,0 +1,108 @@
+import numpy as np
+import pandas as pd
+import pytest
+from fetch_data import dataset_PU
+
+
+@pytest.fixture
+def loads(monkeypatch):
+    """Fake loader recording which properties were loaded, with per-property catalog versions"""
+    calls, versions = [], {'a': 'a1', 'b': 'b1'}
+    monkeypatch.setattr(dataset_PU, '_cache', type(dataset_PU._cache)())
+    monkeypatch.setattr(dataset_PU, '_counters', {})
+    monkeypatch.setattr(dataset_PU, 'get_property_version', lambda property_id=None: versions[property_id])
+
+    def load(property_id):
+        calls.append(property_id)
+        frame = pd.DataFrame({'n_rooms': [len(calls)]})
+        return {'price': frame, 'df_1': frame.head(0), 'key': property_id, 'facts_ready': None, 'bytes': 0,
+                'cube': None, 'rollups': {}, 'snapshots': [], 'previous': {}}
+
+    monkeypatch.setattr(dataset_PU, '_load', load)
+    return calls, versions
+
+
+def test_invalidate_only_reloads_that_property(loads):
+    calls, _ = loads
+    dataset_PU.get_data('a'), dataset_PU.get_data('b')
+    dataset_PU.invalidate('a')
+    dataset_PU.get_data('a'), dataset_PU.get_data('b')
+    assert calls == ['a', 'b', 'a']
+    # The superseded dataset of a is replaced, not kept next to the new one
+    assert dataset_PU.cache_info()['property_id'].tolist() == ['a', 'b']
+
+
+def test_catalog_change_of_one_property_keeps_the_others(loads):
+    calls, versions = loads
+    dataset_PU.get_data('a'), dataset_PU.get_data('b')
+    versions['a'] = 'a2'
+    assert dataset_PU.get_data('a')[0]['n_rooms'].tolist() == [3]
+    dataset_PU.get_data('b')
+    assert calls == ['a', 'b', 'a']
+
+
+def test_cap_evicts_other_properties_by_private_memory(loads, monkeypatch):
+    calls, _ = loads
+    monkeypatch.setattr(dataset_PU, 'cache_max_mb', 1)
+    dataset_PU.get_data('a')
+    dataset_PU._cache['a']['bytes'] = 2 * 1024 * 1024
+    dataset_PU.get_data('b')
+    assert dataset_PU.cache_info()['property_id'].tolist() == ['b']
+
+
+def day_cube(rows):
+    """Cube cells from (day, type, n_rooms) tuples"""
+    cube = pd.DataFrame(rows, columns=['day', 'type', 'n_rooms'])
+    cube['day'] = pd.to_datetime(cube['day'])
+    cube['sous_type'] = 'A'
+    cube['n_customers'] = cube['n_rooms']
+    cube['ca_room'] = cube['n_rooms'] * 100.0
+    return cube
+
+
+def snapshot(file_name, date_min, date_max):
+    return {'file_name': file_name, 'role': 'main', 'sha256': file_name, 'as_of': date_min,
+            'date_min': date_min, 'date_max': date_max}
+
+
+@pytest.fixture
+def versions(monkeypatch):
+    """Fake loader serving the cube and snapshots of the current state"""
+    state = {'version': 1, 'snapshots': [], 'cube': None}
+    monkeypatch.setattr(dataset_PU, '_cache', type(dataset_PU._cache)())
+    monkeypatch.setattr(dataset_PU, 'get_property_version', lambda property_id=None: state['version'])
+    monkeypatch.setattr(dataset_PU, '_load', lambda property_id: {
+        'price': pd.DataFrame(), 'df_1': pd.DataFrame(), 'key': None, 'facts_ready': None, 'bytes': 0,
+        'cube': state['cube'], 'rollups': {}, 'snapshots': list(state['snapshots']), 'previous': {}})
+    return state
+
+
+def test_new_snapshot_is_folded_into_period_sums(versions, monkeypatch):
+    versions['snapshots'] = [snapshot('jan.xlsx', '2025-01-01', '2025-01-03')]
+    versions['cube'] = day_cube([('2025-01-01', 'GROUPES', 5), ('2025-01-02', 'INDIV', 2), ('2025-01-03', 'INDIV', 1)])
+    dataset_PU.get_period_sums(by=('type',), property_id='a')
+
+    # The new export revises 3 January (its group is cancelled) and adds 4 January
+    versions['version'] = 2
+    versions['snapshots'] = versions['snapshots'] + [snapshot('feb.xlsx', '2025-01-03', '2025-01-04')]
+    versions['cube'] = day_cube([('2025-01-01', 'GROUPES', 5), ('2025-01-02', 'INDIV', 2), ('2025-01-04', 'SEMINAIRE', 7)])
+    rebuilt = dataset_PU.build_period_sums(versions['cube'], ('type',))
+    monkeypatch.setattr(dataset_PU, 'build_period_sums', lambda *args: pytest.fail("history re-aggregated"))
+    sums = dataset_PU.get_period_sums(by=('type',), property_id='a')
+
+    assert sums['start'] == rebuilt['start']
+    order = [sums['segments'].index(segment) for segment in rebuilt['segments']]
+    np.testing.assert_allclose(sums['cumsum'][:, :, order], rebuilt['cumsum'])
+
+
+def test_replaced_snapshot_rebuilds_period_sums(versions):
+    versions['snapshots'] = [snapshot('jan.xlsx', '2025-01-01', '2025-01-02')]
+    versions['cube'] = day_cube([('2025-01-01', 'GROUPES', 5)])
+    dataset_PU.get_period_sums(property_id='a')
+
+    versions['version'] = 2
+    versions['snapshots'] = [snapshot('jan_v2.xlsx', '2025-01-01', '2025-01-02')]
+    versions['cube'] = day_cube([('2025-01-02', 'GROUPES', 4)])
+    sums = dataset_PU.get_period_sums(property_id='a')
+    assert sums['start'] == pd.Timestamp('2025-01-02')
+    assert sums['cumsum'][-1, 0, 0] == 4
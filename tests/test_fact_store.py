@@ -0,0 +1,52 @@
+import pandas as pd
+import pytest
+from fetch_data import fact_store_PU
+from fetch_data.fact_store_PU import fact_store_version, query_facts, sync_fact_store
+from fetch_data.schema_PU import apply_schema
+
+
+@pytest.fixture
+def store_path(tmp_path, monkeypatch):
+    path = str(tmp_path / 'facts.sqlite')
+    monkeypatch.setattr(fact_store_PU, 'fact_store_path', lambda property_id=None: path)
+    return path
+
+
+def price_rows():
+    days = pd.to_datetime(['2025-01-01', '2025-01-02', '2025-02-01'])
+    return apply_schema(pd.DataFrame({
+        'day': days,
+        'type': ['GROUPES', 'INDIV', 'GROUPES'],
+        'sous_type': ['A', 'B', 'A'],
+        'n_rooms': [3, 4, 5],
+        'n_customers': [6, 4, 5],
+        'ca_room': [300.0, 400.0, 500.0],
+        'pm': [100.0, 100.0, 100.0],
+        'year': days.year,
+        'month': days.month,
+    }))
+
+
+def test_sync_builds_once_per_version(store_path):
+    rows = price_rows()
+    assert sync_fact_store(rows, 'v1')
+    assert fact_store_version() == 'v1'
+    assert len(query_facts()) == 3
+
+
+def test_query_filters(store_path):
+    sync_fact_store(price_rows(), 'v1')
+    assert query_facts(start='2025-01-02', end='2025-01-31')['n_rooms'].tolist() == [4]
+    assert query_facts(year=2025, month=2)['n_rooms'].tolist() == [5]
+    assert query_facts(types=['GROUPES'])['n_rooms'].tolist() == [3, 5]
+
+
+@pytest.mark.parametrize('filters', [{'year': 2025}, {'start': '2030-01-01'}])
+def test_query_keeps_in_memory_dtypes(store_path, filters):
+    rows = price_rows()
+    sync_fact_store(rows, 'v1')
+    result = query_facts(dtypes=rows.dtypes, **filters)
+
+    # Categoricals and integer widths match, even for an empty result
+    assert result.dtypes.to_dict() == rows.dtypes.to_dict()
+    assert isinstance(result['type'].dtype, pd.CategoricalDtype)
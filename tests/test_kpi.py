@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+import pytest
+from utils.kpi import compute_kpis, kpi_pivot, rooms_available
+
+
+def stays(days, types, rooms, revenue):
+    return pd.DataFrame({
+        'day': pd.to_datetime(days),
+        'type': types,
+        'n_rooms': rooms,
+        'n_customers': rooms,
+        'ca_room': revenue,
+    })
+
+
+def empty_stays():
+    return stays(pd.Series([], dtype='datetime64[ns]'), pd.Series([], dtype=object), [], [])
+
+
+def test_compute_kpis_by_day():
+    frame = stays(['2025-01-01', '2025-01-01', '2025-01-02'], ['A', 'B', 'A'], [10, 5, 7], [1000.0, 500.0, 700.0])
+    kpis = compute_kpis(frame, by=['day'], kpis=('pm', 'occupancy'), capacity=50)
+
+    assert list(kpis['n_rooms']) == [15, 7]
+    assert kpis['pm'].tolist() == pytest.approx([100.0, 100.0])
+    assert kpis['occupancy'].tolist() == pytest.approx([30.0, 14.0])
+
+
+def test_occupancy_uses_capacity_calendar():
+    frame = stays(['2025-01-01', '2025-01-02'], ['A', 'A'], [10, 10], [1000.0, 1000.0])
+    capacity = pd.Series([20, 0], index=pd.date_range('2025-01-01', periods=2))
+    kpis = compute_kpis(frame, by=['day'], kpis=('occupancy',), capacity=capacity, days=capacity.index)
+
+    # A night with no rooms on sale has no occupancy rather than a division error
+    assert kpis['occupancy'].tolist() == pytest.approx([50.0, 0.0])
+
+
+def test_zero_rooms_gives_zero_pm():
+    frame = stays(['2025-01-01'], ['A'], [0], [0.0])
+    assert compute_kpis(frame, kpis=('pm',))['pm'].tolist() == [0.0]
+
+
+@pytest.mark.parametrize('capacity', [70, pd.Series(70, index=pd.date_range('2025-01-01', periods=3))])
+def test_empty_window(capacity):
+    # No stay in the window (e.g. today is after the last stay date)
+    kpis = compute_kpis(empty_stays(), by=['day'], kpis=('pm', 'occupancy'), capacity=capacity)
+    assert kpis.empty
+    assert {'pm', 'occupancy'} <= set(kpis.columns)
+
+    segments, totals = kpi_pivot(empty_stays(), ['day'], segment='type', kpis=('pm', 'occupancy'), capacity=capacity)
+    assert segments.empty and totals.empty
+
+
+def test_rooms_available_without_nights():
+    groups = pd.DataFrame({'day': pd.to_datetime(['2025-01-01', '2025-01-02'])})
+    assert rooms_available(groups, ['day'], pd.DatetimeIndex([]), 70).tolist() == [0.0, 0.0]
+    assert rooms_available(groups, ['day'], None, 70).tolist() == [0.0, 0.0]
+
+
+def test_kpi_pivot_total_row():
+    frame = stays(['2025-01-01', '2025-01-01', '2025-01-02'], ['A', 'B', 'A'], [10, 5, 7], [1000.0, 600.0, 700.0])
+    segments, totals = kpi_pivot(frame, ['day'], segment='type', capacity=10,
+                                 days=pd.date_range('2025-01-01', periods=2), total_row='Total')
+
+    assert segments.loc['Total', ('n_rooms', 'A')] == 17
+    assert totals['n_rooms'].tolist() == [15, 7, 22]
+    assert totals['occupancy'].tolist() == pytest.approx([150.0, 70.0, 110.0])
+    assert np.isclose(totals['pm'].iloc[-1], 2300.0 / 22)
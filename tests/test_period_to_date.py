@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+from utils.period_to_date import build_period_sums, period_bounds, period_to_date, range_sums, update_period_sums
+
+# One room a day at 100 for each segment over 2024 and 2025
+days = pd.date_range('2024-01-01', '2025-12-31', freq='D')
+daily = pd.DataFrame({
+    'day': np.tile(days, 2),
+    'type': ['GROUPES'] * len(days) + ['INDIV'] * len(days),
+    'n_rooms': 1.0,
+    'ca_room': 100.0,
+})
+
+
+def test_period_bounds():
+    starts, ends = period_bounds('2025-03-14')
+    assert starts.strftime('%Y-%m-%d').tolist() == ['2025-03-01', '2025-01-01', '2024-03-15']
+    assert (ends == pd.Timestamp('2025-03-14')).all()
+
+
+def test_range_sums_match_direct_sums():
+    sums = build_period_sums(daily, by=('type',))
+    values = range_sums(sums, pd.to_datetime(['2024-02-10', '2023-12-01']), pd.to_datetime(['2024-03-09', '2024-01-05']))
+    # 29 days of 2024, and only the 5 days of the range inside the grid
+    assert values[:, 0, :].tolist() == [[29, 29], [5, 5]]
+
+
+def test_period_to_date_against_last_year():
+    result = period_to_date(build_period_sums(daily), '2025-03-14', align='date')
+    assert result['period'].tolist() == ['mtd', 'ytd', 'r12']
+    # Both segments add up
+    assert result['n_rooms'].tolist() == [28, 146, 730]
+    # Last year's rolling 12 months start on 15 March 2023, before the data
+    assert result['n_rooms_ly'].tolist() == [28, 148, 148]
+    assert result['pm'].tolist() == [100, 100, 100]
+    assert np.isclose(result.loc[1, 'n_rooms_change'], (146 - 148) / 148 * 100)
+
+
+def test_update_matches_rebuild():
+    old = daily[daily['day'] < '2025-06-01']
+    revised = daily[daily['day'] >= '2025-05-20'].copy()
+    # Revised days, a segment the grid does not have yet and a day before it
+    revised.loc[revised['day'] == '2025-05-25', ['type', 'n_rooms']] = ['SEMINAIRE', 3.0]
+    earlier = pd.DataFrame({'day': [pd.Timestamp('2023-12-31')], 'type': ['INDIV'], 'n_rooms': [2.0], 'ca_room': [150.0]})
+    revised = pd.concat([revised, earlier], ignore_index=True)
+
+    updated = update_period_sums(build_period_sums(old, by=('type',)), revised)
+    rebuilt = build_period_sums(pd.concat([old[old['day'] < '2025-05-20'], revised]), by=('type',))
+
+    assert updated['start'] == rebuilt['start']
+    order = [updated['segments'].index(segment) for segment in rebuilt['segments']]
+    np.testing.assert_allclose(updated['cumsum'][:, :, order], rebuilt['cumsum'])
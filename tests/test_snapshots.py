@@ -0,0 +1,53 @@
+import pandas as pd
+from fetch_data.snapshots_PU import on_the_books, pickup
+
+
+def snapshot(file_name, as_of, rows):
+    """Rows of one export as (day, type, sous_type, n_rooms), taken on as_of"""
+    frame = pd.DataFrame(rows, columns=['day', 'type', 'sous_type', 'n_rooms'])
+    frame['day'] = pd.to_datetime(frame['day'])
+    frame['n_customers'] = frame['n_rooms']
+    frame['ca_room'] = frame['n_rooms'] * 100.0
+    frame['Source_File'] = file_name
+    frame['as_of'] = pd.Timestamp(as_of)
+    return frame
+
+
+# The February export only reaches 2 March; the March one reaches 3 March and
+# no longer has the group of 1 March
+layers = pd.concat([
+    snapshot('feb.xlsx', '2025-02-01', [
+        ('2025-03-01', 'GROUPES', 'A', 10),
+        ('2025-03-01', 'INDIV', 'B', 4),
+        ('2025-03-02', 'INDIV', 'B', 6),
+    ]),
+    snapshot('mar.xlsx', '2025-03-01', [
+        ('2025-03-01', 'INDIV', 'B', 5),
+        ('2025-03-02', 'INDIV', 'B', 6),
+        ('2025-03-03', 'INDIV', 'B', 2),
+    ]),
+], ignore_index=True)
+
+
+def test_on_the_books_keeps_latest_snapshot_per_stay_date():
+    books = on_the_books('2025-02-15', layers=layers)
+    assert books['n_rooms'].tolist() == [14, 6]
+    assert (books['as_of'] == pd.Timestamp('2025-02-01')).all()
+
+    books = on_the_books('2025-03-01', layers=layers)
+    assert books['n_rooms'].tolist() == [5, 6, 2]
+
+
+def test_pickup_skips_stay_dates_one_snapshot_does_not_cover():
+    result = pickup('2025-02-01', '2025-03-01', layers=layers)
+    # 3 March is beyond the February horizon: unknown then, not 0 rooms
+    assert result['day'].dt.strftime('%Y-%m-%d').tolist() == ['2025-03-01', '2025-03-02']
+    assert result['n_rooms_pickup'].tolist() == [-9, 0]
+
+
+def test_pickup_counts_missing_groups_of_covered_dates_as_zero():
+    result = pickup('2025-02-01', '2025-03-01', by=['day', 'type'], layers=layers)
+    groups = result.set_index([result['day'].dt.strftime('%Y-%m-%d'), 'type'])
+    assert groups.loc[('2025-03-01', 'GROUPES'), 'n_rooms_to'] == 0
+    assert groups.loc[('2025-03-01', 'GROUPES'), 'n_rooms_pickup'] == -10
+    assert ('2025-03-03', 'INDIV') not in groups.index
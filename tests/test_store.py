@@ -0,0 +1,73 @@
+import pandas as pd
+from fetch_data.cube_PU import build_cube, update_cube
+from fetch_data.store_PU import deduplicate_rows, upsert_rows
+
+
+def snapshot(file_name, rows):
+    """Rows of one snapshot as (day, type, sous_type, n_rooms)"""
+    frame = pd.DataFrame(rows, columns=['day', 'type', 'sous_type', 'n_rooms'])
+    frame['day'] = pd.to_datetime(frame['day'])
+    frame['n_customers'] = frame['n_rooms']
+    frame['ca_room'] = frame['n_rooms'] * 100.0
+    frame['Source_File'] = file_name
+    return frame
+
+
+old = snapshot('old.xlsx', [
+    ('2025-03-01', 'GROUPES', 'A', 10),
+    ('2025-03-01', 'INDIV', 'B', 4),
+    ('2025-03-02', 'INDIV', 'B', 6),
+])
+# The group of 1 March was cancelled: the newer export no longer has its row
+new = snapshot('new.xlsx', [
+    ('2025-03-01', 'INDIV', 'B', 5),
+    ('2025-03-03', 'INDIV', 'B', 2),
+])
+
+
+def rooms_by_key(df):
+    return {(day.strftime('%Y-%m-%d'), t): n for day, t, n in df[['day', 'type', 'n_rooms']].itertuples(index=False)}
+
+
+def test_deduplicate_drops_segment_missing_from_newer_snapshot():
+    rows = deduplicate_rows(pd.concat([old, new], ignore_index=True))
+    assert rooms_by_key(rows) == {
+        ('2025-03-01', 'INDIV'): 5,
+        ('2025-03-02', 'INDIV'): 6,
+        ('2025-03-03', 'INDIV'): 2,
+    }
+
+
+def test_deduplicate_with_ranks_ignores_row_order():
+    rows = deduplicate_rows(pd.concat([new, old], ignore_index=True), ranks={'old.xlsx': 0, 'new.xlsx': 1})
+    assert rooms_by_key(rows) == {
+        ('2025-03-01', 'INDIV'): 5,
+        ('2025-03-02', 'INDIV'): 6,
+        ('2025-03-03', 'INDIV'): 2,
+    }
+
+    # Precedence can make the older snapshot win its dates
+    rows = deduplicate_rows(pd.concat([old, new], ignore_index=True), ranks={'old.xlsx': 1, 'new.xlsx': 0})
+    assert rooms_by_key(rows)[('2025-03-01', 'GROUPES')] == 10
+    assert rooms_by_key(rows)[('2025-03-01', 'INDIV')] == 4
+
+
+def test_deduplicate_keeps_last_duplicate_within_snapshot():
+    rows = snapshot('a.xlsx', [('2025-03-01', 'INDIV', 'B', 1), ('2025-03-01', 'INDIV', 'B', 2)])
+    assert deduplicate_rows(rows)['n_rooms'].tolist() == [2]
+
+
+def test_upsert_replaces_whole_stay_dates():
+    rows = upsert_rows(deduplicate_rows(old), new)
+    assert rooms_by_key(rows) == rooms_by_key(deduplicate_rows(pd.concat([old, new], ignore_index=True)))
+
+
+def test_update_cube_matches_rebuild():
+    cube = update_cube(build_cube(old), new)
+    rebuilt = build_cube(deduplicate_rows(pd.concat([old, new], ignore_index=True)))
+    key = ['day', 'type', 'sous_type']
+    pd.testing.assert_frame_equal(
+        cube.sort_values(key).reset_index(drop=True),
+        rebuilt.sort_values(key).reset_index(drop=True),
+        check_categorical=False,
+    )
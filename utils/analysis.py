@@ -2,48 +2,108 @@ import pandas as pd
 import numpy as np
 import plotly.express as px
 from datetime import timedelta
+from utils.kpi import sum_measures
 
 def calculate_metrics(df):
     """
     Calculate key metrics from the hotel data
     """
     metrics = {}
-    
+
+    # One pass of the KPI engine gives the daily sums; totals and averages derive from them
+    daily = sum_measures(df, by=['day'])
+
     # Basic metrics
-    metrics['total_rooms'] = df['n_rooms'].sum()
-    metrics['total_customers'] = df['n_customers'].sum()
-    metrics['total_revenue'] = df['ca_room'].sum()
+    metrics['total_rooms'] = daily['n_rooms'].sum()
+    metrics['total_customers'] = daily['n_customers'].sum()
+    metrics['total_revenue'] = daily['ca_room'].sum()
     
     # Average metrics
-    metrics['avg_daily_rooms'] = df.groupby('day')['n_rooms'].sum().mean()
-    metrics['avg_daily_revenue'] = df.groupby('day')['ca_room'].sum().mean()
+    metrics['avg_daily_rooms'] = daily['n_rooms'].mean()
+    metrics['avg_daily_revenue'] = daily['ca_room'].mean()
     metrics['avg_room_price'] = df['pm'].mean()
     
     # Occupancy metrics (if we have total rooms available)
     if 'total_rooms_available' in df.columns:
-        metrics['occupancy_rate'] = (df['n_rooms'].sum() / df['total_rooms_available'].sum()) * 100
+        metrics['occupancy_rate'] = (metrics['total_rooms'] / df['total_rooms_available'].sum()) * 100
     
     return metrics
 
+def year_metrics(df, years=None):
+    """
+    Calculate the metrics of calculate_metrics for every year at once
+    """
+    rows = df if years is None else df[df['year'].isin(list(years))]
+    year = rows['year'] if 'year' in rows.columns else pd.to_datetime(rows['day']).dt.year
+
+    # Single grouped pass: daily sums per year, plus what the price average and occupancy need
+    aggregations = {
+        'n_rooms': ('n_rooms', 'sum'),
+        'n_customers': ('n_customers', 'sum'),
+        'ca_room': ('ca_room', 'sum'),
+        'pm_sum': ('pm', 'sum'),
+        'pm_count': ('pm', 'count'),
+    }
+    if 'total_rooms_available' in rows.columns:
+        aggregations['rooms_available'] = ('total_rooms_available', 'sum')
+    daily = rows.groupby([year.rename('year'), 'day'], observed=True).agg(**aggregations)
+
+    # Totals and daily averages of each year come from the (small) daily frame
+    by_year = daily.groupby(level='year')
+    metrics = pd.DataFrame({
+        'total_rooms': by_year['n_rooms'].sum(),
+        'total_customers': by_year['n_customers'].sum(),
+        'total_revenue': by_year['ca_room'].sum(),
+        'avg_daily_rooms': by_year['n_rooms'].mean(),
+        'avg_daily_revenue': by_year['ca_room'].mean(),
+        'avg_room_price': by_year['pm_sum'].sum() / by_year['pm_count'].sum(),
+    })
+    if 'rooms_available' in daily.columns:
+        metrics['occupancy_rate'] = metrics['total_rooms'] / by_year['rooms_available'].sum() * 100
+
+    if years is not None:
+        metrics = metrics.reindex(list(years))
+    return metrics
+
+def compare_years_matrix(df, years=None):
+    """
+    Compare metrics across any number of years
+
+    Returns a dict with 'metrics' (year x metric), and 'change' and
+    'percent_change' indexed by every (from_year, to_year) pair of an earlier
+    and a later year, with one column per metric
+    """
+    metrics = year_metrics(df, years)
+    values = metrics.to_numpy(dtype=float)
+
+    # Every earlier year against every later year, by broadcasting
+    first, second = np.triu_indices(len(metrics), k=1)
+    change = values[second] - values[first]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        percent_change = np.where(values[first] != 0, change / values[first] * 100, np.nan)
+
+    pairs = pd.MultiIndex.from_arrays([metrics.index[first], metrics.index[second]], names=['from_year', 'to_year'])
+    return {
+        'metrics': metrics,
+        'change': pd.DataFrame(change, index=pairs, columns=metrics.columns),
+        'percent_change': pd.DataFrame(percent_change, index=pairs, columns=metrics.columns),
+    }
+
 def compare_years(df, year1, year2):
     """
     Compare metrics between two years
     """
-    df1 = df[df['year'] == year1]
-    df2 = df[df['year'] == year2]
-    
-    metrics1 = calculate_metrics(df1)
-    metrics2 = calculate_metrics(df2)
-    
+    matrix = compare_years_matrix(df, [year1, year2])
+    metrics = matrix['metrics']
+
     comparison = {}
-    for key in metrics1.keys():
-        if key in metrics2:
-            comparison[key] = {
-                year1: metrics1[key],
-                year2: metrics2[key],
-                'change': metrics2[key] - metrics1[key],
-                'percent_change': ((metrics2[key] - metrics1[key]) / metrics1[key] * 100) if metrics1[key] != 0 else np.nan
-            }
+    for key in metrics.columns:
+        comparison[key] = {
+            year1: metrics.loc[year1, key],
+            year2: metrics.loc[year2, key],
+            'change': matrix['change'].loc[(year1, year2), key],
+            'percent_change': matrix['percent_change'].loc[(year1, year2), key]
+        }
     
     return comparison
 
@@ -0,0 +1,300 @@
+import numpy as np
+import pandas as pd
+
+# Budgets start from the rooms and room revenue of the same month of the
+# previous year; revenue grows by the growth rate and rooms are kept. When the
+# previous year has no figures for a month, the average of that month over the
+# years that have them is used instead, and months never seen budget zero.
+budget_columns = ['year', 'month', 'budget_revenue', 'budget_rooms', 'budget_adr']
+
+
+def monthly_history(df, by=()):
+    """
+    Aggregate history to the (year, month, segment) arrays budgets are read from.
+
+    Args:
+        df (pandas.DataFrame): Rows (or month totals) with year, month, n_rooms,
+            ca_room and the segment columns
+        by (tuple, optional): Segment columns (default: totals only)
+
+    Returns:
+        dict: 'years' (sorted array), 'segments' (list of key tuples),
+            'revenue' and 'rooms' arrays of shape (years, 12, segments) and
+            'present' (bool, same shape) marking the months with figures
+    """
+    by = list(by)
+    sums = df.groupby(['year', 'month'] + by, observed=True)[['ca_room', 'n_rooms']].sum().reset_index()
+
+    years = np.sort(sums['year'].unique().astype(int))
+    if by:
+        segments = sorted(set(sums[by].itertuples(index=False, name=None)))
+        positions = {segment: i for i, segment in enumerate(segments)}
+        segment_codes = np.fromiter((positions[key] for key in sums[by].itertuples(index=False, name=None)),
+                                    dtype=np.int64, count=len(sums))
+    else:
+        segments = [()]
+        segment_codes = np.zeros(len(sums), dtype=np.int64)
+
+    shape = (len(years), 12, len(segments))
+    revenue, rooms, present = np.zeros(shape), np.zeros(shape), np.zeros(shape, dtype=bool)
+    cells = (np.searchsorted(years, sums['year'].to_numpy(dtype=int)), sums['month'].to_numpy(dtype=int) - 1, segment_codes)
+    revenue[cells] = sums['ca_room'].to_numpy(dtype=float)
+    rooms[cells] = sums['n_rooms'].to_numpy(dtype=float)
+    present[cells] = True
+    return {'years': years, 'segments': segments, 'by': by, 'revenue': revenue, 'rooms': rooms, 'present': present}
+
+
+def budget_matrix(df, years, growth_rates=0.05, by=(), history=None):
+    """
+    Budget every month of several years, for several growth rates, at once.
+
+    History is aggregated once; every (growth rate, year, month, segment)
+    cell is then computed with array arithmetic.
+
+    Args:
+        df (pandas.DataFrame): Rows (or month totals) with year, month, n_rooms
+            and ca_room (ignored when history is given)
+        years (int or list): Budget years
+        growth_rates (float or list, optional): Revenue growth rates (default: 0.05)
+        by (tuple, optional): Segment columns budgeted separately (default: totals only)
+        history (dict, optional): Output of monthly_history(), to reuse an aggregate
+
+    Returns:
+        pandas.DataFrame: One row per growth rate, year, month and segment with
+            growth_rate, year, month, the segment columns, budget_revenue,
+            budget_rooms and budget_adr
+    """
+    history = history if history is not None else monthly_history(df, by)
+    targets = np.atleast_1d(np.asarray(years, dtype=int))
+    rates = np.atleast_1d(np.asarray(growth_rates, dtype=float))
+    hist_years = history['years']
+
+    # Previous-year figures of each target year, where that year has them
+    shape = (len(targets),) + history['revenue'].shape[1:]
+    if len(hist_years):
+        prev = np.minimum(np.searchsorted(hist_years, targets - 1), len(hist_years) - 1)
+        has_prev_year = hist_years[prev] == targets - 1
+        prev_present = history['present'][prev] & has_prev_year[:, None, None]
+        prev_revenue, prev_rooms = history['revenue'][prev], history['rooms'][prev]
+    else:
+        prev_present, prev_revenue, prev_rooms = np.zeros(shape, dtype=bool), np.zeros(shape), np.zeros(shape)
+
+    # Fallback: the month's average over the years that have it
+    counts = history['present'].sum(axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        avg_revenue = np.where(counts > 0, history['revenue'].sum(axis=0) / counts, 0.0)
+        avg_rooms = np.where(counts > 0, history['rooms'].sum(axis=0) / counts, 0.0)
+
+    base_revenue = np.where(prev_present, prev_revenue, avg_revenue[None])
+    base_rooms = np.where(prev_present, prev_rooms, avg_rooms[None])
+
+    # (rates, years, months, segments)
+    revenue = base_revenue[None] * (1 + rates[:, None, None, None])
+    rooms = np.broadcast_to(base_rooms[None], revenue.shape)
+    adr = np.divide(revenue, rooms, out=np.zeros_like(revenue), where=rooms > 0)
+
+    grid = np.indices(revenue.shape).reshape(4, -1)
+    budget = pd.DataFrame({
+        'growth_rate': rates[grid[0]],
+        'year': targets[grid[1]],
+        'month': grid[2] + 1,
+    })
+    for i, column in enumerate(history['by']):
+        budget[column] = [history['segments'][code][i] for code in grid[3]]
+    budget['budget_revenue'] = revenue.reshape(-1)
+    # Room nights are whole numbers, as in the budget files
+    budget['budget_rooms'] = np.rint(rooms.reshape(-1)).astype(int)
+    budget['budget_adr'] = adr.reshape(-1)
+    return budget
+
+
+def annual_budget(df, year, growth_rate=0.05):
+    """
+    Budget the twelve months of one year.
+
+    Args:
+        df (pandas.DataFrame): Rows (or month totals) with year, month, n_rooms and ca_room
+        year (int): Budget year
+        growth_rate (float, optional): Revenue growth rate (default: 0.05)
+
+    Returns:
+        pandas.DataFrame: year, month, budget_revenue, budget_rooms and budget_adr
+    """
+    return budget_matrix(df, [year], [growth_rate])[budget_columns]
+
+
+# Scenario simulation draws many budget paths around the deterministic one.
+# Room nights and ADR are shocked separately, month by month, with the spread
+# each calendar month showed around its year's level in the history; every
+# scenario also draws its own growth rate, with the spread of the year-on-year
+# growth on record. Where the history is too short to measure a spread, the
+# defaults below are used.
+default_season_std = 0.08
+default_growth_std = 0.05
+band_percentiles = {'p10': 10, 'p50': 50, 'p90': 90}
+
+
+def _masked_mean(values, mask, axis):
+    """Mean of the masked-in values along an axis (0 where there are none)"""
+    counts = mask.sum(axis=axis, keepdims=True)
+    return np.where(mask, values, 0).sum(axis=axis, keepdims=True) / np.maximum(counts, 1), counts
+
+
+def fit_budget_variance(history):
+    """
+    Measure the spreads scenarios are drawn with from month-level history.
+
+    Each measure is split (in logs) into a year level, a calendar-month
+    seasonality and a residual; the residual spread of each calendar month is
+    the monthly shock. Partial years only contribute the months they have.
+
+    Args:
+        history (dict): Output of monthly_history() (totals only)
+
+    Returns:
+        dict: 'rooms_std' and 'adr_std' (arrays of 12, log spread of each
+            calendar month), 'growth_mean' and 'growth_std' (yearly revenue
+            growth)
+    """
+    revenue = history['revenue'].sum(axis=2)
+    rooms = history['rooms'].sum(axis=2)
+    present = history['present'].any(axis=2) & (rooms > 0) & (revenue > 0)
+    safe_rooms = np.where(present, rooms, 1.0)
+    log_rooms = np.log(safe_rooms)
+    log_adr = np.log(np.where(present, revenue, 1.0) / safe_rooms)
+
+    def season_std(values):
+        # Additive year + month fit, then the residual spread of each month
+        season, counts = _masked_mean(values, present, axis=0)
+        level, _ = _masked_mean(values - season, present, axis=1)
+        residual = np.where(present, values - season - level, 0)
+        std = np.sqrt((residual ** 2).sum(axis=0) / np.maximum(counts[0] - 1, 1))
+        return np.where(counts[0] > 1, std, default_season_std)
+
+    # Growth of each month on the same month one year earlier, averaged per year
+    consecutive = np.diff(history['years']) == 1
+    both = (present[1:] & present[:-1])[consecutive]
+    change = (log_rooms + log_adr)[1:] - (log_rooms + log_adr)[:-1]
+    yearly, counts = _masked_mean(change[consecutive], both, axis=1)
+    yearly = yearly[counts > 0]
+
+    return {
+        'rooms_std': season_std(log_rooms),
+        'adr_std': season_std(log_adr),
+        'growth_mean': float(np.expm1(yearly.mean())) if len(yearly) else 0.0,
+        'growth_std': float(yearly.std(ddof=1)) if len(yearly) > 1 else default_growth_std,
+    }
+
+
+def simulate_budget(df, months=12, scenarios=10000, growth_rate=None, capacity=None,
+                    variable_cost_ratio=0.3, fixed_costs=None, as_of=None, start=None, seed=None, history=None):
+    """
+    Simulate budget scenarios month by month.
+
+    Each month's baseline is the same month of the last year on record (or
+    its average over the years on record), grown by each scenario's growth
+    rate for the time elapsed. Room nights and ADR then get independent
+    monthly shocks fitted with fit_budget_variance(). All scenarios are drawn
+    at once as (scenarios, months) arrays.
+
+    Args:
+        df (pandas.DataFrame): Month totals with year, month, n_rooms, ca_room
+            (and last_day; ignored when history and start are given)
+        months (int, optional): Months simulated (default: 12)
+        scenarios (int, optional): Scenarios drawn (default: 10000)
+        growth_rate (float, optional): Mean yearly revenue growth (default: the
+            growth on record)
+        capacity (int, optional): Rooms per night; room nights above capacity
+            are capped (default: no cap)
+        variable_cost_ratio (float, optional): Costs proportional to revenue
+            (default: 0.3)
+        fixed_costs (float, optional): Costs per month (default: 45% of the
+            average monthly revenue of the baseline)
+        as_of (date-like, optional): Date the data was taken; months from
+            this one on are still being booked and are left out of the fit
+            and the baseline (default: every month counts)
+        start (date-like, optional): First simulated month (default: the month
+            after as_of, or after the last stay date or month on record)
+        seed (int, optional): Random seed, for reproducible draws
+        history (dict, optional): Output of monthly_history(), to reuse an aggregate
+
+    Returns:
+        dict: 'periods' (PeriodIndex of the months), 'rooms', 'adr', 'revenue'
+            and 'ebitda' arrays of shape (scenarios, months), and 'variance'
+            (the fitted spreads)
+    """
+    if history is None:
+        if as_of is not None:
+            as_of = pd.Timestamp(as_of)
+            df = df[df['year'].astype(int) * 12 + df['month'].astype(int) < as_of.year * 12 + as_of.month]
+        history = monthly_history(df)
+    variance = fit_budget_variance(history)
+    if growth_rate is None:
+        growth_rate = variance['growth_mean']
+
+    if start is None:
+        if as_of is not None:
+            start = pd.Period(as_of, freq='M') + 1
+        elif df is not None and 'last_day' in df.columns:
+            start = pd.Period(df['last_day'].max(), freq='M') + 1
+        elif history['present'].any():
+            # The month after the last one on record
+            year, month = np.argwhere(history['present'].any(axis=2))[-1]
+            start = pd.Period(year=int(history['years'][year]), month=int(month) + 1, freq='M') + 1
+        else:
+            start = pd.Period(pd.Timestamp.today(), freq='M')
+    periods = pd.period_range(pd.Period(start, freq='M'), periods=months, freq='M')
+    month_index = periods.month.to_numpy() - 1
+
+    # Deterministic baseline of the year after the last one on record, no growth
+    last_year = int(history['years'][-1]) if len(history['years']) else periods[0].year - 1
+    baseline = budget_matrix(None, [last_year + 1], [0.0], history=history)
+    base_rooms = baseline['budget_rooms'].to_numpy()[month_index]
+    base_adr = baseline['budget_adr'].to_numpy()[month_index]
+
+    # Years of growth on top of the baseline (the same month of the last year on record)
+    elapsed = np.maximum(periods.year.to_numpy() - last_year, 0)
+
+    rng = np.random.default_rng(seed)
+    growth = rng.normal(np.log1p(growth_rate), variance['growth_std'], size=(scenarios, 1))
+    rooms_shock = rng.standard_normal((scenarios, months)) * variance['rooms_std'][month_index]
+    adr_shock = rng.standard_normal((scenarios, months)) * variance['adr_std'][month_index]
+
+    rooms = base_rooms * np.exp(rooms_shock)
+    if capacity is not None:
+        rooms = np.minimum(rooms, capacity * periods.days_in_month.to_numpy())
+    adr = base_adr * np.exp(adr_shock + growth * elapsed)
+    revenue = rooms * adr
+
+    if fixed_costs is None:
+        fixed_costs = 0.45 * (base_rooms * base_adr).mean() if months else 0.0
+    ebitda = revenue * (1 - variable_cost_ratio) - fixed_costs
+
+    return {'periods': periods, 'rooms': rooms, 'adr': adr, 'revenue': revenue, 'ebitda': ebitda, 'variance': variance}
+
+
+def budget_bands(simulation, measures=('revenue', 'ebitda'), percentiles=None):
+    """
+    Summarise simulated scenarios as percentile bands per month.
+
+    Args:
+        simulation (dict): Output of simulate_budget()
+        measures (tuple, optional): Simulated measures (default: revenue, ebitda)
+        percentiles (dict, optional): {suffix: percentile} (default: P10, P50, P90)
+
+    Returns:
+        pandas.DataFrame: One row per month with year, month, month_name and
+            '<measure>_<suffix>' columns
+    """
+    percentiles = percentiles or band_percentiles
+    periods = simulation['periods']
+    bands = pd.DataFrame({
+        'year': periods.year,
+        'month': periods.month,
+        'month_name': periods.strftime('%B %Y'),
+    })
+    for measure in measures:
+        values = np.percentile(simulation[measure], list(percentiles.values()), axis=0)
+        for suffix, row in zip(percentiles, values):
+            bands[f'{measure}_{suffix}'] = row
+    return bands
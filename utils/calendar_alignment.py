@@ -0,0 +1,112 @@
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+from utils.holidays import french_holidays
+
+# Ways of finding the comparable date of a stay date k years earlier:
+#   'weekday' - same weekday, nearest to the same calendar date (364 days back
+#               for the previous year, re-anchored on the calendar every year
+#               so it never drifts by more than 3 days)
+#   'date'    - same calendar date (29 February compares to 28 February)
+#   'holiday' - like 'weekday', except that public holidays and moving feasts
+#               compare to the same holiday of the earlier year
+alignment_modes = ("weekday", "date", "holiday")
+
+
+def _same_date(days, years_back):
+    """Same calendar date years_back years earlier, clipped to the month's length"""
+    year = days.year - years_back
+    month_start = pd.to_datetime(pd.DataFrame({"year": year, "month": days.month, "day": 1}))
+    day = np.minimum(days.day, month_start.dt.days_in_month)
+    return pd.DatetimeIndex(month_start + pd.to_timedelta(day - 1, unit="D"))
+
+
+def _nearest_weekday(days, anchors):
+    """Move each anchor to the nearest date with the weekday of the matching day"""
+    shift = (np.asarray(days.weekday) - np.asarray(anchors.weekday) + 3) % 7 - 3
+    return anchors + pd.to_timedelta(shift, unit="D")
+
+
+@lru_cache(maxsize=32)
+def _alignment_table(first_year, last_year, years_back, mode):
+    """Comparable dates of every day of whole years, cached for the life of the process"""
+    days = pd.date_range(f"{first_year}-01-01", f"{last_year}-12-31", freq="D")
+    table = pd.DataFrame(index=days)
+
+    if mode == "holiday":
+        holidays = french_holidays(f"{first_year - years_back}-01-01", f"{last_year}-12-31", include_feasts=True)
+        by_name_year = holidays.set_index(["name", "year"])["day"]
+        on_day = holidays.drop_duplicates("day").set_index("day")["name"]
+
+    for k in range(1, years_back + 1):
+        same = _same_date(days, k)
+        if mode == "date":
+            aligned = same
+        else:
+            aligned = _nearest_weekday(days, same)
+
+        if mode == "holiday":
+            # Holidays take the date of the same holiday k years earlier
+            names = on_day.reindex(days)
+            is_holiday = names.notna().to_numpy()
+            keys = pd.MultiIndex.from_arrays([names[is_holiday].to_numpy(), days.year[is_holiday] - k])
+            targets = by_name_year.reindex(keys).to_numpy()
+            aligned = aligned.to_numpy().copy()
+            aligned[is_holiday] = np.where(pd.isna(targets), aligned[is_holiday], targets)
+            aligned = pd.DatetimeIndex(aligned)
+
+        table[k] = aligned
+
+    return table
+
+
+def align_dates(dates, years_back=1, mode="weekday"):
+    """
+    Map dates to their comparable dates in one or more earlier years.
+
+    The alignment of whole years is computed once and cached; each call is a
+    single vectorized lookup by date position.
+
+    Args:
+        dates (array-like): Dates to align (datetime-like, NaT allowed)
+        years_back (int, optional): Number of earlier years (default: 1)
+        mode (str, optional): 'weekday', 'date' or 'holiday' (default: 'weekday')
+
+    Returns:
+        pandas.DataFrame: One row per input date (same index when a Series is
+            given) and one column per year back (1..years_back)
+    """
+    if mode not in alignment_modes:
+        raise ValueError(f"Unknown alignment mode: {mode}")
+
+    index = dates.index if isinstance(dates, pd.Series) else None
+    days = pd.to_datetime(pd.Series(np.asarray(dates), index=index), errors="coerce").dt.normalize()
+    valid = days.notna().to_numpy()
+    columns = list(range(1, years_back + 1))
+
+    if not valid.any():
+        return pd.DataFrame(pd.NaT, index=days.index, columns=columns, dtype="datetime64[ns]")
+
+    table = _alignment_table(days[valid].min().year, days[valid].max().year, years_back, mode)
+    first_day = table.index[0]
+    offsets = days.fillna(first_day).to_numpy(dtype="datetime64[ns]") - first_day.to_datetime64()
+    positions = (offsets // np.timedelta64(1, "D")).astype(np.int64)
+
+    aligned = pd.DataFrame(table.to_numpy()[positions], index=days.index, columns=columns)
+    if not valid.all():
+        aligned[~valid] = pd.NaT
+    return aligned.astype("datetime64[ns]")
+
+
+def previous_year_dates(dates, mode="weekday"):
+    """
+    Return the comparable date of each date in the previous year.
+
+    Args:
+        dates (array-like): Dates to align
+        mode (str, optional): 'weekday', 'date' or 'holiday' (default: 'weekday')
+
+    Returns:
+        pandas.Series: Comparable dates (same index when a Series is given)
+    """
+    return align_dates(dates, 1, mode)[1]
@@ -0,0 +1,88 @@
+import calendar
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+
+# Order used for the month and weekday categoricals
+month_order = list(calendar.month_name)[1:]
+weekday_order = list(calendar.day_name)
+
+
+@lru_cache(maxsize=32)
+def _calendar_for_years(first_year, last_year):
+    """Build the calendar of whole years, so nearby ranges share one cached table"""
+    days = pd.date_range(f"{first_year}-01-01", f"{last_year}-12-31", freq="D")
+    iso = days.isocalendar()
+
+    cal = pd.DataFrame(index=days)
+    cal.index.name = "day"
+    cal["year"] = days.year.astype("int16")
+    cal["month"] = days.month.astype("int8")
+    cal["month_name"] = pd.Categorical(days.month_name(), categories=month_order, ordered=True)
+    cal["year_month"] = pd.Categorical(days.strftime("%Y-%m"))
+    cal["iso_year"] = iso["year"].to_numpy().astype("int16")
+    cal["iso_week"] = iso["week"].to_numpy().astype("int8")
+    cal["weekday"] = days.weekday.astype("int8")
+    cal["day_of_week"] = pd.Categorical(days.day_name(), categories=weekday_order, ordered=True)
+    cal["days_in_month"] = days.days_in_month.astype("int8")
+    cal["day_label"] = days.strftime("%A, %B %d")
+    cal["formatted_day"] = cal["day_label"].str.replace(" 0", " ")  # 'Wednesday, January 1'
+    return cal
+
+
+def get_calendar(start, end):
+    """
+    Return the calendar dimension covering a date range.
+
+    The table is generated once per range of whole years and cached for the
+    life of the process; callers must not modify it.
+
+    Args:
+        start (date-like): First date to cover
+        end (date-like): Last date to cover
+
+    Returns:
+        pandas.DataFrame: One row per date (index 'day') with year, month,
+            month_name, year_month, iso_year, iso_week, weekday, day_of_week,
+            days_in_month, day_label and formatted_day
+    """
+    return _calendar_for_years(pd.Timestamp(start).year, pd.Timestamp(end).year)
+
+
+def join_calendar(df, columns, on="day"):
+    """
+    Add calendar attributes to a frame by looking its dates up in the calendar.
+
+    Each date is turned into a row position of the calendar, so the lookup is a
+    single vectorized take instead of per-row date parsing and formatting.
+
+    Args:
+        df (pandas.DataFrame): Frame with a date column
+        columns (dict or list): Calendar columns to add, as {new_name: calendar_column}
+            or a list of calendar column names
+        on (str, optional): Name of the date column (default: 'day')
+
+    Returns:
+        pandas.DataFrame: df with the calendar columns added (modified in place)
+    """
+    if not isinstance(columns, dict):
+        columns = {column: column for column in columns}
+
+    days = pd.to_datetime(df[on], errors="coerce")
+    valid = days.notna().to_numpy()
+
+    if not valid.any():
+        for target in columns:
+            df[target] = pd.Series(np.nan, index=df.index)
+        return df
+
+    cal = get_calendar(days[valid].min(), days[valid].max())
+    offsets = days.to_numpy(dtype="datetime64[ns]") - cal.index[0].to_datetime64()
+    positions = np.where(valid, offsets // np.timedelta64(1, "D"), 0).astype(np.int64)
+
+    for target, source in columns.items():
+        values = cal[source].iloc[positions].set_axis(df.index)
+        # Dates that could not be parsed get missing attributes
+        df[target] = values if valid.all() else values.where(valid)
+
+    return df
@@ -94,91 +94,262 @@ def process_financial_data(df):
     
     return processed_df
 
-def generate_budget_plan(data, forecast_months=12, growth_rate=0.05):
+# Seasonality used for calendar months the history does not cover
+# (hotels: higher revenue in summer months, lower in winter)
+default_month_seasonality = {
+    1: 0.8,  # January
+    2: 0.85, # February
+    3: 0.9,  # March
+    4: 1.0,  # April
+    5: 1.05, # May
+    6: 1.15, # June
+    7: 1.25, # July
+    8: 1.25, # August
+    9: 1.1,  # September
+    10: 1.0, # October
+    11: 0.9, # November
+    12: 0.85 # December
+}
+
+# Costs are less affected by seasonality and grow slower than revenue
+cost_seasonality_share = 0.5
+cost_growth_share = 0.8
+
+def _month_ordinals(dates):
+    """Months since year 0 (year * 12 + month - 1) of a datetime Series"""
+    return (dates.dt.year * 12 + dates.dt.month - 1).to_numpy(dtype=np.int64)
+
+def _masked_mean(values, mask, axis):
+    """Mean of the masked-in values along an axis (0 where there are none)"""
+    counts = mask.sum(axis=axis, keepdims=True)
+    return np.where(mask, values, 0).sum(axis=axis, keepdims=True) / np.maximum(counts, 1)
+
+def estimate_seasonality(data, value='revenue', by=None, weekday=False):
     """
-    Generate a budget plan based on historical financial data
+    Estimate seasonality indices from historical data
+    
+    Monthly totals are split (in logs) into a level per year and an effect per
+    calendar month, so partial years and growth do not distort the indices.
+    Calendar months without history fall back to default_month_seasonality.
     
     Parameters:
     -----------
     data : pandas.DataFrame
-        Processed financial data
+        Processed financial data (monthly or daily rows with a date column)
+    value : str
+        Column the seasonality is measured on
+    by : str, optional
+        Segment column (e.g. 'revenue_category'); one set of indices per segment
+    weekday : bool
+        Also estimate weekday indices (needs daily rows; otherwise all 1)
+    
+    Returns:
+    --------
+    dict
+        'segments' (list, [None] without by), 'month' (array of shape
+        (segments, 12), average 1) and 'weekday' (array of shape (segments, 7),
+        Monday first, average 1)
+    """
+    dates = pd.to_datetime(data['date'])
+    if by is not None:
+        codes, segments = pd.factorize(data[by], sort=True)
+        segments = list(segments)
+    else:
+        codes, segments = np.zeros(len(data), dtype=np.int64), [None]
+    ordinals = _month_ordinals(dates)
+    
+    # Monthly totals as a (segments, years, months) array of logs
+    monthly = pd.Series(data[value].to_numpy(dtype=float)).groupby([codes, ordinals]).sum()
+    segment_codes = monthly.index.get_level_values(0).to_numpy()
+    month_ordinals = monthly.index.get_level_values(1).to_numpy()
+    years, year_codes = np.unique(month_ordinals // 12, return_inverse=True)
+    
+    shape = (len(segments), len(years), 12)
+    present = np.zeros(shape, dtype=bool)
+    logs = np.zeros(shape)
+    cells = (segment_codes, year_codes, month_ordinals % 12)
+    present[cells] = monthly.to_numpy() > 0
+    logs[cells] = np.log(np.where(monthly.to_numpy() > 0, monthly.to_numpy(), 1.0))
+    
+    # Alternate between year levels and month effects
+    effect = np.zeros((len(segments), 1, 12))
+    for _ in range(3):
+        level = _masked_mean(logs - effect, present, axis=2)
+        effect = _masked_mean(logs - level, present, axis=1)
+    covered = present.any(axis=1, keepdims=True)
+    effect = effect - _masked_mean(effect, covered, axis=2)
+    
+    defaults = np.array([default_month_seasonality[month] for month in range(1, 13)])
+    month_index = np.where(covered, np.exp(effect), defaults)[:, 0, :]
+    month_index = month_index / month_index.mean(axis=1, keepdims=True)
+    
+    # Weekday effects relative to each month's level (only with daily rows)
+    weekday_index = np.ones((len(segments), 7))
+    if weekday:
+        daily = pd.Series(data[value].to_numpy(dtype=float)).groupby([codes, dates.dt.normalize().to_numpy()]).sum()
+        daily = daily[daily > 0]
+        days = pd.DatetimeIndex(daily.index.get_level_values(1))
+        day_months = days.year * 12 + days.month - 1
+        if len(daily) and pd.Series(days).groupby(day_months).nunique().median() >= 7:
+            day_segments = daily.index.get_level_values(0).to_numpy()
+            deviation = np.log(daily.to_numpy())
+            deviation = deviation - pd.Series(deviation).groupby([day_segments, day_months]).transform('mean').to_numpy()
+            effects = pd.Series(deviation).groupby([day_segments, days.weekday]).mean()
+            weekday_index[effects.index.get_level_values(0), effects.index.get_level_values(1)] = np.exp(effects.to_numpy())
+            weekday_index = weekday_index / weekday_index.mean(axis=1, keepdims=True)
+    
+    return {'segments': segments, 'month': month_index, 'weekday': weekday_index}
+
+def _weekday_mix(ordinals, weekday_index):
+    """Average weekday index over the days of each month (ordinals: months since year 0)"""
+    first_days = (ordinals - 1970 * 12).astype('datetime64[M]')
+    days_in_month = ((first_days + 1).astype('datetime64[D]') - first_days.astype('datetime64[D]')).astype(np.int64)
+    first_weekday = (first_days.astype('datetime64[D]').astype(np.int64) + 3) % 7
+    
+    # Each weekday occurs 4 times a month, plus once more for the first (days - 28) weekdays
+    offsets = (np.arange(7) - first_weekday[..., None]) % 7
+    counts = 4 + (offsets < (days_in_month - 28)[..., None])
+    return (counts * weekday_index[:, None, :]).sum(axis=-1) / days_in_month
+
+def generate_budget_plans(datasets, forecast_months=12, growth_rate=0.05, seasonality=None, weekday=False, start=None):
+    """
+    Generate budget plans for several datasets (e.g. properties) in one call
+    
+    The datasets are aggregated together and every month of every plan is
+    computed with array arithmetic. Each plan starts from the average of its
+    last 3 monthly totals (or less), seasonality removed. Rows are summed by
+    calendar month first, so daily or per-category rows plan monthly amounts
+    (before, the last 3 rows were averaged whatever period they covered).
+    
+    Parameters:
+    -----------
+    datasets : dict
+        Processed financial data of each plan, keyed by plan name
     forecast_months : int
         Number of months to forecast
-    growth_rate : float
-        Expected growth rate (decimal)
+    growth_rate : float or dict
+        Expected growth rate (decimal), or one per plan name
+    seasonality : dict, optional
+        Output of estimate_seasonality(), either without segments (used for
+        every plan) or by plan name; estimated from each dataset by default
+    weekday : bool
+        Weight each month by its weekday mix (see estimate_seasonality)
+    start : date-like, optional
+        First month of every plan (default: the month after each dataset's
+        last month)
     
     Returns:
     --------
     pandas.DataFrame
-        Budget plan with forecasted values
+        One row per plan and month with plan, date, revenue, cost, ebitda and
+        profit_margin
     """
-    # Sort data by date to ensure chronological order
-    data = data.sort_values('date')
+    names = list(datasets)
+    combined = pd.concat(
+        [pd.DataFrame({'plan': i, 'date': pd.to_datetime(df['date']), 'revenue': df['revenue'], 'cost': df['cost']})
+         for i, df in enumerate(datasets.values())],
+        ignore_index=True
+    )
     
-    # Get the last date in the dataset
-    last_date = data['date'].max()
+    if seasonality is None:
+        seasonality = estimate_seasonality(combined, by='plan', weekday=weekday)
+        seasonality['segments'] = [names[i] for i in seasonality['segments']]
+    if seasonality['segments'] == [None]:
+        positions = np.zeros(len(names), dtype=np.int64)
+    else:
+        positions = np.array([seasonality['segments'].index(name) for name in names])
+    month_index = seasonality['month'][positions]
+    weekday_index = seasonality['weekday'][positions]
     
-    # Create date range for forecast period
-    forecast_dates = pd.date_range(start=last_date + pd.DateOffset(months=1), 
-                                  periods=forecast_months, 
-                                  freq='M')
+    # Monthly totals of every plan, in chronological order
+    monthly = combined.assign(ordinal=_month_ordinals(combined['date'])).groupby(['plan', 'ordinal'])[['revenue', 'cost']].sum().reset_index()
+    plans = monthly['plan'].to_numpy()
+    months = monthly['ordinal'].to_numpy() % 12
     
-    # Calculate average values from the last 3 months (or less if not available)
-    lookback = min(3, len(data))
-    recent_data = data.iloc[-lookback:]
+    # Base level: average of the last 3 months (or less), seasonality removed
+    season = month_index[plans, months]
+    monthly['revenue'] = monthly['revenue'] / season
+    monthly['cost'] = monthly['cost'] / (1 + (season - 1) * cost_seasonality_share)
+    recent = monthly.groupby('plan').tail(3).groupby('plan')
+    base = recent[['revenue', 'cost']].mean().reindex(range(len(names)))
+    last_ordinal = recent['ordinal'].max().reindex(range(len(names))).to_numpy()
     
-    avg_revenue = recent_data['revenue'].mean()
-    avg_cost = recent_data['cost'].mean()
+    if isinstance(growth_rate, dict):
+        growth = np.array([growth_rate[name] for name in names], dtype=float)
+    else:
+        growth = np.full(len(names), growth_rate, dtype=float)
     
-    # Create forecast dataframe
-    forecast_data = pd.DataFrame({
-        'date': forecast_dates,
-        'revenue': [avg_revenue * (1 + growth_rate) ** (i/12) for i in range(forecast_months)],
-        'cost': [avg_cost * (1 + growth_rate * 0.8) ** (i/12) for i in range(forecast_months)],
-    })
+    # (plans, months) arrays
+    steps = np.arange(forecast_months)
+    if start is not None:
+        start = pd.Timestamp(start)
+        first_ordinal = np.full(len(names), start.year * 12 + start.month - 1)
+    else:
+        first_ordinal = last_ordinal + 1
+    ordinals = first_ordinal[:, None] + steps
+    season = month_index[np.arange(len(names))[:, None], ordinals % 12]
+    if weekday:
+        season = season * _weekday_mix(ordinals, weekday_index)
     
-    # Calculate EBITDA and profit margin for forecast
-    forecast_data['ebitda'] = forecast_data['revenue'] - forecast_data['cost']
-    forecast_data['profit_margin'] = forecast_data['ebitda'] / forecast_data['revenue']
-    
-    # Add seasonality effect based on month (for hotels)
-    # Higher revenue in summer months, lower in winter
-    month_seasonality = {
-        1: 0.8,  # January
-        2: 0.85, # February
-        3: 0.9,  # March
-        4: 1.0,  # April
-        5: 1.05, # May
-        6: 1.15, # June
-        7: 1.25, # July
-        8: 1.25, # August
-        9: 1.1,  # September
-        10: 1.0, # October
-        11: 0.9, # November
-        12: 0.85 # December
-    }
-    
-    # Apply seasonality
-    for i, row in forecast_data.iterrows():
-        month = row['date'].month
-        season_factor = month_seasonality.get(month, 1.0)
-        forecast_data.loc[i, 'revenue'] *= season_factor
-        # Costs are less affected by seasonality
-        forecast_data.loc[i, 'cost'] *= (1 + (season_factor - 1) * 0.5)
-        # Recalculate EBITDA and profit margin
-        forecast_data.loc[i, 'ebitda'] = forecast_data.loc[i, 'revenue'] - forecast_data.loc[i, 'cost']
-        forecast_data.loc[i, 'profit_margin'] = forecast_data.loc[i, 'ebitda'] / forecast_data.loc[i, 'revenue']
+    revenue = base['revenue'].to_numpy()[:, None] * (1 + growth[:, None]) ** (steps / 12) * season
+    cost = (base['cost'].to_numpy()[:, None] * (1 + growth[:, None] * cost_growth_share) ** (steps / 12)
+            * (1 + (season - 1) * cost_seasonality_share))
+    ebitda = revenue - cost
+    with np.errstate(divide='ignore', invalid='ignore'):
+        profit_margin = ebitda / revenue
+    
+    # Last day of each forecast month
+    dates = (ordinals - 1970 * 12 + 1).astype('datetime64[M]').astype('datetime64[D]') - np.timedelta64(1, 'D')
     
     # Round values for better readability
-    forecast_data['revenue'] = forecast_data['revenue'].round(2)
-    forecast_data['cost'] = forecast_data['cost'].round(2)
-    forecast_data['ebitda'] = forecast_data['ebitda'].round(2)
-    forecast_data['profit_margin'] = forecast_data['profit_margin'].round(4)
+    return pd.DataFrame({
+        'plan': np.repeat(np.array(names, dtype=object), forecast_months),
+        'date': pd.to_datetime(dates.reshape(-1)),
+        'revenue': revenue.reshape(-1).round(2),
+        'cost': cost.reshape(-1).round(2),
+        'ebitda': ebitda.reshape(-1).round(2),
+        'profit_margin': profit_margin.reshape(-1).round(4),
+    })
+
+def generate_budget_plan(data, forecast_months=12, growth_rate=0.05, seasonality=None, by=None, weekday=False):
+    """
+    Generate a budget plan based on historical financial data
+    
+    The plan starts from the average of the last 3 monthly totals (rows of
+    the same month are summed first, see generate_budget_plans).
     
-    # Combine historical and forecast data if needed
-    # budget_plan = pd.concat([data, forecast_data], ignore_index=True)
+    Parameters:
+    -----------
+    data : pandas.DataFrame
+        Processed financial data
+    forecast_months : int
+        Number of months to forecast
+    growth_rate : float
+        Expected growth rate (decimal)
+    seasonality : dict, optional
+        Output of estimate_seasonality() (default: estimated from data)
+    by : str, optional
+        Segment column (e.g. 'revenue_category'); plans each segment
+        separately, all over the months after the frame's last month
+    weekday : bool
+        Weight each month by its weekday mix (needs daily rows)
+    
+    Returns:
+    --------
+    pandas.DataFrame
+        Budget plan with forecasted values
+    """
+    if by is not None:
+        datasets = {segment: rows for segment, rows in data.groupby(by, sort=True)}
+        if seasonality is None:
+            seasonality = estimate_seasonality(data, by=by, weekday=weekday)
+        # Every segment is planned over the same months, after the frame's last month
+        start = pd.to_datetime(data['date']).max() + pd.offsets.MonthBegin(1)
+        return generate_budget_plans(datasets, forecast_months, growth_rate, seasonality, weekday,
+                                     start=start).rename(columns={'plan': by})
     
-    return forecast_data
+    plan = generate_budget_plans({'plan': data}, forecast_months, growth_rate, seasonality, weekday)
+    return plan.drop(columns='plan')
 
 def generate_hotel_kpis(data):
     """
@@ -0,0 +1,157 @@
+import os
+import json
+from functools import lru_cache
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from utils.holidays import french_holidays
+
+# School vacations and local events (trade fairs, sports, ...) are listed in
+# data/events.json for as many years as needed; public holidays are generated.
+# Each kind has a fixed label, except events which are labelled by name.
+project_root = Path(__file__).parent.parent
+events_path = os.path.join(project_root, 'data', 'events.json')
+
+# Kinds in increasing precedence: an event wins over a holiday, which wins over
+# a vacation, when they cover the same day
+event_kinds = ['vacation', 'holiday', 'event']
+kind_labels = {'vacation': 'Vacation', 'holiday': 'Holiday'}
+
+calendar_columns = ['start', 'end', 'kind', 'name', 'label', 'impact']
+
+
+@lru_cache(maxsize=8)
+def _read_events(path, mtime):
+    """Parse the events file, cached until it changes on disk"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        data = {}
+
+    rows = []
+    for kind, key in (('vacation', 'vacations'), ('event', 'events')):
+        for entry in data.get(key, []):
+            rows.append({
+                'start': entry['start'],
+                'end': entry.get('end', entry['start']),
+                'kind': kind,
+                'name': entry.get('name', kind_labels.get(kind, '')),
+                'impact': entry.get('impact'),
+            })
+
+    events = pd.DataFrame(rows, columns=['start', 'end', 'kind', 'name', 'impact'])
+    events['start'] = pd.to_datetime(events['start'])
+    events['end'] = pd.to_datetime(events['end'])
+    events['impact'] = pd.to_numeric(events['impact']).astype(float)
+    return events
+
+
+def load_events(path=None):
+    """
+    Load the vacations and events of the events file.
+
+    Args:
+        path (str, optional): Events file (default: data/events.json)
+
+    Returns:
+        pandas.DataFrame: One row per entry with start, end (inclusive), kind,
+            name and impact; empty if the file is missing
+    """
+    path = path or events_path
+    mtime = os.path.getmtime(path) if os.path.exists(path) else None
+    return _read_events(path, mtime).copy()
+
+
+def event_calendar(start, end, path=None):
+    """
+    Build the event calendar between two dates: the entries of the events file
+    plus the French public holidays of every year covered.
+
+    Args:
+        start (date-like): First date covered
+        end (date-like): Last date covered
+        path (str, optional): Events file (default: data/events.json)
+
+    Returns:
+        pandas.DataFrame: Entries overlapping the range (file entries first,
+            then holidays) with the columns start, end, kind, name, label and
+            impact
+    """
+    start, end = pd.Timestamp(start).normalize(), pd.Timestamp(end).normalize()
+    events = load_events(path)
+
+    holidays = french_holidays(start, end)
+    holidays = pd.DataFrame({
+        'start': holidays['day'],
+        'end': holidays['day'],
+        'kind': 'holiday',
+        'name': holidays['name'],
+        'impact': np.nan,
+    })
+
+    calendar = pd.concat([events, holidays], ignore_index=True)
+    calendar = calendar[(calendar['end'] >= start) & (calendar['start'] <= end)].reset_index(drop=True)
+    calendar['label'] = calendar['kind'].map(kind_labels).fillna(calendar['name'])
+    return calendar[calendar_columns]
+
+
+def _segments(calendar):
+    """
+    Split the calendar into non-overlapping intervals with one winning label.
+
+    Entries are ranked by kind precedence then position, so the last entry of
+    the highest kind wins; every entry raises the rank of the segments it
+    spans in one vectorized scatter.
+    """
+    kind_order = calendar['kind'].map({kind: i for i, kind in enumerate(event_kinds)}).to_numpy()
+    order = np.lexsort((np.arange(len(calendar)), kind_order))
+    ranked = calendar.iloc[order]
+
+    starts = ranked['start'].to_numpy(dtype='datetime64[ns]')
+    stops = ranked['end'].to_numpy(dtype='datetime64[ns]') + np.timedelta64(1, 'D')
+    breaks = np.unique(np.concatenate([starts, stops]))
+
+    first = np.searchsorted(breaks, starts)
+    lengths = np.searchsorted(breaks, stops) - first
+
+    # Segment indices of every entry, with the entry's rank (1-based)
+    segment_ids = np.repeat(first - np.cumsum(np.r_[0, lengths[:-1]]), lengths) + np.arange(lengths.sum())
+    best = np.zeros(len(breaks) - 1, dtype=np.int64)
+    np.maximum.at(best, segment_ids, np.repeat(np.arange(1, len(ranked) + 1), lengths))
+
+    labels = np.r_[[None], ranked['label'].to_numpy(dtype=object)][best]
+    return pd.IntervalIndex.from_breaks(breaks, closed='left'), labels
+
+
+def label_dates(dates, calendar=None, default=""):
+    """
+    Label dates with the vacation, holiday or event covering them.
+
+    The calendar is flattened once into non-overlapping intervals, so labelling
+    is a single interval lookup however many entries and dates there are.
+
+    Args:
+        dates (array-like): Dates to label
+        calendar (pandas.DataFrame, optional): Event calendar (default: the
+            calendar of the dates' range, see event_calendar())
+        default (str, optional): Label of dates no entry covers (default: '')
+
+    Returns:
+        pandas.Series: Labels (same index when a Series is given)
+    """
+    index = dates.index if isinstance(dates, pd.Series) else None
+    days = pd.to_datetime(pd.Series(np.asarray(dates), index=index)).astype('datetime64[ns]')
+    labels = pd.Series(default, index=days.index, dtype=object)
+
+    if days.notna().any() and calendar is None:
+        calendar = event_calendar(days.min(), days.max())
+    if calendar is None or calendar.empty:
+        return labels
+
+    intervals, segment_labels = _segments(calendar)
+    positions = intervals.get_indexer(days)
+    found = positions >= 0
+    found[found] = pd.notna(segment_labels[positions[found]])
+    labels[found] = segment_labels[positions[found]]
+    return labels
@@ -0,0 +1,91 @@
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+
+# French public holidays on a fixed date, as (month, day, name)
+fixed_holidays = [
+    (1, 1, "New Year's Day"),
+    (5, 1, "Labour Day"),
+    (5, 8, "Victory Day"),
+    (7, 14, "Bastille Day"),
+    (8, 15, "Assumption Day"),
+    (11, 1, "All Saints' Day"),
+    (11, 11, "Armistice Day"),
+    (12, 25, "Christmas Day"),
+]
+
+# Moving feasts, as days after Easter Sunday; the Sundays are not public
+# holidays but move demand the same way
+moving_holidays = [
+    (1, "Easter Monday", True),
+    (39, "Ascension Day", True),
+    (50, "Whit Monday", True),
+    (0, "Easter Sunday", False),
+    (49, "Whit Sunday", False),
+]
+
+
+def easter_sunday(years):
+    """
+    Compute the date of Easter Sunday (Gregorian calendar) for several years.
+
+    Uses the anonymous Gregorian algorithm on integer arrays, so any number of
+    years is computed at once.
+
+    Args:
+        years (array-like): Years
+
+    Returns:
+        pandas.DatetimeIndex: Easter Sunday of each year
+    """
+    y = np.asarray(years, dtype=np.int64)
+    a = y % 19
+    b, c = y // 100, y % 100
+    d, e = b // 4, b % 4
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = c // 4, c % 4
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month = (h + l - 7 * m + 114) // 31
+    day = (h + l - 7 * m + 114) % 31 + 1
+    return pd.to_datetime(pd.DataFrame({"year": y, "month": month, "day": day}))
+
+
+@lru_cache(maxsize=32)
+def _holidays_for_years(first_year, last_year, include_feasts):
+    """Build the holiday table of whole years, cached for the life of the process"""
+    years = np.arange(first_year, last_year + 1)
+    frames = []
+
+    for month, day, name in fixed_holidays:
+        days = pd.to_datetime(pd.DataFrame({"year": years, "month": month, "day": day}))
+        frames.append(pd.DataFrame({"day": days, "name": name, "public": True}))
+
+    easter = easter_sunday(years)
+    for offset, name, public in moving_holidays:
+        if public or include_feasts:
+            frames.append(pd.DataFrame({"day": easter + pd.Timedelta(days=offset), "name": name, "public": public}))
+
+    holidays = pd.concat(frames, ignore_index=True).sort_values("day", kind="stable").reset_index(drop=True)
+    holidays["year"] = holidays["day"].dt.year
+    return holidays
+
+
+def french_holidays(start, end, include_feasts=False):
+    """
+    Return the French public holidays (and optionally Easter and Whit Sunday)
+    between two dates.
+
+    Args:
+        start (date-like): First date covered
+        end (date-like): Last date covered
+        include_feasts (bool, optional): Also return the moving Sundays (default: False)
+
+    Returns:
+        pandas.DataFrame: Columns day, name, public (bool) and year, sorted by day
+    """
+    start, end = pd.Timestamp(start), pd.Timestamp(end)
+    holidays = _holidays_for_years(start.year, end.year, include_feasts)
+    return holidays[(holidays["day"] >= start) & (holidays["day"] <= end)].reset_index(drop=True)
@@ -0,0 +1,263 @@
+import numpy as np
+import pandas as pd
+from utils.calendar_dimension import get_calendar, join_calendar
+
+# Measures summed in the single groupby pass
+base_measures = ['n_rooms', 'n_customers', 'ca_room']
+
+# Every KPI is declared once as (numerator, denominator, scale) over the summed
+# measures. Two denominators are derived after the pass:
+#   'rooms_available' - capacity x calendar nights of the group's period
+#   'period_rooms'    - rooms of all segments of the same period (for the mix)
+# A KPI with no denominator is the sum itself; a zero denominator gives 0.
+kpi_definitions = {
+    'rooms': ('n_rooms', None, 1),
+    'customers': ('n_customers', None, 1),
+    'revenue': ('ca_room', None, 1),
+    'pm': ('ca_room', 'n_rooms', 1),  # average price per room night (ADR)
+    'adr': ('ca_room', 'n_rooms', 1),
+    'occupancy': ('n_rooms', 'rooms_available', 100),
+    'revpar': ('ca_room', 'rooms_available', 1),
+    'customers_per_room': ('n_customers', 'n_rooms', 1),
+    'mix': ('n_rooms', 'period_rooms', 100),
+}
+
+default_kpis = ('rooms', 'revenue', 'pm', 'occupancy')
+
+# Grouping keys that are calendar attributes, as {key: calendar column}; any
+# other column of the calendar dimension can be used under its own name
+calendar_aliases = {'week': 'iso_week'}
+
+
+def _calendar_keys(by):
+    """Split grouping keys into {key: calendar column} and segment keys"""
+    calendar_columns = set(get_calendar('2000-01-01', '2000-12-31').columns)
+    calendar, segments = {}, []
+    for key in by:
+        column = calendar_aliases.get(key, key)
+        if key == 'day':
+            calendar[key] = None
+        elif column in calendar_columns:
+            calendar[key] = column
+        else:
+            segments.append(key)
+    return calendar, segments
+
+
+def _lookup(table, frame, keys):
+    """Values of a table indexed by keys, for each row of a frame"""
+    index = pd.MultiIndex.from_frame(frame[keys]) if len(keys) > 1 else pd.Index(frame[keys[0]])
+    return table.reindex(index).to_numpy()
+
+
+def rooms_available(groups, by, days, capacity):
+    """
+    Sum the rooms on sale over the nights of each group's period.
+
+    Args:
+        groups (pandas.DataFrame): One row per group with the grouping keys
+        by (list): Grouping keys; only the calendar ones select nights
+        days (array-like): Nights counted
+        capacity (int, float or pandas.Series): Rooms per night, either
+            constant or indexed by day (e.g. a capacity calendar)
+
+    Returns:
+        numpy.ndarray: Rooms available of each group
+    """
+    calendar, _ = _calendar_keys(by)
+    nights = pd.DataFrame({'day': pd.DatetimeIndex(days if days is not None else [])})
+    if nights.empty:
+        # No nights, no rooms on sale
+        return np.zeros(len(groups), dtype=float)
+    join_calendar(nights, {key: column for key, column in calendar.items() if column is not None})
+    if isinstance(capacity, pd.Series):
+        # Nights the calendar does not cover have no rooms on sale
+        nights['capacity'] = capacity.reindex(nights['day']).fillna(0).to_numpy(dtype=float)
+    else:
+        nights['capacity'] = capacity
+
+    keys = list(calendar)
+    if not keys:
+        return np.full(len(groups), nights['capacity'].sum(), dtype=float)
+
+    available = nights.groupby(keys, observed=True)['capacity'].sum()
+    return np.nan_to_num(_lookup(available, groups, keys).astype(float))
+
+
+def _default_days(frame, days):
+    """Nights capacity is counted over: the whole years the frame covers (none for an empty frame)"""
+    if days is not None:
+        return days
+    if not len(frame):
+        return pd.DatetimeIndex([])
+    years = pd.to_datetime(frame['day']).dt.year if 'day' in frame.columns else frame['year']
+    return pd.date_range(f"{int(years.min())}-01-01", f"{int(years.max())}-12-31", freq='D')
+
+
+def sum_measures(frame, by=()):
+    """
+    Sum the base measures of stay-date rows by the grouping keys.
+
+    This is the single pass over the rows; calendar keys missing from the
+    frame are looked up in the calendar dimension first.
+
+    Args:
+        frame (pandas.DataFrame): Rows with a 'day' column and the base measures
+        by (list, optional): Grouping keys (see compute_kpis)
+
+    Returns:
+        pandas.DataFrame: One row per group with the keys and the summed measures
+    """
+    by = list(by)
+    calendar, segments = _calendar_keys(by)
+    measures = [measure for measure in base_measures if measure in frame.columns]
+
+    rows = frame
+    missing = {key: column for key, column in calendar.items() if column is not None and key not in frame.columns}
+    if missing:
+        rows = join_calendar(frame[['day'] + segments + measures].copy(), missing)
+
+    if not by:
+        return rows[measures].sum().to_frame().T
+    return rows.groupby(by, observed=True, sort=True)[measures].sum().reset_index()
+
+
+def evaluate_kpis(sums, kpis):
+    """
+    Compute KPIs from summed measures.
+
+    Args:
+        sums (pandas.DataFrame): Summed measures, plus 'rooms_available' and
+            'period_rooms' when the KPIs need them
+        kpis (list): KPI names (see kpi_definitions)
+
+    Returns:
+        pandas.DataFrame: sums with one column per KPI added
+    """
+    for name in kpis:
+        numerator, denominator, scale = kpi_definitions[name]
+        values = sums[numerator].to_numpy(dtype=float)
+        if denominator is not None:
+            den = sums[denominator].to_numpy(dtype=float)
+            values = np.divide(values, den, out=np.zeros_like(values), where=den != 0)
+        sums[name] = values * scale
+    return sums
+
+
+def derive_kpis(sums, by=(), kpis=default_kpis, capacity=None, days=None, subtotal=None):
+    """
+    Compute KPIs from measures already summed by the grouping keys.
+
+    Args:
+        sums (pandas.DataFrame): Output of sum_measures() for the same keys
+        by, kpis, capacity, days, subtotal: See compute_kpis()
+
+    Returns:
+        pandas.DataFrame: sums with the KPI columns (and subtotal rows) added
+    """
+    by = list(by)
+    calendar, _ = _calendar_keys(by)
+    sums = sums.copy()
+    measures = [measure for measure in base_measures if measure in sums.columns]
+    needs = {kpi_definitions[name][1] for name in kpis}
+
+    # Denominators derived from the groups themselves
+    derived = []
+    if 'rooms_available' in needs:
+        if capacity is None:
+            raise ValueError("capacity is required for occupancy and revpar")
+        sums['rooms_available'] = rooms_available(sums, by, days, capacity)
+        derived.append('rooms_available')
+    if 'period_rooms' in needs:
+        if calendar:
+            sums['period_rooms'] = sums.groupby(list(calendar), observed=True)['n_rooms'].transform('sum')
+        else:
+            sums['period_rooms'] = sums['n_rooms'].sum()
+        derived.append('period_rooms')
+
+    if subtotal is not None and by:
+        group_keys, last = by[:-1], by[-1]
+        # A subtotal over periods adds their denominators up; a subtotal over
+        # segments shares the denominators of its period
+        how = 'sum' if last in calendar else 'first'
+        aggregations = {**{measure: 'sum' for measure in measures}, **{column: how for column in derived}}
+        if group_keys:
+            totals = sums.groupby(group_keys, observed=True, sort=False).agg(aggregations).reset_index()
+        else:
+            totals = sums.agg(aggregations).to_frame().T
+        totals[last] = subtotal
+        sums[last] = sums[last].astype(object)
+        sums = pd.concat([sums, totals[sums.columns]], ignore_index=True)
+        if group_keys:
+            sums = sums.sort_values(group_keys, kind='stable').reset_index(drop=True)
+
+    return evaluate_kpis(sums, kpis)
+
+
+def compute_kpis(frame, by=(), kpis=default_kpis, capacity=None, days=None, subtotal=None):
+    """
+    Compute KPIs for any grouping of stay-date rows in a single groupby pass.
+
+    Grouping keys may be stay-date calendar attributes ('day', 'year', 'month',
+    'month_name', 'week', 'weekday', ...), which are looked up in the calendar
+    dimension when the frame lacks them, or segment columns ('type',
+    'sous_type'). Occupancy and RevPAR count the capacity of every night of
+    each period, over the whole years the frame covers unless days is given.
+
+    Args:
+        frame (pandas.DataFrame): Rows with a 'day' column and the base
+            measures, or a cube roll-up that already has the calendar keys
+        by (list, optional): Grouping keys (default: one row for the whole frame)
+        kpis (list, optional): KPI names (default: rooms, revenue, pm, occupancy)
+        capacity (int, float or pandas.Series, optional): Rooms of the property,
+            constant or per night (see capacity_PU.daily_capacity); required
+            by occupancy and revpar
+        days (array-like, optional): Nights the capacity is counted over
+        subtotal (str, optional): If given, a row labelled with it is added
+            for each group of all keys but the last, summing that group
+
+    Returns:
+        pandas.DataFrame: One row per group with the keys, the summed measures
+            and one column per KPI
+    """
+    return derive_kpis(sum_measures(frame, by), by, kpis, capacity, _default_days(frame, days), subtotal)
+
+
+def kpi_pivot(frame, by, segment='type', kpis=('pm', 'occupancy'), capacity=None, days=None,
+              measures=('n_rooms', 'ca_room'), total_row=None):
+    """
+    Lay the segments out as columns next to the all-segment KPIs of each period.
+
+    One groupby pass sums the measures by period and segment; the period
+    totals the KPIs use are added up from those sums.
+
+    Args:
+        frame (pandas.DataFrame): Rows with the period keys (or a 'day' column),
+            the segment column and the base measures
+        by (list): Period keys of the rows (see compute_kpis)
+        segment (str, optional): Segment column laid out as columns (default: 'type')
+        kpis (list, optional): KPIs computed on the totals (default: pm, occupancy)
+        capacity (int, float or pandas.Series, optional): Rooms of the property
+        days (array-like, optional): Nights the capacity is counted over
+        measures (tuple, optional): Measures laid out per segment (default: n_rooms, ca_room)
+        total_row (str, optional): If given, a row with this label sums all
+            periods (single period key only)
+
+    Returns:
+        tuple: (segments, totals) on the same index (the period keys):
+            (measure, segment) columns, and the summed measures and KPIs of
+            all segments
+    """
+    by = list(by)
+    sums = sum_measures(frame, by + [segment])
+    segments = sums.pivot_table(index=by, columns=segment, values=list(measures), aggfunc='sum', fill_value=0, observed=True)
+
+    # Period totals add the (few) period x segment sums up
+    summed = [measure for measure in base_measures if measure in sums.columns]
+    period_sums = sums.groupby(by, observed=True, sort=True)[summed].sum().reset_index()
+    totals = derive_kpis(period_sums, by, kpis, capacity, _default_days(frame, days), subtotal=total_row)
+
+    if total_row is not None:
+        segments.loc[total_row] = segments.sum(numeric_only=True)
+    totals.index = segments.index
+    return segments, totals.drop(columns=by)
@@ -0,0 +1,216 @@
+import numpy as np
+import pandas as pd
+from utils.calendar_alignment import align_dates
+from utils.kpi import evaluate_kpis
+
+# Month-to-date, year-to-date and rolling-12-month figures are differences of
+# cumulative sums kept on a dense daily grid: the sum of a measure over any
+# date range is cumsum[end + 1] - cumsum[start], so every "as of" question is
+# two lookups per measure and segment, whatever the length of the history.
+#
+# The sums are held in a dict:
+#   'start'    - first day of the grid (row 0 of the grid is the day before)
+#   'by'       - segment columns, and 'segments' their values (one per column
+#                of the grid; a single 'All' segment when by is empty)
+#   'measures' - measure names
+#   'cumsum'   - float array of shape (days + 1, measures, segments)
+period_names = {
+    'mtd': 'Month to date',
+    'ytd': 'Year to date',
+    'r12': 'Rolling 12 months',
+}
+
+default_measures = ['n_rooms', 'ca_room']
+
+
+def _segment_codes(daily, by, segments):
+    """Column of each row in the grid, adding unknown segments to the list"""
+    if not by:
+        return np.zeros(len(daily), dtype=np.int64), segments or [('All',)]
+    keys = list(daily[by].itertuples(index=False, name=None))
+    positions = {segment: i for i, segment in enumerate(segments)}
+    for key in sorted(set(keys) - set(positions)):
+        positions[key] = len(segments)
+        segments = segments + [key]
+    return np.fromiter((positions[key] for key in keys), dtype=np.int64, count=len(keys)), segments
+
+
+def _daily_values(daily, measures, day_positions, segment_codes, n_days, n_segments):
+    """Scatter rows into a (days, measures, segments) array, adding rows of the same cell"""
+    values = np.zeros((n_days, len(measures), n_segments))
+    for m, measure in enumerate(measures):
+        np.add.at(values[:, m, :], (day_positions, segment_codes), daily[measure].to_numpy(dtype=float))
+    return values
+
+
+def build_period_sums(daily, by=(), measures=None):
+    """
+    Build the cumulative sums of a daily series.
+
+    Args:
+        daily (pandas.DataFrame): Rows with 'day', the measures and the segment
+            columns (e.g. transformed PU rows or a daily cube roll-up); rows of
+            the same day and segment are added up
+        by (tuple, optional): Segment columns kept (default: totals only)
+        measures (list, optional): Measures (default: n_rooms, ca_room)
+
+    Returns:
+        dict: The cumulative sums (see the module comment)
+    """
+    by = list(by)
+    measures = list(measures or default_measures)
+    days = pd.to_datetime(daily['day']).dt.normalize()
+    start = days.min() if len(days) else pd.Timestamp.today().normalize()
+    n_days = (days.max() - start).days + 1 if len(days) else 0
+
+    codes, segments = _segment_codes(daily, by, [])
+    positions = ((days - start).dt.days).to_numpy(dtype=np.int64)
+    values = _daily_values(daily, measures, positions, codes, n_days, len(segments))
+
+    cumsum = np.zeros((n_days + 1, len(measures), len(segments)))
+    np.cumsum(values, axis=0, out=cumsum[1:])
+    return {'start': start, 'by': by, 'segments': segments, 'measures': measures, 'cumsum': cumsum}
+
+
+def update_period_sums(sums, daily):
+    """
+    Fold new or revised days into the cumulative sums.
+
+    The rows replace everything stored for the days they cover. Days after the
+    last stored day are appended from the last cumulative row, so a new day
+    costs a row, not a rebuild; revised days shift the sums from the first
+    revised day on.
+
+    Args:
+        sums (dict): Cumulative sums from build_period_sums(); their array is
+            updated in place when the grid does not grow
+        daily (pandas.DataFrame): Rows of the new or revised days
+
+    Returns:
+        dict: The updated cumulative sums
+    """
+    if daily.empty:
+        return sums
+
+    days = pd.to_datetime(daily['day']).dt.normalize()
+    start, cumsum = sums['start'], sums['cumsum']
+
+    # Grow the grid backwards with empty days, and forwards by carrying the last row
+    if days.min() < start:
+        extra = (start - days.min()).days
+        cumsum = np.concatenate([np.zeros((extra,) + cumsum.shape[1:]), cumsum])
+        start = days.min()
+    end = start + pd.Timedelta(days=len(cumsum) - 2)
+    if days.max() > end:
+        extra = (days.max() - end).days
+        cumsum = np.concatenate([cumsum, np.repeat(cumsum[-1:], extra, axis=0)])
+
+    # New segments start with empty sums
+    codes, segments = _segment_codes(daily, sums['by'], sums['segments'])
+    if len(segments) > cumsum.shape[2]:
+        cumsum = np.concatenate([cumsum, np.zeros(cumsum.shape[:2] + (len(segments) - cumsum.shape[2],))], axis=2)
+
+    # Difference between the new and stored values of the covered days
+    positions = ((days - start).dt.days).to_numpy(dtype=np.int64)
+    covered, rows = np.unique(positions, return_inverse=True)
+    new_values = _daily_values(daily, sums['measures'], rows, codes, len(covered), len(segments))
+    delta = new_values - (cumsum[covered + 1] - cumsum[covered])
+
+    # Shift the cumulative rows from the first covered day on
+    first = covered[0]
+    delta_by_day = np.zeros((len(cumsum) - 1 - first,) + cumsum.shape[1:])
+    delta_by_day[covered - first] = delta
+    cumsum[first + 1:] += np.cumsum(delta_by_day, axis=0)
+
+    return {**sums, 'start': start, 'segments': segments, 'cumsum': cumsum}
+
+
+def range_sums(sums, starts, ends):
+    """
+    Sum the measures over date ranges.
+
+    Args:
+        sums (dict): Cumulative sums
+        starts (array-like): First day of each range
+        ends (array-like): Last day of each range (inclusive)
+
+    Returns:
+        numpy.ndarray: Shape (ranges, measures, segments); days outside the
+            grid count as empty
+    """
+    first = sums['start'].to_datetime64()
+    n_days = len(sums['cumsum']) - 1
+    lo = (pd.DatetimeIndex(starts).to_numpy(dtype='datetime64[ns]') - first) // np.timedelta64(1, 'D')
+    hi = (pd.DatetimeIndex(ends).to_numpy(dtype='datetime64[ns]') - first) // np.timedelta64(1, 'D') + 1
+    lo, hi = np.clip(lo, 0, n_days), np.clip(hi, 0, n_days)
+    return sums['cumsum'][np.maximum(hi, lo)] - sums['cumsum'][lo]
+
+
+def period_bounds(as_of, periods=('mtd', 'ytd', 'r12')):
+    """
+    Return the date range of each period ending on a date.
+
+    Args:
+        as_of (date-like): Last day included
+        periods (tuple, optional): 'mtd', 'ytd' and/or 'r12'
+
+    Returns:
+        tuple: (starts, ends) DatetimeIndex, one entry per period
+    """
+    as_of = pd.Timestamp(as_of).normalize()
+    first_days = {
+        'mtd': as_of.replace(day=1),
+        'ytd': as_of.replace(month=1, day=1),
+        'r12': as_of - pd.DateOffset(years=1) + pd.Timedelta(days=1),
+    }
+    starts = pd.DatetimeIndex([first_days[period] for period in periods])
+    return starts, pd.DatetimeIndex([as_of] * len(periods))
+
+
+def period_to_date(sums, as_of, periods=('mtd', 'ytd', 'r12'), align='date', kpis=('pm',)):
+    """
+    Compare period-to-date figures with the same period last year.
+
+    Args:
+        sums (dict): Cumulative sums from build_period_sums()
+        as_of (date-like): Last day included
+        periods (tuple, optional): 'mtd', 'ytd' and/or 'r12' (default: all three)
+        align (str, optional): How last year's period is found: 'date' (same
+            calendar dates) or 'weekday' (same weekdays, 364 days back)
+        kpis (tuple, optional): KPIs computed for both years (default: pm)
+
+    Returns:
+        pandas.DataFrame: One row per period (and segment) with its label,
+            start and end, the segment columns, each measure and KPI, its
+            last-year value (suffix '_ly') and the change in percent (suffix
+            '_change')
+    """
+    starts, ends = period_bounds(as_of, periods)
+    last_year = align_dates(pd.Series(starts.append(ends)), 1, align)[1].to_numpy()
+    starts_ly, ends_ly = last_year[:len(periods)], last_year[len(periods):]
+
+    current = range_sums(sums, starts, ends)
+    previous = range_sums(sums, starts_ly, ends_ly)
+
+    # One row per (period, segment), one column per measure
+    n_segments = len(sums['segments'])
+    index = pd.MultiIndex.from_product([list(periods), range(n_segments)], names=['period', 'segment'])
+    frames = []
+    for values in (current, previous):
+        frame = pd.DataFrame(values.transpose(0, 2, 1).reshape(-1, len(sums['measures'])), columns=sums['measures'], index=index)
+        frames.append(evaluate_kpis(frame, kpis))
+    result = frames[0].join(frames[1], rsuffix='_ly')
+
+    for column in frames[0].columns:
+        ly = result[f'{column}_ly'].to_numpy()
+        change = np.divide(result[column].to_numpy() - ly, ly, out=np.full(len(ly), np.nan), where=ly != 0)
+        result[f'{column}_change'] = change * 100
+
+    result = result.reset_index()
+    result.insert(1, 'label', result['period'].map(period_names))
+    result.insert(2, 'start', np.repeat(starts, n_segments))
+    result.insert(3, 'end', np.repeat(ends, n_segments))
+    segments = result.pop('segment')
+    for i, column in enumerate(sums['by']):
+        result.insert(4 + i, column, [sums['segments'][code][i] for code in segments])
+    return result
@@ -0,0 +1,31 @@
+import streamlit as st
+from fetch_data.property_PU import list_properties, default_property_id, get_property
+
+def select_property():
+    """
+    Let the user pick the property the page shows.
+
+    The choice is kept in the session so every page shows the same hotel. The
+    selector only appears in the sidebar when the portfolio has more than one
+    property.
+
+    Returns:
+        dict: The selected property entry (property_id, name, capacity)
+    """
+    properties = list_properties()
+    ids = [entry["property_id"] for entry in properties]
+
+    # Start with the default property
+    if st.session_state.get("property_id") not in ids:
+        st.session_state.property_id = default_property_id()
+
+    if len(properties) > 1:
+        names = {entry["property_id"]: entry["name"] for entry in properties}
+        st.sidebar.selectbox(
+            "Property",
+            ids,
+            format_func=lambda property_id: names[property_id],
+            key="property_id",
+        )
+
+    return get_property(st.session_state.property_id)